@@ -1,10 +1,11 @@
 import os
-import json
 import asyncio
-from typing import Optional, Tuple, List
+import logging
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
 
-from aiogram import Bot, Dispatcher, Router, F
-from aiogram.filters import CommandStart, Command
+from aiogram import Bot, Dispatcher, Router
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
 from aiogram.types import (
     Message,
     CallbackQuery,
@@ -13,40 +14,82 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
     KeyboardButton,
 )
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.fsm.state import StatesGroup, State
-from aiogram.fsm.context import FSMContext
 
+from apps.telegram.metrics import BotMetrics, TimedStorage, start_metrics_server, track_handlers
+from apps.telegram.middlewares import (
+    DedupMiddleware,
+    FSMKeyMiddleware,
+    I18nMiddleware,
+    SafetyMiddleware,
+    StateTxMiddleware,
+)
+from apps.telegram.outbound import RESULT, URGENT, OutboundQueue, set_priority
+from apps.telegram.storage import SQLiteStorage
 from apps.telegram.ui_render import main_menu, request_location_kb, remove_kb
-
+from core.actions import ActionTable, call_data
+from core.dedup import RecentIds
+from core.eventlog import EventLog
+from core.resources import ResourceSnapshot, ResourceStore
+from core.router import Intent
+from core.safety import RedFlagDetector
+from core.geo import ANY
+from core.geocoder import geocode, get_geocoder
+from core.scenario_engine import Step, load_scenario
+from core.state_tx import StateTx
+from core.i18n import Catalog, get_i18n
+from core.template_engine import load_templates
+
+
+logger = logging.getLogger(__name__)
 
 router = Router()
 
 
-# ---------- FSM states ----------
-class Flow(StatesGroup):
-    awaiting_problem = State()
-    awaiting_urgency = State()
-    awaiting_location = State()
-    awaiting_address = State()
+# ---------- Resources ----------
+DEFAULT_RESOURCES = {
+    "hospital": {
+        "name": "Liepājas reģionālā slimnīca",
+        "address": "Slimnīcas iela 25, Liepāja",
+        "phone": "+37163403222",
+    },
+    # Optional example:
+    # "duty_doctor": {"name":"Dežūrārsts","phone":"+371...", "notes":"..."}
+}
 
+# data/i18n/<локаль>.json — каталоги грузятся при первом обращении; по умолчанию ru
+I18N = get_i18n("data/i18n")
 
-# ---------- Resources ----------
-def load_liepaja_resources() -> dict:
-    path = "data/resources/liepaja.json"
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {
-            "hospital": {
-                "name": "Liepājas reģionālā slimnīca",
-                "address": "Slimnīcas iela 25, Liepāja",
-                "phone": "+37163403222",
-            },
-            # Optional example:
-            # "duty_doctor": {"name":"Dežūrārsts","phone":"+371...", "notes":"..."}
-        }
+# data/resources/<город>.json — по файлу на город; liepaja — город по умолчанию
+RESOURCES = ResourceStore("data/resources", fallback=DEFAULT_RESOURCES, default_city="liepaja")
+
+# Журнал событий triage: пишет только после EVENTS.start (см. build_app), emit — без I/O
+EVENTS = EventLog()
+
+
+def load_resources() -> ResourceSnapshot:
+    return RESOURCES.get()
+
+
+def pick_facility(
+    resources: Mapping,
+    category: str,
+    severe: bool,
+    from_coords: Optional[Tuple[float, float]],
+) -> Tuple[Optional[Mapping], Mapping, Optional[float]]:
+    """
+    Куда вести: ближайшее учреждение под специалиста (при срочности — только "*",
+    т.е. больницы), данные его города и расстояние в км. Без координат — больница
+    города по умолчанию (None).
+    """
+    if from_coords and isinstance(resources, ResourceSnapshot):
+        specialist = ANY if severe or category == "red_flag" else category
+        found = resources.nearest(from_coords[0], from_coords[1], specialist=specialist)
+        if found:
+            facility, km = found[0]
+            return facility, resources.city(facility), km
+    return None, resources, None
 
 
 def google_maps_route_url(from_lat: float, from_lon: float, dest_query: str, mode: str) -> str:
@@ -63,446 +106,531 @@ def google_maps_search_url(query: str) -> str:
     return f"https://www.google.com/maps/search/?api=1&query={q}"
 
 
-# ---------- Doctor mapping ----------
-def _contains_any(text: str, words: List[str]) -> bool:
-    return any(w in text for w in words)
-
-
-def guess_specialist(problem: str) -> str:
-    """
-    Симптом -> врач (без диагнозов).
-    """
-    p = (problem or "").lower().strip()
-
-    # red flags (в тексте "подходит" это не печатаем как паника — просто рекомендация)
-    if _contains_any(
-        p,
-        [
-            "не хватает воздуха",
-            "удуш",
-            "обморок",
-            "потеря сознания",
-            "кровь",
-            "кровотеч",
-            "судорог",
-            "парализ",
-            "инсульт",
-            "в груди жмет",
-            "сильная боль",
-            "нестерпим",
-        ],
-    ):
-        return "🚨 если резко/плохо — 113"
-
-    # ЖКТ
-    if _contains_any(
-        p,
-        ["живот", "желуд", "киш", "тошн", "рвот", "понос", "диар", "аппен", "гастр", "изжог", "печен", "желч"],
-    ):
-        return "гастроэнтеролог; при резкой боли — хирург"
-
-    # зубы/челюсть
-    if _contains_any(p, ["зуб", "десн", "челюст", "кариес", "пломб", "зуб мудр"]):
-        return "стоматолог"
-
-    # ЛОР (ухо/горло/нос)
-    if _contains_any(p, ["ухо", "отит", "горло", "ангин", "нос", "гаймор", "синус", "насморк", "заложен"]):
-        return "ЛОР (отоларинголог)"
-
-    # глаза
-    if _contains_any(p, ["глаз", "зрение", "веко", "конъюнкт", "линз", "слез", "ячмен"]):
-        return "офтальмолог"
-
-    # сердце/дыхание
-    if _contains_any(p, ["сердц", "давлен", "аритм", "пульс", "тахикард", "одыш", "задыш", "астм", "бронх", "в груди"]):
-        return "кардиолог/пульмонолог (если резко/плохо — 113)"
-
-    # неврология/голова
-    if _contains_any(p, ["голова", "мигр", "головокруж", "онем", "мураш", "слабост", "невралг"]):
-        return "невролог (если резко/плохо — 113)"
-
-    # спина/суставы/травмы
-    if _contains_any(p, ["спина", "поясниц", "шея", "сустав", "колен", "плеч", "растяж", "ушиб", "перелом", "вывих"]):
-        return "травматолог-ортопед"
-
-    # кожа/аллергия
-    if _contains_any(p, ["сып", "зуд", "пятн", "аллерг", "дермат", "экзем", "крапивниц", "псориаз"]):
-        return "дерматолог/аллерголог (если отёк/удушье — 113)"
-
-    # мочеполовая (включая сленг — но мы его не показываем пользователю)
-    if _contains_any(
-        p,
-        [
-            "моч",
-            "больно писать",
-            "жжет",
-            "жжёт",
-            "цистит",
-            "уретр",
-            "уретра",
-            "почки",
-            "пах",
-            "простит",
-            "уролог",
-            # сленг-ключи (тихо, только для распознавания):
-            "письк",
-            "пенис",
-            "член",
-            "яичк",
-            "мошон",
-        ],
-    ):
-        return "уролог (при цистите у женщин — также гинеколог)"
-
-    # женское здоровье
-    if _contains_any(p, ["месячн", "менстр", "беремен", "выделен", "внизу живота", "матк", "яичник"]):
-        return "гинеколог"
-
-    # психика/паника/сон
-    if _contains_any(p, ["паник", "тревог", "депресс", "бессон", "не сплю", "страх"]):
-        return "психотерапевт/психиатр"
-
-    # температура/простуда/общее
-    if _contains_any(p, ["температ", "озноб", "простуд", "кашель", "слабост", "ломит", "горячк"]):
-        return "терапевт"
-
-    return "терапевт (врач общей практики)"
-
-
 # ---------- Keyboards ----------
-def urgency_kb() -> InlineKeyboardMarkup:
+# Статические клавиатуры собираются один раз на локаль (Catalog.memo) и переиспользуются
+# (их никто не мутирует). Без каталога — язык по умолчанию.
+def _urgency_kb(tr: Catalog) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
-                InlineKeyboardButton(text="🔴 Сильно / резко / хуже", callback_data="urgency:severe"),
-                InlineKeyboardButton(text="🟡 Терпимо", callback_data="urgency:mild"),
+                InlineKeyboardButton(text=tr.button("urgency_severe"), callback_data="urgency:severe"),
+                InlineKeyboardButton(text=tr.button("urgency_mild"), callback_data="urgency:mild"),
             ]
         ]
     )
 
 
-def menu_button_kb() -> ReplyKeyboardMarkup:
+def _menu_button_kb(tr: Catalog) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="🏠 Меню")]],
+        keyboard=[[KeyboardButton(text=tr.button("menu"))]],
         resize_keyboard=True,
         one_time_keyboard=False,
     )
 
 
-def actions_kb(resources: dict, severe: bool, from_coords: Optional[Tuple[float, float]] = None) -> InlineKeyboardMarkup:
-    hospital = resources.get("hospital", {}) or {}
-    duty = resources.get("duty_doctor", {}) or {}
+def urgency_kb(tr: Optional[Catalog] = None) -> InlineKeyboardMarkup:
+    return (tr or I18N.default).memo("urgency_kb", _urgency_kb)
+
+
+def menu_button_kb(tr: Optional[Catalog] = None) -> ReplyKeyboardMarkup:
+    return (tr or I18N.default).memo("menu_button_kb", _menu_button_kb)
+
+
+# Раскладка actions_kb: строки кнопок, кроме маршрутов — вместо них (текст, режим),
+# URL маршрута зависит от координат и собирается на каждый вызов.
+_Layout = Tuple[str, List[Union[List[InlineKeyboardButton], Tuple[str, str]]]]
+
+
+def _rows(tr: Catalog) -> Dict[str, List[InlineKeyboardButton]]:
+    return {
+        "taxi": [InlineKeyboardButton(text=tr.button("taxi"), url="https://bolt.eu")],
+        "113": [InlineKeyboardButton(text=tr.button("call_113"), callback_data=call_data("113"))],
+        "clinic": [InlineKeyboardButton(text=tr.button("call_clinic"), callback_data=call_data("clinic"))],
+        "duty": [InlineKeyboardButton(text=tr.button("call_duty"), callback_data=call_data("duty"))],
+    }
 
-    hosp_name = hospital.get("name", "Клиника")
+
+_actions_cache: Dict[Tuple[str, bool, bool, Optional[str]], Union[_Layout, InlineKeyboardMarkup]] = {}
+_actions_cache_version: Optional[int] = None
+
+
+def _actions_layout(
+    resources: Mapping,
+    severe: bool,
+    with_route: bool,
+    facility: Optional[Mapping],
+    tr: Catalog,
+) -> _Layout:
+    common = tr.memo("actions_rows", _rows)
+    if facility is None:
+        hospital = resources.get("hospital", {}) or {}
+        duty = resources.get("duty_doctor", {}) or {}
+        clinic_row = common["clinic"]
+        duty_row = common["duty"]
+    else:
+        # учреждение из каталога: колбэки несут его id / город, чтобы on_call_callback нашел контакты
+        hospital = facility
+        duty = resources.city(facility).get("duty_doctor", {}) or {}
+        clinic_row = [InlineKeyboardButton(text=tr.button("call_clinic"), callback_data=call_data("clinic", facility["id"]))]
+        duty_row = [InlineKeyboardButton(text=tr.button("call_duty"), callback_data=call_data("duty", facility["city"]))]
+
+    hosp_name = hospital.get("name", tr.t("clinic"))
     hosp_addr = hospital.get("address", "")
     dest_query = f"{hosp_name} {hosp_addr}".strip()
 
-    buttons = []
+    rows: list = []
 
     # Срочно
     if severe:
-        buttons.append([InlineKeyboardButton(text="🚑 113", callback_data="call:113")])
+        rows.append(common["113"])
         if hospital.get("phone"):
-            buttons.append([InlineKeyboardButton(text="☎️ Клиника", callback_data="call:clinic")])
-
-        if from_coords:
-            lat, lon = from_coords
-            buttons.append([InlineKeyboardButton(text="🚗 Маршрут", url=google_maps_route_url(lat, lon, dest_query, "driving"))])
+            rows.append(clinic_row)
+        if with_route:
+            rows.append((tr.button("route"), "driving"))
         else:
-            buttons.append([InlineKeyboardButton(text="📍 Клиника на карте", url=google_maps_search_url(dest_query))])
-
-        buttons.append([InlineKeyboardButton(text="🚕 Такси (Bolt)", url="https://bolt.eu")])
-        return InlineKeyboardMarkup(inline_keyboard=buttons)
+            rows.append([InlineKeyboardButton(text=tr.button("map"), url=google_maps_search_url(dest_query))])
+        rows.append(common["taxi"])
+        return dest_query, rows
 
     # Терпимо
     if duty.get("phone"):
-        buttons.append([InlineKeyboardButton(text="👨‍⚕️ Дежурный врач", callback_data="call:duty")])
-
+        rows.append(duty_row)
     if hospital.get("phone"):
-        buttons.append([InlineKeyboardButton(text="☎️ Клиника", callback_data="call:clinic")])
-
-    if from_coords:
-        lat, lon = from_coords
-        buttons.append([InlineKeyboardButton(text="🚶 Пешком", url=google_maps_route_url(lat, lon, dest_query, "walking"))])
-        buttons.append([InlineKeyboardButton(text="🚌 Автобус", url=google_maps_route_url(lat, lon, dest_query, "transit"))])
-        buttons.append([InlineKeyboardButton(text="🚗 Машина", url=google_maps_route_url(lat, lon, dest_query, "driving"))])
+        rows.append(clinic_row)
+    if with_route:
+        rows += [(tr.button(mode), mode) for mode in ("walking", "transit", "driving")]
     else:
-        buttons.append([InlineKeyboardButton(text="📍 Клиника на карте", url=google_maps_search_url(dest_query))])
-
-    buttons.append([InlineKeyboardButton(text="🚕 Такси (Bolt)", url="https://bolt.eu")])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
-
-# ---------- Handlers ----------
-@router.message(CommandStart())
-async def on_start(message: Message, state: FSMContext) -> None:
-    await state.clear()
-    await message.answer(
-        "👋 *DzīvotViegli*\n"
-        "⚡ сложно → просто → действие\n\n"
-        "✍️ Напиши, что происходит сейчас.",
-        parse_mode="Markdown",
-        reply_markup=main_menu(),
+        rows.append([InlineKeyboardButton(text=tr.button("map"), url=google_maps_search_url(dest_query))])
+    rows.append(common["taxi"])
+    return dest_query, rows
+
+
+def actions_kb(
+    resources: Mapping,
+    severe: bool,
+    from_coords: Optional[Tuple[float, float]] = None,
+    facility: Optional[Mapping] = None,
+    tr: Optional[Catalog] = None,
+) -> InlineKeyboardMarkup:
+    """
+    facility — учреждение из каталога (pick_facility); None — больница города по умолчанию.
+    tr — каталог языка (подписи кнопок); None — язык по умолчанию.
+    """
+    global _actions_cache_version
+
+    tr = tr or I18N.default
+    with_route = bool(from_coords)
+    key = (tr.locale, severe, with_route, facility["id"] if facility is not None else None)
+    version = getattr(resources, "version", None)
+    if version is None:
+        # обычный dict (не снимок ResourceStore) — без кеша
+        cached = None
+    else:
+        if version != _actions_cache_version:
+            _actions_cache.clear()
+            _actions_cache_version = version
+        cached = _actions_cache.get(key)
+
+    if cached is None:
+        dest_query, rows = _actions_layout(resources, severe, with_route, facility, tr)
+        cached = (dest_query, rows) if with_route else InlineKeyboardMarkup(inline_keyboard=rows)
+        if version is not None:
+            _actions_cache[key] = cached
+
+    if not with_route:
+        return cached
+
+    dest_query, rows = cached
+    lat, lon = from_coords
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=row[0], url=google_maps_route_url(lat, lon, dest_query, row[1]))]
+            if isinstance(row, tuple)
+            else row
+            for row in rows
+        ]
     )
-    await state.set_state(Flow.awaiting_problem)
 
 
-@router.message(Command("menu"))
-async def on_menu_command(message: Message, state: FSMContext) -> None:
-    await state.clear()
-    await message.answer("🏠 Меню:", reply_markup=main_menu())
-    await state.set_state(Flow.awaiting_problem)
+# ---------- Handlers ----------
+# Какой хендлер вызвать и куда перейти, решает сценарий data/scenarios/health_triage.json
+# (core.scenario_engine); здесь — только сами шаги. Состояние после шага — "next" из
+# перехода, если хендлер не уточнил его через step.goto()/step.stay().
+# FSM — через tx (core.state_tx): данные прочитаны до хендлера, правки и новое состояние
+# пишутся одним вызовом storage после шага.
+# Последний ответ хендлер возвращает, а не await-ит: в webhook-режиме aiogram отдает его
+# прямо в HTTP-ответе Telegram (минус один исходящий запрос), в polling — вызывает сам.
+async def on_start(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    return message.answer(i18n.t("start"), parse_mode="Markdown", reply_markup=main_menu(i18n))
 
 
-@router.message(F.text == "🏠 Меню")
-async def on_menu_button(message: Message, state: FSMContext) -> None:
-    await state.clear()
-    await message.answer("🏠 Меню:", reply_markup=main_menu())
-    await state.set_state(Flow.awaiting_problem)
+async def on_menu(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    return message.answer(i18n.t("menu"), reply_markup=main_menu(i18n))
 
 
-@router.message(F.text == "⬅️ Назад в меню")
-async def on_back(message: Message, state: FSMContext) -> None:
-    await state.clear()
-    await message.answer("Ок. Выбери кнопку или напиши 1 строкой:", reply_markup=main_menu())
-    await state.set_state(Flow.awaiting_problem)
+async def on_back(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    return message.answer(i18n.t("back"), reply_markup=main_menu(i18n))
 
 
-@router.message(F.text == "🩺 Самочувствие")
-async def on_health_menu(message: Message, state: FSMContext) -> None:
-    await state.set_state(Flow.awaiting_problem)
-    await message.answer(
-        "🩺 *Самочувствие*\n"
-        "✍️ Опиши, что беспокоит сейчас (симптомы/ощущения).",
-        parse_mode="Markdown",
-        reply_markup=main_menu(),
-    )
+async def on_health_menu(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    return message.answer(i18n.t("health_menu"), parse_mode="Markdown", reply_markup=main_menu(i18n))
 
 
-@router.message(F.text == "🌍 Язык")
-async def on_language(message: Message) -> None:
-    await message.answer("Пока RU. LV подключим следующим блоком (i18n).")
+async def on_language(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    # RU <-> LV по кругу; язык хранится в FSM-данных и переживает сброс сценария ("keep")
+    tr = I18N.get(I18N.next_locale(i18n.locale))
+    tx.update_data(locale=tr.locale)
+    return message.answer(tr.t("language_set"), reply_markup=main_menu(tr))
 
 
-@router.message(Flow.awaiting_problem, F.text)
-async def on_problem_text(message: Message, state: FSMContext) -> None:
+async def on_problem_text(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> Optional[TelegramMethod]:
     text = (message.text or "").strip()
     if not text:
-        return
+        step.stay()
+        return None
 
-    await state.update_data(problem=text)
+    tx.update_data(problem=text)
 
-    await message.answer(
-        f"✅ Понял: «{text}»\n\n🕒 Насколько срочно?",
-        reply_markup=urgency_kb(),
-    )
-    await state.set_state(Flow.awaiting_urgency)
+    return message.answer(i18n.t("problem_ack", problem=text), reply_markup=urgency_kb(i18n))
 
 
-@router.callback_query(F.data.in_({"urgency:severe", "urgency:mild"}))
-async def on_urgency_anytime(callback: CallbackQuery, state: FSMContext) -> None:
-    severe = (callback.data == "urgency:severe")
-    await state.update_data(severe=severe)
+# Ответ на нажатие кнопки уходит сразу, параллельно с основным сообщением:
+# кнопка перестает крутиться через один запрос к API, а не через два.
+_acks: Set[asyncio.Task] = set()
+
 
-    label = "🔴 Срочно" if severe else "🟡 Терпимо"
-    await callback.message.answer(
-        f"Ок: {label}\n📍 Пришли геолокацию или введи адрес.",
-        reply_markup=request_location_kb(),
+async def _send_ack(method: AnswerCallbackQuery) -> None:
+    try:
+        await method
+    except TelegramAPIError:
+        # query устарел или уже отвечен — основной ответ от этого не зависит
+        logger.warning("callback ack failed", exc_info=True)
+
+
+def acknowledge(callback: CallbackQuery, text: Optional[str] = None, show_alert: bool = False) -> None:
+    task = asyncio.get_running_loop().create_task(_send_ack(callback.answer(text, show_alert=show_alert)))
+    _acks.add(task)
+    task.add_done_callback(_acks.discard)
+
+
+async def on_urgency(callback: CallbackQuery, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    if callback.data not in {"urgency:severe", "urgency:mild"}:
+        step.stay()
+        return callback.answer()
+
+    severe = (callback.data == "urgency:severe")
+    tx.update_data(severe=severe)
+    EVENTS.emit("urgency", callback.from_user.id, severe=severe)
+
+    acknowledge(callback, i18n.t("accepted"))
+    label = i18n.t("urgency_severe" if severe else "urgency_mild")
+    return callback.message.answer(i18n.t("urgency_ack", label=label), reply_markup=request_location_kb(i18n))
+
+
+async def on_ask_address(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    return message.answer(i18n.t("ask_address"), reply_markup=menu_button_kb(i18n))
+
+
+# Шаблоны ответов (data/templates/health_templates.json), скомпилированы при импорте.
+TEMPLATES = load_templates("data/templates/health_templates.json")
+
+
+def _result_text(
+    tr: Catalog,
+    problem: str,
+    category: str,
+    severe: bool,
+    hospital: Mapping,
+    duty: Mapping,
+    address: Optional[str] = None,
+    km: Optional[float] = None,
+) -> str:
+    return TEMPLATES.render(
+        "result",
+        tr.locale,
+        problem=problem,
+        specialist=tr.specialist(category),
+        address=address,
+        severe=severe,
+        duty=duty,
+        hospital=hospital,
+        distance=tr.plural("km", max(1, round(km))) if km is not None else None,
     )
-    await state.set_state(Flow.awaiting_location)
-    await callback.answer("Принято")
 
 
-@router.message(Flow.awaiting_location, F.text == "✍️ Ввести адрес вручную")
-async def on_ask_address(message: Message, state: FSMContext) -> None:
-    await message.answer("✍️ Напиши адрес 1 строкой (город, улица, дом).", reply_markup=menu_button_kb())
-    await state.set_state(Flow.awaiting_address)
+async def _coords_result(
+    message: Message,
+    tr: Catalog,
+    problem: str,
+    severe: bool,
+    coords: Tuple[float, float],
+    address: Optional[str] = None,
+    via: str = "location",
+) -> TelegramMethod:
+    """
+    Общий ответ для геолокации и распознанного адреса: ближайшее подходящее
+    учреждение и маршруты от точки.
+    """
+    set_priority(URGENT if severe else RESULT)
+    resources = load_resources()
+    category = tr.classify(problem)
+    EVENTS.emit("result", message.chat.id, category=category, severe=severe, via=via, locale=tr.locale)
+    facility, city, km = pick_facility(resources, category, severe, coords)
+    hospital = facility if facility is not None else resources.get("hospital", {}) or {}
+    duty = city.get("duty_doctor", {}) or {}
+
+    kb = actions_kb(resources, severe=severe, from_coords=coords, facility=facility, tr=tr)
+    return message.answer(_result_text(tr, problem, category, severe, hospital, duty, address, km), reply_markup=kb)
 
 
-@router.message(Flow.awaiting_location, F.location)
-async def on_location(message: Message, state: FSMContext) -> None:
+async def on_location(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
     loc = message.location
-    data = await state.get_data()
+    data = tx.data
 
     problem = data.get("problem")
     if not problem:
-        await message.answer(
-            "✍️ Сначала напиши, что происходит (1 строка).",
-            reply_markup=menu_button_kb(),
-        )
-        await state.set_state(Flow.awaiting_problem)
-        return
+        return message.answer(i18n.t("problem_first"), reply_markup=menu_button_kb(i18n))
 
     severe = bool(data.get("severe", False))
-    await state.update_data(lat=loc.latitude, lon=loc.longitude, severe=severe)
+    tx.update_data(lat=loc.latitude, lon=loc.longitude, severe=severe)
 
-    await message.answer("✅ Геолокация принята. Собираю варианты…", reply_markup=menu_button_kb())
+    await message.answer(i18n.t("location_accepted"), reply_markup=menu_button_kb(i18n))
+    return await _coords_result(message, i18n, problem, severe, (loc.latitude, loc.longitude))
+
+
+async def on_address(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> Optional[TelegramMethod]:
+    addr = (message.text or "").strip()
+    if not addr:
+        step.stay()
+        return None
 
-    resources = load_liepaja_resources()
+    data = tx.data
+    severe = bool(data.get("severe", False))
+    problem = data.get("problem", i18n.t("default_problem"))
+
+    # адрес из локального справочника улиц -> тот же путь, что и с геолокацией
+    found = geocode(addr)
+    if found is not None:
+        tx.update_data(address=addr, lat=found.lat, lon=found.lon)
+        await message.answer(i18n.t("address_found", label=found.label), reply_markup=menu_button_kb(i18n))
+        return await _coords_result(message, i18n, problem, severe, (found.lat, found.lon), found.label, "address")
+
+    set_priority(URGENT if severe else RESULT)
+    tx.update_data(address=addr)
+    resources = load_resources()
     hospital = resources.get("hospital", {}) or {}
     duty = resources.get("duty_doctor", {}) or {}
 
-    info_lines = [
-        f"📝 Ситуация: «{problem}»",
-        f"👨‍⚕️ Подходит: {guess_specialist(problem)}",
-        "",
-    ]
+    category = i18n.classify(problem)
+    EVENTS.emit("result", message.chat.id, category=category, severe=severe, via="address_text", locale=i18n.locale)
+    kb = actions_kb(resources, severe=severe, from_coords=None, tr=i18n)
+    text = _result_text(i18n, problem, category, severe, hospital, duty, addr)
+    await message.answer(text, reply_markup=kb)
+    return message.answer(i18n.t("menu_hint"), reply_markup=menu_button_kb(i18n))
 
-    if severe:
-        info_lines += ["🚨 Если станет хуже — 113", ""]
 
-    if duty.get("phone"):
-        info_lines += [
-            f"👨‍⚕️ {duty.get('name', 'Дежурный врач')}",
-            f"📞 {duty.get('phone')}",
-        ]
+async def _call_113(callback: CallbackQuery, i18n: Catalog, resources: Mapping, ref: Optional[str]) -> TelegramMethod:
+    set_priority(URGENT)
+    acknowledge(callback, "113")
+    return callback.message.answer(i18n.t("urgent_113"), reply_markup=menu_button_kb(i18n))
+
+
+async def _call_clinic(callback: CallbackQuery, i18n: Catalog, resources: Mapping, ref: Optional[str]) -> TelegramMethod:
+    hospital = resources.get("hospital", {}) or {}
+    if ref and isinstance(resources, ResourceSnapshot):
+        hospital = resources.facility(ref) or hospital
+    phone = (hospital.get("phone") or "").strip()
+    name = hospital.get("name", i18n.t("clinic"))
+    if phone:
+        acknowledge(callback, i18n.t("clinic"))
+        return callback.message.answer(f"☎️ {name}\n{phone}", reply_markup=menu_button_kb(i18n))
+    return callback.answer(i18n.t("clinic_no_phone"), show_alert=True)
+
+
+async def _call_duty(callback: CallbackQuery, i18n: Catalog, resources: Mapping, ref: Optional[str]) -> TelegramMethod:
+    duty = resources.get("duty_doctor", {}) or {}
+    if ref and isinstance(resources, ResourceSnapshot):
+        duty = resources.cities.get(ref, resources).get("duty_doctor", {}) or {}
+    phone = (duty.get("phone") or "").strip()
+    name = duty.get("name", i18n.t("duty"))
+    if phone:
+        txt = f"👨‍⚕️ {name}\n{phone}"
         notes = (duty.get("notes") or "").strip()
         if notes:
-            info_lines += [notes]
-        info_lines += [""]
+            txt += f"\n\n{notes}"
+        acknowledge(callback, i18n.t("duty"))
+        return callback.message.answer(txt, reply_markup=menu_button_kb(i18n))
+    return callback.answer(i18n.t("duty_no_phone"), show_alert=True)
 
-    hosp_name = hospital.get("name", "")
-    hosp_addr = hospital.get("address", "")
-    hosp_phone = hospital.get("phone", "")
 
-    if hosp_name or hosp_addr or hosp_phone:
-        if hosp_name:
-            info_lines += [f"🏥 {hosp_name}"]
-        if hosp_addr:
-            info_lines += [f"📍 {hosp_addr}"]
-        if hosp_phone:
-            info_lines += [f"☎️ {hosp_phone}"]
-        info_lines += ["", "👇 Действия:"]
+async def _call_unknown(callback: CallbackQuery, i18n: Catalog, resources: Mapping, ref: Optional[str]) -> TelegramMethod:
+    return callback.answer(i18n.t("ok"))
 
-    kb = actions_kb(resources, severe=severe, from_coords=(loc.latitude, loc.longitude))
-    await message.answer("\n".join([x for x in info_lines if x]), reply_markup=kb)
 
-    await state.set_state(Flow.awaiting_problem)
+# call:<key> или call:<key>:<id учреждения / города> (см. actions_kb) -> хендлер по key
+CALL_ACTIONS = ActionTable({"113": _call_113, "clinic": _call_clinic, "duty": _call_duty}, default=_call_unknown)
 
 
-@router.message(Flow.awaiting_address, F.text)
-async def on_address(message: Message, state: FSMContext) -> None:
-    addr = (message.text or "").strip()
-    if not addr:
-        return
+async def on_call_callback(callback: CallbackQuery, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    handler, key, ref = CALL_ACTIONS.resolve(callback.data)
+    EVENTS.emit("call", callback.from_user.id, key=key)
+    return await handler(callback, i18n, load_resources(), ref)
 
-    await state.update_data(address=addr)
-    data = await state.get_data()
 
-    resources = load_liepaja_resources()
-    hospital = resources.get("hospital", {}) or {}
-    duty = resources.get("duty_doctor", {}) or {}
+async def ignore_location_outside_flow(message: Message, tx: StateTx, step: Step, i18n: Catalog) -> TelegramMethod:
+    """
+    Если человек прислал локацию не в момент, когда бот ее ждет — объясняем коротко.
+    """
+    data = tx.data
+    if not data.get("problem"):
+        step.goto("awaiting_problem")
+        return message.answer(i18n.t("problem_first"), reply_markup=menu_button_kb(i18n))
 
-    severe = bool(data.get("severe", False))
-    problem = data.get("problem", "плохо себя чувствую")
+    # Если проблема есть, но срочность/поток не активирован — мягко возвращаем
+    step.goto("awaiting_urgency")
+    return message.answer(i18n.t("urgency_first"), reply_markup=urgency_kb(i18n))
+
+
+# track_handlers: имя хендлера и его время — в метрики апдейта (если они включены)
+SCENARIO = load_scenario(
+    "data/scenarios/health_triage.json",
+    track_handlers({
+        "start": on_start,
+        "menu": on_menu,
+        "back": on_back,
+        "health_menu": on_health_menu,
+        "language": on_language,
+        "problem_text": on_problem_text,
+        "urgency": on_urgency,
+        "ask_address": on_ask_address,
+        "location": on_location,
+        "address": on_address,
+        "location_outside_flow": ignore_location_outside_flow,
+        "call": on_call_callback,
+    }),
+)
 
-    info_lines = [
-        f"📝 Ситуация: «{problem}»",
-        f"👨‍⚕️ Подходит: {guess_specialist(problem)}",
-        "",
-        f"📍 Адрес: {addr}",
-        "",
-    ]
 
-    if severe:
-        info_lines += ["🚨 Если станет хуже — 113", ""]
+# Подписи кнопок всех загруженных языков -> события сценария (каталоги грузятся лениво).
+I18N.on_load(lambda catalog: SCENARIO.add_labels({text: name for name, text in catalog.buttons.items()}))
 
-    if duty.get("phone"):
-        info_lines += [
-            f"👨‍⚕️ {duty.get('name', 'Дежурный врач')}",
-            f"📞 {duty.get('phone')}",
-        ]
-        notes = (duty.get("notes") or "").strip()
-        if notes:
-            info_lines += [notes]
-        info_lines += [""]
+# Шаги сценария -> журнал событий (где пользователи останавливаются)
+SCENARIO.on_step(
+    lambda event, name, src, dst: EVENTS.emit("step", event.from_user.id if event.from_user else 0, handler=name, src=src, dst=dst)
+)
 
-    hosp_name = hospital.get("name", "")
-    hosp_addr = hospital.get("address", "")
-    hosp_phone = hospital.get("phone", "")
-
-    if hosp_name or hosp_addr or hosp_phone:
-        if hosp_name:
-            info_lines += [f"🏥 {hosp_name}"]
-        if hosp_addr:
-            info_lines += [f"📍 {hosp_addr}"]
-        if hosp_phone:
-            info_lines += [f"☎️ {hosp_phone}"]
-        info_lines += ["", "👇 Действия:"]
-
-    kb = actions_kb(resources, severe=severe, from_coords=None)
-    await message.answer("\n".join([x for x in info_lines if x]), reply_markup=kb)
-    await message.answer("🏠 Меню — кнопка снизу.", reply_markup=menu_button_kb())
-    await state.set_state(Flow.awaiting_problem)
-
-
-@router.callback_query(F.data.startswith("call:"))
-async def on_call_callback(callback: CallbackQuery) -> None:
-    resources = load_liepaja_resources()
-    hospital = resources.get("hospital", {}) or {}
-    duty = resources.get("duty_doctor", {}) or {}
+# StateTx — раньше I18n: язык берется из уже прочитанных данных FSM
+for _middleware in (StateTxMiddleware(), I18nMiddleware(I18N)):
+    router.message.middleware(_middleware)
+    router.callback_query.middleware(_middleware)
 
-    key = callback.data.split(":", 1)[1]
 
-    if key == "113":
-        await callback.message.answer("🚑 Срочно: 113", reply_markup=menu_button_kb())
-        await callback.answer("113")
-        return
+# Два входа на весь бот: событие -> переход по таблице сценария, без обхода цепочки фильтров.
+@router.message()
+async def on_message(message: Message, tx: StateTx, i18n: Catalog, intent: Optional[Intent] = None) -> Optional[TelegramMethod]:
+    # intent — уже разобранный SafetyMiddleware (если он стоит), второй раз не разбираем
+    return await SCENARIO.dispatch(message, tx, intent=intent, i18n=i18n)
 
-    if key == "clinic":
-        phone = (hospital.get("phone") or "").strip()
-        name = hospital.get("name", "Клиника")
-        if phone:
-            await callback.message.answer(f"☎️ {name}\n{phone}", reply_markup=menu_button_kb())
-            await callback.answer("Клиника")
-        else:
-            await callback.answer("Номер клиники не задан", show_alert=True)
-        return
 
-    if key == "duty":
-        phone = (duty.get("phone") or "").strip()
-        name = duty.get("name", "Дежурный врач")
-        if phone:
-            txt = f"👨‍⚕️ {name}\n{phone}"
-            notes = (duty.get("notes") or "").strip()
-            if notes:
-                txt += f"\n\n{notes}"
-            await callback.message.answer(txt, reply_markup=menu_button_kb())
-            await callback.answer("Дежурный врач")
-        else:
-            await callback.answer("Номер дежурного врача не задан", show_alert=True)
-        return
+@router.callback_query()
+async def on_callback(callback: CallbackQuery, tx: StateTx, i18n: Catalog) -> Optional[TelegramMethod]:
+    return await SCENARIO.dispatch(callback, tx, i18n=i18n)
+
+
+# ---------- Safety ----------
+# Red flags проверяются до FSM на каждом тексте (SafetyMiddleware): совет звонить 113
+# приходит сразу, а не после вопросов о срочности и месте.
+RED_FLAGS = RedFlagDetector.from_i18n("data/i18n", I18N.default_locale)
+# свободный текст проверяется на red flags в том же разборе, что выбирает переход сценария
+SCENARIO.router.detector = RED_FLAGS
 
-    await callback.answer("Ок")
+
+def red_flag_alert(message: Message, tr: Catalog) -> TelegramMethod:
+    EVENTS.emit("red_flag", message.chat.id, locale=tr.locale)
+    return message.answer(tr.t("red_flag_alert"), reply_markup=actions_kb(load_resources(), severe=True, tr=tr))
+
+
+def build_storage() -> BaseStorage:
+    # FSM_STORAGE=memory — старое поведение (все теряется при рестарте)
+    if os.getenv("FSM_STORAGE", "sqlite") == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(
+        os.getenv("FSM_DB_PATH", "fsm.sqlite3"),
+        cache_size=int(os.getenv("FSM_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("FSM_TTL_HOURS", "168")) * 3600,
+    )
 
 
-@router.message(F.location)
-async def ignore_location_outside_flow(message: Message, state: FSMContext) -> None:
+def build_dispatcher(
+    storage: Optional[BaseStorage] = None,
+    metrics: Optional[BotMetrics] = None,
+    seen: Optional[RecentIds] = None,
+) -> Dispatcher:
     """
-    Если человек прислал локацию не в момент, когда бот ее ждет — объясняем коротко.
+    seen — недавние update_id: повторно доставленные апдейты отбрасываются первыми.
     """
-    data = await state.get_data()
-    if not data.get("problem"):
-        await message.answer("✍️ Сначала напиши, что происходит (1 строка).", reply_markup=menu_button_kb())
-        await state.set_state(Flow.awaiting_problem)
-        return
+    storage = storage or build_storage()
+    # FSM регистрируется вручную, после middleware, которые должны быть раньше него
+    if metrics is not None:
+        storage = TimedStorage(storage, metrics)
+    dp = Dispatcher(storage=storage, disable_fsm=True)
+    if seen is not None:
+        dp.update.outer_middleware(DedupMiddleware(seen))
+        dp.shutdown.register(seen.save)
+    if metrics is not None:
+        # метрики снаружи FSM, чтобы в апдейт попали и чтения состояния до хендлера
+        dp.update.outer_middleware(metrics.middleware)
+    dp.update.outer_middleware(SafetyMiddleware(SCENARIO.router, I18N, red_flag_alert))
+    # только ключ FSM: состояние и данные одним чтением достает StateTxMiddleware
+    dp.update.outer_middleware(FSMKeyMiddleware(dp.fsm.storage, dp.fsm.events_isolation, dp.fsm.strategy))
+    dp.include_router(router)
+    return dp
 
-    # Если проблема есть, но срочность/поток не активирован — мягко возвращаем
-    await message.answer("🕒 Уточни срочность, и затем пришли локацию.", reply_markup=urgency_kb())
-    await state.set_state(Flow.awaiting_urgency)
 
+def build_seen(index: int = 0, workers: int = 1) -> RecentIds:
+    # DEDUP_SNAPSHOT="" — только в памяти; у каждого воркера свой снимок (его чаты)
+    path = os.getenv("DEDUP_SNAPSHOT", "seen_updates.bin")
+    if path and workers > 1:
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{index}{ext}"
+    return RecentIds(int(os.getenv("DEDUP_SIZE", "10000")), path or None)
 
-@router.message(F.text)
-async def fallback_text(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
-    if not text:
-        return
 
-    if text in {"🩺 Самочувствие", "🌍 Язык", "⬅️ Назад в меню", "🏠 Меню"}:
-        return
+async def build_app(token: str, index: int = 0, workers: int = 1) -> Tuple[Bot, Dispatcher]:
+    """
+    Бот и диспетчер одного процесса. При workers > 1 (см. supervisor) общий
+    лимит Telegram на бота делится между воркерами, метрики — на METRICS_PORT + index.
+    """
+    RESOURCES.load()
+    get_geocoder()
+    I18N.default
+
+    bot = Bot(token=token)
+    # все исходящие — через очередь с лимитами Telegram и приоритетами (см. set_priority)
+    bot.session.middleware(OutboundQueue(global_rate=30.0 / workers))
+
+    # METRICS_PORT — Prometheus /metrics и /debug/* (профилирование) на METRICS_HOST (127.0.0.1)
+    metrics = None
+    if os.getenv("METRICS_PORT"):
+        metrics = BotMetrics()
+        bot.session.middleware(metrics.session_middleware)
+        port = int(os.environ["METRICS_PORT"]) + index
+        await start_metrics_server(metrics, port, os.getenv("METRICS_HOST", "127.0.0.1"))
+    dp = build_dispatcher(metrics=metrics, seen=build_seen(index, workers))
+
+    # EVENT_LOG_DIR — журнал событий triage (core.eventlog), сводка: python -m core.eventlog <dir>
+    if os.getenv("EVENT_LOG_DIR"):
+        EVENTS.start(
+            os.environ["EVENT_LOG_DIR"],
+            prefix=f"events-{index}" if workers > 1 else "events",
+            salt=os.getenv("EVENT_LOG_SALT"),
+        )
+        dp.shutdown.register(EVENTS.close)
+    return bot, dp
 
-    await state.set_state(Flow.awaiting_problem)
-    await on_problem_text(message, state)
+
+async def worker_app(index: int, workers: int) -> Tuple[Bot, Dispatcher]:
+    return await build_app(os.environ["BOT_TOKEN"], index, workers)
 
 
 async def main() -> None:
@@ -510,11 +638,28 @@ async def main() -> None:
     if not token:
         raise RuntimeError("BOT_TOKEN is not set. Add it to Railway Variables.")
 
-    bot = Bot(token=token)
-    dp = Dispatcher(storage=MemoryStorage())
-    dp.include_router(router)
+    # WORKERS > 1 (только polling) — супервизор + процессы-воркеры, шардинг по chat_id
+    # супервизор и webhook (multiprocessing, aiohttp.web) импортируются только в своем режиме
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and not os.getenv("WEBHOOK_URL"):
+        from apps.telegram.supervisor import run_supervisor
+
+        await run_supervisor(token, workers, "apps.telegram.bot:worker_app", router.resolve_used_update_types())
+        return
+
+    bot, dp = await build_app(token)
+
+    # WEBHOOK_URL задан — webhook-режим, иначе как раньше long polling
+    if os.getenv("WEBHOOK_URL"):
+        from apps.telegram.webhook import run_webhook
+
+        await run_webhook(dp, bot)
+        return
+
+    from apps.telegram.scheduler import ChatScheduler, run_polling, scheduler_limits
 
-    await dp.start_polling(bot)
+    await bot.delete_webhook()
+    await run_polling(dp, bot, ChatScheduler(dp, bot, **scheduler_limits()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,427 @@
+import cProfile
+import functools
+import io
+import pstats
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+
+from core.state_tx import read_state_and_data, write_state_and_data
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# Границы корзин гистограмм, секунды.
+BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+# ---------- Registry ----------
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Family:
+    """
+    Метрика с одной меткой: {значение метки: Histogram} (или счетчик).
+    """
+
+    __slots__ = ("name", "help", "label", "kind", "series")
+
+    def __init__(self, name: str, help: str, label: str, kind: str = "histogram") -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        self.kind = kind
+        self.series: Dict[str, Any] = {}
+
+    def observe(self, value: str, seconds: float) -> None:
+        h = self.series.get(value)
+        if h is None:
+            h = self.series[value] = Histogram()
+        h.observe(seconds)
+
+    def inc(self, value: str) -> None:
+        self.series[value] = self.series.get(value, 0) + 1
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        for value, h in sorted(self.series.items()):
+            label = f'{self.label}="{value}"'
+            if self.kind == "counter":
+                out.append(f"{self.name}{{{label}}} {h}")
+                continue
+            total = 0
+            for le, n in zip(BUCKETS, h.counts):
+                total += n
+                out.append(f'{self.name}_bucket{{{label},le="{le}"}} {total}')
+            out.append(f'{self.name}_bucket{{{label},le="+Inf"}} {h.count}')
+            out.append(f"{self.name}_sum{{{label}}} {h.sum:.6f}")
+            out.append(f"{self.name}_count{{{label}}} {h.count}")
+
+
+# ---------- Per-update timing ----------
+class _UpdateTimer:
+    """
+    Время одного апдейта по этапам. storage/send копятся за весь апдейт;
+    на входе в хендлер запоминается, сколько их было до него.
+    """
+
+    __slots__ = ("start", "handler", "entered", "left", "storage", "send", "before")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.handler: Optional[str] = None
+        self.entered = 0.0
+        self.left = 0.0
+        self.storage = 0.0
+        self.send = 0.0
+        self.before = 0.0
+
+
+_TIMER: ContextVar[Optional[_UpdateTimer]] = ContextVar("metrics_timer", default=None)
+
+
+def track_handlers(handlers: Mapping[str, Callable[..., Awaitable[Any]]]) -> Dict[str, Callable[..., Awaitable[Any]]]:
+    """
+    Оборачивает хендлеры сценария: имя хендлера и время его работы попадают
+    в метрики апдейта. Без MetricsMiddleware — один ContextVar.get на вызов.
+    """
+    return {name: _tracked(name, handler) for name, handler in handlers.items()}
+
+
+def _tracked(name: str, handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        timer = _TIMER.get()
+        if timer is None:
+            return await handler(*args, **kwargs)
+        timer.handler = name
+        timer.before = timer.storage + timer.send
+        timer.entered = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            timer.left = time.perf_counter()
+
+    return wrapper
+
+
+class BotMetrics:
+    """
+    Метрики бота в формате Prometheus:
+
+    - bot_update_seconds{handler} — апдейт целиком (handler="none" — без перехода);
+    - bot_stage_seconds{stage} — route (middlewares, FSM, выбор перехода),
+      handler (код хендлера без storage/send), storage (FSM), send (Bot API);
+    - bot_storage_seconds{op}, bot_api_seconds{method};
+    - bot_errors_total{handler}.
+
+    На горячем пути только замеры и append в pending; в гистограммы записи
+    раскладываются при чтении /metrics или когда их накопилось fold_every.
+
+    Подключение: dp.update.outer_middleware(metrics.middleware) до FSM,
+    TimedStorage(storage, metrics), bot.session.middleware(metrics.session_middleware),
+    хендлеры сценария — через track_handlers.
+    """
+
+    def __init__(self, fold_every: int = 4096) -> None:
+        self.update = Family("bot_update_seconds", "Update processing time by scenario handler.", "handler")
+        self.stage = Family("bot_stage_seconds", "Update time by stage.", "stage")
+        self.storage = Family("bot_storage_seconds", "FSM storage call time.", "op")
+        self.api = Family("bot_api_seconds", "Bot API call time.", "method")
+        self.errors = Family("bot_errors_total", "Updates that raised.", "handler", kind="counter")
+        self.families = (self.update, self.stage, self.storage, self.api, self.errors)
+
+        # (Family, метка, секунды) или (None, _UpdateTimer, конец, упал ли)
+        self.pending: List[Tuple[Any, ...]] = []
+        self.fold_every = fold_every
+
+        self.profiler = SampledProfiler()
+        self.middleware = MetricsMiddleware(self)
+        self.session_middleware = _ApiTiming(self)
+
+    def render(self) -> str:
+        self.fold()
+        out: List[str] = []
+        for family in self.families:
+            family.render(out)
+        out.append("")
+        return "\n".join(out)
+
+    def fold(self) -> None:
+        pending, self.pending = self.pending, []
+        for family, label, value, *rest in pending:
+            if family is not None:
+                family.observe(label, value)
+            else:
+                self._finish(label, value, rest[0])
+
+    def _finish(self, timer: _UpdateTimer, end: float, failed: bool) -> None:
+        handler = timer.handler or "none"
+        self.update.observe(handler, end - timer.start)
+        if failed:
+            self.errors.inc(handler)
+        if timer.handler is not None:
+            inside = timer.storage + timer.send - timer.before
+            self.stage.observe("route", max(0.0, timer.entered - timer.start - timer.before))
+            self.stage.observe("handler", max(0.0, timer.left - timer.entered - inside))
+        if timer.storage:
+            self.stage.observe("storage", timer.storage)
+        if timer.send:
+            self.stage.observe("send", timer.send)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    def __init__(self, metrics: BotMetrics) -> None:
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = self.metrics
+        timer = _UpdateTimer(time.perf_counter())
+        token = _TIMER.set(timer)
+        profile = metrics.profiler.begin() if metrics.profiler.profile is not None else None
+        failed = True
+        try:
+            result = await handler(event, data)
+            failed = False
+            return result
+        finally:
+            if profile is not None:
+                metrics.profiler.end(profile)
+            _TIMER.reset(token)
+            metrics.pending.append((None, timer, time.perf_counter(), failed))
+            if len(metrics.pending) >= metrics.fold_every:
+                metrics.fold()
+
+
+class _ApiTiming(BaseRequestMiddleware):
+    def __init__(self, metrics: BotMetrics) -> None:
+        self.metrics = metrics
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            dt = time.perf_counter() - t0
+            self.metrics.pending.append((self.metrics.api, type(method).__name__, dt))
+            timer = _TIMER.get()
+            if timer is not None:
+                timer.send += dt
+
+
+class TimedStorage(BaseStorage):
+    """
+    Обертка над FSM storage: время каждого вызова — в bot_storage_seconds и в этап storage апдейта.
+    """
+
+    def __init__(self, storage: BaseStorage, metrics: BotMetrics) -> None:
+        self.storage = storage
+        self.metrics = metrics
+
+    def _record(self, op: str, t0: float) -> None:
+        dt = time.perf_counter() - t0
+        self.metrics.pending.append((self.metrics.storage, op, dt))
+        timer = _TIMER.get()
+        if timer is not None:
+            timer.storage += dt
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        t0 = time.perf_counter()
+        await self.storage.set_state(key, state)
+        self._record("set_state", t0)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        t0 = time.perf_counter()
+        state = await self.storage.get_state(key)
+        self._record("get_state", t0)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        await self.storage.set_data(key, data)
+        self._record("set_data", t0)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        data = await self.storage.get_data(key)
+        self._record("get_data", t0)
+        return data
+
+    async def get_state_and_data(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        t0 = time.perf_counter()
+        found = await read_state_and_data(self.storage, key)
+        self._record("get_state_and_data", t0)
+        return found
+
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        await write_state_and_data(self.storage, key, state, data)
+        self._record("set_state_and_data", t0)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+# ---------- Profiling ----------
+class SampledProfiler:
+    """
+    cProfile на каждом sample-м апдейте в течение seconds; включается и читается
+    через /debug/profile. Одновременно профилируется один апдейт (cProfile
+    не вкладывается), в профиль попадает и то, что event loop выполнил между
+    await этого апдейта.
+    """
+
+    def __init__(self) -> None:
+        self.profile: Optional[cProfile.Profile] = None
+        self.until = 0.0
+        self.sample = 1
+        self.seen = 0
+        self.sampled = 0
+        self.active = False
+
+    def start(self, seconds: float, sample: int) -> None:
+        self.profile = cProfile.Profile()
+        self.until = time.monotonic() + seconds
+        self.sample = max(1, sample)
+        self.seen = self.sampled = 0
+
+    def stop(self) -> None:
+        self.until = 0.0
+
+    def begin(self) -> Optional[cProfile.Profile]:
+        profile = self.profile
+        if profile is None or self.active or time.monotonic() > self.until:
+            return None
+        self.seen += 1
+        if self.seen % self.sample:
+            return None
+        self.active = True
+        self.sampled += 1
+        profile.enable()
+        return profile
+
+    def end(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self.active = False
+
+    def report(self, limit: int = 40, sort: str = "cumulative") -> str:
+        if self.profile is None or not self.sampled:
+            return "no profile: POST /debug/profile?seconds=30&sample=10\n"
+        out = io.StringIO()
+        running = "running" if time.monotonic() <= self.until else "stopped"
+        out.write(f"{self.sampled} sampled updates of {self.seen} ({running})\n")
+        pstats.Stats(self.profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def _tracemalloc_report(limit: int) -> str:
+    if not tracemalloc.is_tracing():
+        return "tracemalloc is off: POST /debug/tracemalloc\n"
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"traced: {current / 1024:.0f} KB, peak {peak / 1024:.0f} KB"]
+    lines += [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+    return "\n".join(lines) + "\n"
+
+
+# ---------- HTTP ----------
+def build_metrics_app(metrics: BotMetrics) -> "web.Application":
+    """
+    GET /metrics — Prometheus text format.
+    POST /debug/profile?seconds=30&sample=10 — профилировать каждый 10-й апдейт 30 с;
+    GET — отчет pstats (?limit=&sort=); DELETE — остановить.
+    POST /debug/tracemalloc?frames=1 — включить; GET — топ аллокаций; DELETE — выключить.
+    aiohttp.web импортируется здесь: без METRICS_PORT он процессу не нужен.
+    """
+    from aiohttp import web
+
+    def number(request: "web.Request", name: str, default: str, cast: Callable[[str], Any]) -> Any:
+        # кривой параметр — 400, а не 500 из обработчика
+        raw = request.query.get(name, default)
+        try:
+            value = cast(raw)
+        except ValueError:
+            raise web.HTTPBadRequest(text=f"{name}: expected a number, got {raw!r}\n")
+        if not 0 < value < float("inf"):
+            raise web.HTTPBadRequest(text=f"{name}: expected a positive number, got {raw!r}\n")
+        return value
+
+    async def get_metrics(request: "web.Request") -> "web.Response":
+        return web.Response(body=metrics.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start_profile(request: "web.Request") -> "web.Response":
+        seconds = number(request, "seconds", "30", float)
+        sample = number(request, "sample", "10", int)
+        metrics.profiler.start(seconds, sample)
+        return web.Response(text=f"profiling every {sample} update(s) for {seconds:g}s\n")
+
+    async def get_profile(request: "web.Request") -> "web.Response":
+        limit = number(request, "limit", "40", int)
+        sort = request.query.get("sort", "cumulative")
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            raise web.HTTPBadRequest(text=f"sort: expected one of {', '.join(sorted(pstats.Stats.sort_arg_dict_default))}\n")
+        return web.Response(text=metrics.profiler.report(limit, sort))
+
+    async def stop_profile(request: "web.Request") -> "web.Response":
+        metrics.profiler.stop()
+        return web.Response(text="profiling stopped\n")
+
+    async def start_tracemalloc(request: "web.Request") -> "web.Response":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(number(request, "frames", "1", int))
+        return web.Response(text="tracemalloc on\n")
+
+    async def get_tracemalloc(request: "web.Request") -> "web.Response":
+        return web.Response(text=_tracemalloc_report(number(request, "limit", "30", int)))
+
+    async def stop_tracemalloc(request: "web.Request") -> "web.Response":
+        tracemalloc.stop()
+        return web.Response(text="tracemalloc off\n")
+
+    app = web.Application()
+    app.router.add_get("/metrics", get_metrics)
+    app.router.add_post("/debug/profile", start_profile)
+    app.router.add_get("/debug/profile", get_profile)
+    app.router.add_delete("/debug/profile", stop_profile)
+    app.router.add_post("/debug/tracemalloc", start_tracemalloc)
+    app.router.add_get("/debug/tracemalloc", get_tracemalloc)
+    app.router.add_delete("/debug/tracemalloc", stop_tracemalloc)
+    return app
+
+
+async def start_metrics_server(metrics: BotMetrics, port: int, host: str = "127.0.0.1") -> "web.AppRunner":
+    from aiohttp import web
+
+    runner = web.AppRunner(build_metrics_app(metrics))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
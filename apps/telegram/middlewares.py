@@ -0,0 +1,150 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.exceptions import TelegramAPIError
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.middleware import FSMContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Message, TelegramObject, Update, User
+
+from apps.telegram.outbound import URGENT, priority
+from core.dedup import RecentIds
+from core.i18n import Catalog, I18n
+from core.router import IntentRouter
+from core.state_tx import UNKNOWN, StateTx
+
+logger = logging.getLogger(__name__)
+
+
+class DedupMiddleware(BaseMiddleware):
+    """
+    Первый outer middleware апдейтов: update_id, который уже был (Telegram
+    доставил повторно), отбрасывается до FSM и хендлеров — без второго ответа.
+    """
+
+    def __init__(self, seen: RecentIds) -> None:
+        self.seen = seen
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and not self.seen.add(event.update_id):
+            logger.info("duplicate update %s dropped", event.update_id)
+            return UNHANDLED
+        return await handler(event, data)
+
+
+class SafetyMiddleware(BaseMiddleware):
+    """
+    Outer middleware апдейтов, стоит раньше FSM: сообщение разбирается
+    router.route один раз (результат — в data["intent"], его же берет сценарий),
+    и свободный текст с red flag ("не хватает воздуха", "потеря сознания", ...)
+    сразу получает alert(message, каталог) — совет звонить 113 с кнопками —
+    в любом состоянии и до чтения storage. Затем апдейт обрабатывается как
+    обычно. Язык — тот, на котором нашелся ключ.
+    """
+
+    def __init__(self, router: IntentRouter, i18n: I18n, alert: Callable[[Message, Catalog], TelegramMethod]) -> None:
+        self.router = router
+        self.i18n = i18n
+        self.alert = alert
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        message = event.message if isinstance(event, Update) else None
+        if message is not None:
+            intent = data["intent"] = self.router.route(message)
+            if intent.red_flag is not None:
+                try:
+                    with priority(URGENT):
+                        await data["bot"](self.alert(message, self.i18n.get(intent.red_flag)))
+                except TelegramAPIError:
+                    # не доставили совет — обычная обработка все равно должна пройти
+                    pass
+        return await handler(event, data)
+
+
+class FSMKeyMiddleware(FSMContextMiddleware):
+    """
+    Вместо FSMContextMiddleware aiogram: кладет в data["state"] FSMContext
+    (ключ и storage) под той же блокировкой events_isolation, но состояние не
+    читает — его вместе с данными одним вызовом читает StateTxMiddleware.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        context = self.resolve_event_context(data["bot"], data)
+        data["fsm_storage"] = self.storage
+        if context is None:
+            return await handler(event, data)
+        async with self.events_isolation.lock(key=context.key):
+            data["state"] = context
+            return await handler(event, data)
+
+
+class StateTxMiddleware(BaseMiddleware):
+    """
+    Кладет в data["tx"] StateTx апдейта: состояние и данные FSM читаются
+    одним вызовом storage (если raw_state уже прочитал FSMContextMiddleware —
+    только данные), изменения хендлера пишутся одним вызовом после него.
+    Если хендлер упал — ничего не пишется.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        state: Optional[FSMContext] = data.get("state")
+        if state is None:
+            return await handler(event, data)
+        tx = data["tx"] = await StateTx(state.storage, state.key, data.get("raw_state", UNKNOWN)).load()
+        data["raw_state"] = tx.state
+        result = await handler(event, data)
+        await tx.commit()
+        return result
+
+
+class I18nMiddleware(BaseMiddleware):
+    """
+    Кладет в data["i18n"] каталог языка пользователя: locale из FSM-данных
+    (из data["tx"], если StateTxMiddleware стоит раньше),
+    а если его еще нет — language_code из Telegram (если такая локаль есть).
+    Каталоги уже скомпилированы и закешированы в I18n — на апдейт только выбор.
+    """
+
+    def __init__(self, i18n: I18n) -> None:
+        self.i18n = i18n
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        locale: Optional[str] = None
+        tx: Optional[StateTx] = data.get("tx")
+        state: Optional[FSMContext] = data.get("state")
+        if tx is not None:
+            locale = tx.data.get("locale")
+        elif state is not None:
+            locale = (await state.get_data()).get("locale")
+        if locale is None:
+            user: Optional[User] = data.get("event_from_user")
+            locale = user.language_code if user is not None else None
+        data["i18n"] = self.i18n.get(locale)
+        return await handler(event, data)
@@ -0,0 +1,239 @@
+import asyncio
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+# Классы приоритета исходящих сообщений: меньше — раньше.
+URGENT = 0   # 113, результат при срочности
+RESULT = 1   # обычный результат triage
+DEFAULT = 2  # меню, подсказки, подтверждения
+
+_PRIORITY: ContextVar[int] = ContextVar("outbound_priority", default=DEFAULT)
+
+
+def set_priority(priority: int) -> None:
+    """
+    Приоритет всех дальнейших отправок в текущем апдейте (контекст задачи),
+    включая метод, который хендлер вернет в конце.
+    """
+    _PRIORITY.set(priority)
+
+
+def get_priority() -> int:
+    return _PRIORITY.get()
+
+
+@contextmanager
+def priority(value: int) -> Iterator[None]:
+    """
+    Приоритет только для отправок внутри блока (например, из middleware до хендлера).
+    """
+    token = _PRIORITY.set(value)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+ChatId = Union[int, str]
+
+
+class TokenBucket:
+    """
+    rate токенов в секунду, не больше capacity в запасе. block() — пауза
+    после 429 (retry_after от сервера), на время которой токенов нет.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "stamp", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = now
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+    def block(self, now: float, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.stamp = self.blocked_until
+
+    def idle(self, now: float) -> bool:
+        return now >= self.blocked_until and self.tokens + (now - self.stamp) * self.rate >= self.capacity
+
+
+# (priority, seq, chat_id, future) — seq сохраняет порядок внутри приоритета
+_Item = Tuple[int, int, ChatId, "asyncio.Future[None]"]
+
+
+class OutboundQueue(BaseRequestMiddleware):
+    """
+    Очередь исходящих запросов бота (middleware сессии: bot.session.middleware(...)).
+
+    - Методы с chat_id (sendMessage, editMessageText, ...) ждут токен своего чата
+      и общий токен бота; остальные (answerCallbackQuery, getUpdates, ...) идут сразу.
+    - Из ожидающих первым выпускается самый приоритетный (см. set_priority), чей чат
+      не упирается в лимит: срочные ответы обходят меню и подсказки других чатов.
+    - 429: чат блокируется на retry_after, запрос встает обратно в очередь
+      со своим местом и повторяется (не больше max_retries раз).
+
+    Лимиты по умолчанию — из Bot API FAQ: ~1 сообщение/с в личный чат,
+    20/мин в группу, ~30/с на бота.
+    """
+
+    def __init__(
+        self,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        group_burst: float = 3.0,
+        global_rate: float = 30.0,
+        global_burst: float = 5.0,
+        max_retries: int = 3,
+        max_idle_buckets: int = 10_000,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.max_idle_buckets = max_idle_buckets
+
+        self._global = TokenBucket(global_rate, global_burst, time.monotonic())
+        self._buckets: Dict[ChatId, TokenBucket] = {}
+        self._heap: List[_Item] = []
+        # чаты, упершиеся в лимит: их запросы ждут здесь, в _timers — когда чат освободится
+        self._deferred: Dict[ChatId, List[_Item]] = {}
+        self._timers: List[Tuple[float, ChatId]] = []
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+        self.retries = 0
+
+    # ---------- middleware ----------
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = _PRIORITY.get()
+        self._seq += 1
+        seq = self._seq
+        attempt = 0
+        while True:
+            await self._acquire(priority, seq, chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.retries += 1
+                now = time.monotonic()
+                self._bucket(chat_id, now).block(now, float(e.retry_after))
+
+    async def close(self) -> None:
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) + sum(len(items) for items in self._deferred.values())
+
+    # ---------- scheduling ----------
+    async def _acquire(self, priority: int, seq: int, chat_id: ChatId) -> None:
+        if self._pump_task is None or self._pump_task.done():
+            self._wakeup = asyncio.Event()
+            self._pump_task = asyncio.create_task(self._pump())
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, seq, chat_id, fut))
+        self._wakeup.set()
+        await fut
+
+    def _bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_idle_buckets:
+                self._prune(now)
+            group = isinstance(chat_id, str) or chat_id < 0
+            bucket = self._buckets[chat_id] = TokenBucket(
+                self.group_rate if group else self.chat_rate,
+                self.group_burst if group else self.chat_burst,
+                now,
+            )
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        # полные, не заблокированные корзины ничем не отличаются от новых
+        for chat_id in [c for c, b in self._buckets.items() if c not in self._deferred and b.idle(now)]:
+            del self._buckets[chat_id]
+
+    def _release(self, now: float) -> None:
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            _, chat_id = heapq.heappop(timers)
+            for item in self._deferred.pop(chat_id, ()):
+                heapq.heappush(self._heap, item)
+
+    async def _pump(self) -> None:
+        heap = self._heap
+        wakeup = self._wakeup
+        while True:
+            now = time.monotonic()
+            self._release(now)
+            if not heap:
+                wakeup.clear()
+                timeout = self._timers[0][0] - now if self._timers else None
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            wait = self._global.wait_time(now)
+            if wait > 0:
+                # пока ждем общий токен, могут прийти более срочные — берем верх кучи после сна
+                await asyncio.sleep(wait)
+                continue
+
+            item = heapq.heappop(heap)
+            chat_id, fut = item[2], item[3]
+            if fut.done():  # отправитель отменен
+                continue
+            if chat_id in self._deferred:
+                heapq.heappush(self._deferred[chat_id], item)
+                continue
+            bucket = self._bucket(chat_id, now)
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                self._deferred[chat_id] = [item]
+                heapq.heappush(self._timers, (now + wait, chat_id))
+                continue
+
+            bucket.take()
+            self._global.take()
+            fut.set_result(None)
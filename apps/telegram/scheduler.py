@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import logging
+import os
+import signal
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramConflictError,
+    TelegramRetryAfter,
+    TelegramUnauthorizedError,
+)
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+logger = logging.getLogger(__name__)
+
+# Неверный токен или второй процесс с тем же токеном: повтор не поможет — падаем
+FATAL_POLLING_ERRORS = (TelegramUnauthorizedError, TelegramConflictError)
+
+
+def chat_key(update: Update) -> int:
+    """
+    Чат апдейта (для callback — чат сообщения с кнопкой, иначе пользователь), 0 — без чата.
+    """
+    event = update.event
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    sender = getattr(event, "from_user", None)
+    return sender.id if sender is not None else 0
+
+
+def scheduler_limits() -> Dict[str, int]:
+    # UPDATE_CONCURRENCY — хендлеров разных чатов сразу, UPDATE_QUEUE — принятых апдейтов
+    return {
+        "concurrency": int(os.getenv("UPDATE_CONCURRENCY", "64")),
+        "max_pending": int(os.getenv("UPDATE_QUEUE", "1024")),
+    }
+
+
+class ChatScheduler:
+    """
+    Апдейты одного чата — строго по очереди (иначе, например, геолокация
+    обгоняет еще не записанный текст проблемы), разные чаты — параллельно,
+    не больше concurrency хендлеров сразу.
+
+    Принятых, но не доработанных апдейтов не больше max_pending: submit ждет,
+    пока освободится место (backpressure вместо роста памяти). drain() —
+    дождаться всего принятого.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, concurrency: int = 64, max_pending: int = 1024) -> None:
+        self.dp = dp
+        self.bot = bot
+        self._slots = asyncio.Semaphore(concurrency)
+        self._pending = asyncio.Semaphore(max_pending)
+        self._chats: Dict[int, Deque[Update]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.processed = 0
+
+    async def submit(self, update: Update, chat_id: Optional[int] = None) -> None:
+        await self._pending.acquire()
+        key = chat_key(update) if chat_id is None else chat_id
+        queue = self._chats.get(key)
+        if queue is not None:
+            queue.append(update)
+            return
+        self._chats[key] = deque((update,))
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run_chat(key))
+
+    async def _run_chat(self, key: int) -> None:
+        queue = self._chats[key]
+        # каждый апдейт — в своей копии контекста: set_priority() и прочие
+        # ContextVar одного апдейта не достаются следующему апдейту того же чата
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        try:
+            while queue:
+                update = queue[0]
+                async with self._slots:
+                    await loop.create_task(self._feed(update), context=context.copy())
+                queue.popleft()
+                self.processed += 1
+                self._pending.release()
+        finally:
+            del self._chats[key]
+            del self._tasks[key]
+
+    async def _feed(self, update: Update) -> None:
+        try:
+            result = await self.dp.feed_update(self.bot, update)
+            if isinstance(result, TelegramMethod):
+                await self.dp.silent_call_request(self.bot, result)
+        except Exception:
+            logger.exception("update %s failed", update.update_id)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._chats.values())
+
+    async def drain(self) -> None:
+        while self._tasks:
+            await asyncio.wait(list(self._tasks.values()))
+
+
+async def run_polling(
+    dp: Dispatcher,
+    bot: Bot,
+    scheduler: ChatScheduler,
+    timeout: int = 25,
+    backoff: BackoffConfig = BackoffConfig(min_delay=1.0, max_delay=30.0, factor=1.5, jitter=0.1),
+) -> None:
+    """
+    Long polling через ChatScheduler вместо dp.start_polling. Пока очередь
+    полна, новые апдейты не запрашиваются. Ошибка getUpdates — повтор с
+    растущей паузой (не больше backoff.max_delay, RetryAfter — сколько
+    сказал Telegram), FATAL_POLLING_ERRORS пробрасываются. SIGTERM/SIGINT:
+    перестаем брать апдейты, дорабатываем принятое, подтверждаем offset и
+    вызываем shutdown-хуки диспетчера (storage закрывает его dp.fsm.close).
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    allowed: List[str] = dp.resolve_used_update_types()
+    offset: Optional[int] = None
+    await dp.emit_startup(bot=bot)
+    stopping = loop.create_task(stop.wait())
+    delays = Backoff(backoff)
+    try:
+        while not stop.is_set():
+            fetch = loop.create_task(bot(GetUpdates(offset=offset, timeout=timeout, allowed_updates=allowed)))
+            await asyncio.wait((fetch, stopping), return_when=asyncio.FIRST_COMPLETED)
+            if not fetch.done():
+                fetch.cancel()
+                break
+            try:
+                updates: List[Any] = fetch.result()
+            except FATAL_POLLING_ERRORS:
+                raise
+            except Exception as e:
+                delay = e.retry_after if isinstance(e, TelegramRetryAfter) else next(delays)
+                logger.exception("getUpdates failed, retry in %.1fs", delay)
+                # пауза прерывается сигналом остановки
+                await asyncio.wait((stopping,), timeout=delay)
+                continue
+            delays.reset()
+            for update in updates:
+                offset = update.update_id + 1
+                await scheduler.submit(update)
+    finally:
+        stopping.cancel()
+        await scheduler.drain()
+        if offset is not None:
+            try:
+                await bot(GetUpdates(offset=offset, timeout=0, limit=1))
+            except TelegramAPIError:
+                # не подтвердили — Telegram пришлет последние апдейты еще раз, их отсеет dedup
+                logger.exception("offset %s not confirmed", offset)
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+class _Record:
+    __slots__ = ("state", "data", "touched")
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], touched: float) -> None:
+        self.state = state
+        self.data = data
+        self.touched = touched
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM в локальном SQLite (WAL) с LRU-кешем в памяти.
+
+    - Чтения горячих чатов обслуживаются из кеша и диска не касаются.
+    - Записи копятся в dirty и раз в flush_interval уходят одной транзакцией:
+      несколько set_state/set_data одного чата за интервал = одна строка.
+    - Разговоры без активности дольше ttl удаляются и из кеша, и из базы.
+    - Вся работа с sqlite3 — в одном отдельном потоке, event loop не блокируется.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 10_000,
+        ttl: float = 7 * 24 * 3600,
+        flush_interval: float = 0.5,
+        cleanup_interval: float = 600.0,
+    ) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cleanup_interval = cleanup_interval
+
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Dict[str, _Record] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        # hash() ключей, которые есть в базе: новый чат не требует чтения с диска
+        self._known: Optional[Set[int]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._next_cleanup = time.time() + cleanup_interval
+
+    # ---------- BaseStorage ----------
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k = self._key(key)
+        rec = await self._record(k)
+        rec.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(k, rec)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(self._key(key))).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        k = self._key(key)
+        rec = await self._record(k)
+        rec.data = data.copy()
+        self._mark_dirty(k, rec)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(self._key(key))).data.copy()
+
+    # ---------- одним вызовом (core.state_tx) ----------
+    async def get_state_and_data(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        rec = await self._record(self._key(key))
+        return rec.state, rec.data.copy()
+
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Dict[str, Any]) -> None:
+        k = self._key(key)
+        rec = await self._record(k)
+        rec.state = state.state if isinstance(state, State) else state
+        rec.data = data.copy()
+        self._mark_dirty(k, rec)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._db_close)
+        self._executor.shutdown(wait=True)
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        batch = [(k, rec.state, rec.data, rec.touched) for k, rec in self._dirty.items()]
+        self._dirty = {}
+
+        cutoff = None
+        now = time.time()
+        if now >= self._next_cleanup:
+            self._next_cleanup = now + self.cleanup_interval
+            cutoff = now - self.ttl
+            self._evict_idle(cutoff)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._db_write, batch, cutoff)
+
+    # ---------- cache ----------
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    async def _record(self, k: str) -> _Record:
+        cache = self._cache
+        rec = cache.get(k)
+        if rec is not None:
+            cache.move_to_end(k)
+            return rec
+
+        rec = self._dirty.get(k)
+        if rec is None:
+            loop = asyncio.get_running_loop()
+            if self._known is None:
+                await loop.run_in_executor(self._executor, self._db)
+            row = None
+            if hash(k) in self._known:
+                # executor однопоточный: чтение встанет в очередь после уже отправленных flush
+                row = await loop.run_in_executor(self._executor, self._db_read, k)
+            # пока читали, запись могла появиться (параллельный апдейт того же чата)
+            rec = cache.get(k) or self._dirty.get(k)
+            if rec is None:
+                now = time.time()
+                if row is None or now - row[2] > self.ttl:
+                    rec = _Record(None, {}, now)
+                else:
+                    rec = _Record(row[0], json.loads(row[1]), row[2])
+
+        cache[k] = rec
+        cache.move_to_end(k)
+        if len(cache) > self.cache_size:
+            # грязные записи живут в _dirty до flush, так что вытеснение безопасно
+            cache.popitem(last=False)
+        return rec
+
+    def _mark_dirty(self, k: str, rec: _Record) -> None:
+        rec.touched = time.time()
+        self._dirty[k] = rec
+        if self._known is not None:
+            self._known.add(hash(k))
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._flush_task = None
+        await self.flush()
+
+    def _evict_idle(self, cutoff: float) -> None:
+        stale = [k for k, rec in self._cache.items() if rec.touched < cutoff]
+        for k in stale:
+            del self._cache[k]
+
+    # ---------- sqlite (только в потоке executor) ----------
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                " key TEXT PRIMARY KEY,"
+                " state TEXT,"
+                " data TEXT NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS fsm_updated ON fsm(updated)")
+            conn.commit()
+            self._known = {hash(k) for (k,) in conn.execute("SELECT key FROM fsm")}
+            self._conn = conn
+        return self._conn
+
+    def _db_read(self, k: str) -> Optional[Tuple[Optional[str], str, float]]:
+        return self._db().execute("SELECT state, data, updated FROM fsm WHERE key = ?", (k,)).fetchone()
+
+    def _db_write(self, batch: List[Tuple[str, Optional[str], Dict[str, Any], float]], cutoff: Optional[float]) -> None:
+        conn = self._db()
+        upserts = []
+        deletes = []
+        for k, state, data, touched in batch:
+            if state is None and not data:
+                deletes.append((k,))
+            else:
+                upserts.append((k, state, json.dumps(data, ensure_ascii=False), touched))
+        with conn:
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO fsm(key, state, data, updated) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET"
+                    " state = excluded.state, data = excluded.data, updated = excluded.updated",
+                    upserts,
+                )
+            if deletes:
+                conn.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+            if cutoff is not None:
+                conn.execute("DELETE FROM fsm WHERE updated < ?", (cutoff,))
+
+    def _db_close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
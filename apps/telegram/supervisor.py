@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from bisect import bisect
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from aiohttp import ClientSession, ClientTimeout
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from apps.telegram.scheduler import ChatScheduler, scheduler_limits
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API = "https://api.telegram.org"
+
+# Пачка апдейтов одному воркеру: (chat_id, JSON апдейта).
+# Обратно воркер пишет ("ready", index) и ("done", index, обработано).
+Batch = List[Tuple[int, str]]
+
+
+# ---------- Sharding ----------
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash: chat_id -> воркер. При смене числа воркеров с N на N+1
+    переезжает ~1/(N+1) чатов, а не почти все, как при chat_id % N.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 64) -> None:
+        points = sorted((_hash(f"{node}:{r}"), node) for node in range(nodes) for r in range(replicas))
+        self._keys = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, chat_id: int) -> int:
+        i = bisect(self._keys, _hash(str(chat_id)))
+        return self._nodes[i % len(self._nodes)]
+
+
+def chat_of(update: Mapping[str, Any]) -> int:
+    """
+    Чат апдейта (для callback — чат сообщения с кнопкой, иначе пользователь).
+    """
+    for kind, body in update.items():
+        if not isinstance(body, dict):
+            continue
+        chat = body.get("chat") or (body.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        sender = body.get("from")
+        if sender:
+            return sender["id"]
+    return 0
+
+
+# ---------- Worker ----------
+WorkerFactory = Callable[[int, int], Awaitable[Tuple[Bot, Dispatcher]]]
+
+
+def _load_factory(path: str) -> WorkerFactory:
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def worker_main(index: int, workers: int, factory: str, inbox: Any, outbox: Any) -> None:
+    """
+    Точка входа процесса-воркера (spawn): factory — "модуль:функция",
+    async (index, workers) -> (bot, dispatcher).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # останавливает супервизор через None в inbox
+    asyncio.run(_worker(index, workers, _load_factory(factory), inbox, outbox))
+
+
+async def _worker(index: int, workers: int, factory: WorkerFactory, inbox: Any, outbox: Any) -> None:
+    bot, dp = await factory(index, workers)
+    await dp.emit_startup(bot=bot)
+    loop = asyncio.get_running_loop()
+    # апдейты одного чата — строго по очереди, разные чаты — параллельно
+    scheduler = ChatScheduler(dp, bot, **scheduler_limits())
+    outbox.put(("ready", index))
+
+    while True:
+        batch: Optional[Batch] = await loop.run_in_executor(None, inbox.get)
+        if batch is None:
+            break
+        for chat_id, raw in batch:
+            try:
+                update = Update.model_validate(json.loads(raw), context={"bot": bot})
+            except Exception:
+                logger.exception("bad update %s", raw[:80])
+                continue
+            await scheduler.submit(update, chat_id)
+
+    # drain: дорабатываем принятое, сбрасываем storage, закрываем сессию
+    await scheduler.drain()
+    await dp.emit_shutdown(bot=bot)
+    await bot.session.close()
+    outbox.put(("done", index, scheduler.processed))
+
+
+# ---------- Supervisor ----------
+class Supervisor:
+    """
+    N процессов-воркеров, апдейт -> воркер по HashRing(chat_id). Внутри воркера
+    апдейты одного чата выполняются по очереди, разные чаты — параллельно;
+    разные чаты на разных воркерах — на разных ядрах. FSM у воркеров общий
+    (SQLite в WAL): каждый чат пишет только его воркер.
+    """
+
+    def __init__(self, workers: int, factory: str, queue_size: int = 64) -> None:
+        self.workers = workers
+        self.factory = factory
+        self.ring = HashRing(workers)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._inboxes = [self._ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._outbox = self._ctx.Queue()
+        self._procs: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.processed: Dict[int, int] = {}
+
+    def _spawn(self, index: int) -> None:
+        proc = self._ctx.Process(
+            target=worker_main,
+            args=(index, self.workers, self.factory, self._inboxes[index], self._outbox),
+            name=f"bot-worker-{index}",
+            daemon=False,
+        )
+        proc.start()
+        self._procs[index] = proc
+
+    async def start(self, timeout: float = 60.0) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+        await self._collect("ready", self.workers, timeout)
+
+    def check(self) -> None:
+        """
+        Упавший воркер перезапускается; его очередь и чаты остаются за ним.
+        """
+        for index, proc in enumerate(self._procs):
+            if proc is not None and not proc.is_alive():
+                logger.error("worker %s exited with %s, restarting", index, proc.exitcode)
+                self._spawn(index)
+
+    async def dispatch(self, updates: Sequence[Mapping[str, Any]]) -> None:
+        batches: Dict[int, Batch] = {}
+        node = self.ring.node
+        for update in updates:
+            chat_id = chat_of(update)
+            batches.setdefault(node(chat_id), []).append((chat_id, json.dumps(update, ensure_ascii=False)))
+        await self.send(batches)
+
+    async def send(self, batches: Mapping[int, Batch]) -> None:
+        loop = asyncio.get_running_loop()
+        for index, batch in batches.items():
+            inbox = self._inboxes[index]
+            try:
+                inbox.put_nowait(batch)
+            except queue.Full:
+                # воркер не успевает — ждем его, а не копим апдейты в памяти
+                await loop.run_in_executor(None, inbox.put, batch)
+
+    async def drain(self, timeout: float = 30.0) -> Dict[int, int]:
+        """
+        Новых апдейтов больше нет: воркеры дорабатывают очередь и выходят.
+        """
+        for inbox in self._inboxes:
+            await asyncio.get_running_loop().run_in_executor(None, inbox.put, None)
+        await self._collect("done", self.workers, timeout)
+        for proc in self._procs:
+            if proc is not None:
+                proc.join(timeout)
+                if proc.is_alive():
+                    proc.terminate()
+        return self.processed
+
+    async def _collect(self, kind: str, count: int, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        seen = 0
+        while seen < count:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError(f"workers: {seen}/{count} {kind}")
+            try:
+                msg = await loop.run_in_executor(None, self._outbox.get, True, min(left, 1.0))
+            except queue.Empty:
+                if kind == "ready" and any(p is not None and p.exitcode is not None for p in self._procs):
+                    raise RuntimeError("worker exited during startup")
+                continue
+            if msg[0] == kind:
+                seen += 1
+                if kind == "done":
+                    self.processed[msg[1]] = msg[2]
+
+
+# ---------- Polling ----------
+async def _api(http: ClientSession, token: str, method: str, **params: Any) -> Any:
+    async with http.post(f"{TELEGRAM_API}/bot{token}/{method}", json=params) as resp:
+        body = await resp.json()
+    if not body.get("ok"):
+        raise RuntimeError(f"{method}: {body.get('description')}")
+    return body["result"]
+
+
+async def run_supervisor(token: str, workers: int, factory: str, allowed_updates: List[str]) -> None:
+    """
+    Long polling в одном процессе, обработка — в workers процессах.
+    getUpdates читается сырым JSON: супервизору нужен только chat_id.
+    SIGTERM/SIGINT: перестаем брать апдейты, воркеры дорабатывают свое,
+    полученное подтверждается (offset) только после их выхода.
+    """
+    supervisor = Supervisor(workers, factory)
+    await supervisor.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    offset: Optional[int] = None
+    async with ClientSession(timeout=ClientTimeout(total=60)) as http:
+        await _api(http, token, "deleteWebhook")
+        stopping = loop.create_task(stop.wait())
+        while not stop.is_set():
+            params: Dict[str, Any] = {"timeout": 25, "allowed_updates": allowed_updates}
+            if offset is not None:
+                params["offset"] = offset
+            fetch = loop.create_task(_api(http, token, "getUpdates", **params))
+            await asyncio.wait((fetch, stopping), return_when=asyncio.FIRST_COMPLETED)
+            if not fetch.done():
+                fetch.cancel()
+                break
+            try:
+                updates = fetch.result()
+            except Exception:
+                logger.exception("getUpdates failed")
+                await asyncio.sleep(1)
+                continue
+            supervisor.check()
+            if updates:
+                offset = updates[-1]["update_id"] + 1
+                await supervisor.dispatch(updates)
+
+        await supervisor.drain()
+        if offset is not None:
+            await _api(http, token, "getUpdates", offset=offset, timeout=0, limit=1)
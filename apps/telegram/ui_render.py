@@ -1,27 +1,44 @@
+from typing import Optional
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 
+from core.i18n import Catalog, get_i18n
+
 
-def main_menu() -> ReplyKeyboardMarkup:
+# Клавиатуры статические: собираются один раз на локаль (Catalog.memo) и отдаются
+# одним и тем же объектом. Без каталога — язык по умолчанию.
+def _main_menu(tr: Catalog) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
-            [KeyboardButton(text="🩺 Самочувствие")],
-            [KeyboardButton(text="🌍 Язык")],
+            [KeyboardButton(text=tr.button("health"))],
+            [KeyboardButton(text=tr.button("language"))],
         ],
         resize_keyboard=True
     )
 
 
-def request_location_kb() -> ReplyKeyboardMarkup:
+def _request_location_kb(tr: Catalog) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
-            [KeyboardButton(text="📍 Поделиться геолокацией", request_location=True)],
-            [KeyboardButton(text="✍️ Ввести адрес вручную")],
-            [KeyboardButton(text="⬅️ Назад в меню")]
+            [KeyboardButton(text=tr.button("share_location"), request_location=True)],
+            [KeyboardButton(text=tr.button("manual_address"))],
+            [KeyboardButton(text=tr.button("back"))]
         ],
         resize_keyboard=True,
         one_time_keyboard=True
     )
 
 
+_REMOVE_KB = ReplyKeyboardRemove()
+
+
+def main_menu(tr: Optional[Catalog] = None) -> ReplyKeyboardMarkup:
+    return (tr or get_i18n().default).memo("main_menu", _main_menu)
+
+
+def request_location_kb(tr: Optional[Catalog] = None) -> ReplyKeyboardMarkup:
+    return (tr or get_i18n().default).memo("request_location_kb", _request_location_kb)
+
+
 def remove_kb() -> ReplyKeyboardRemove:
-    return ReplyKeyboardRemove()
+    return _REMOVE_KB
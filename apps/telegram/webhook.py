@@ -0,0 +1,60 @@
+import asyncio
+import os
+import secrets
+import signal
+from typing import Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+
+def build_webhook_app(
+    dp: Dispatcher,
+    bot: Bot,
+    path: str = "/tg/webhook",
+    secret: Optional[str] = None,
+) -> web.Application:
+    app = web.Application()
+    # handle_in_background=False: ждем хендлер и отдаем возвращенный им метод
+    # прямо в теле ответа на webhook — Telegram выполнит его сам
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret,
+        handle_in_background=False,
+    ).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    WEBHOOK_URL — публичный адрес сервиса, WEBHOOK_PATH — путь (по умолчанию /tg/webhook),
+    WEBHOOK_SECRET — секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    (если не задан, генерируется на запуск), PORT — порт (Railway задает сам).
+    """
+    base_url = os.environ["WEBHOOK_URL"].rstrip("/")
+    path = os.getenv("WEBHOOK_PATH", "/tg/webhook")
+    secret = os.getenv("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+    port = int(os.getenv("PORT", "8080"))
+
+    app = build_webhook_app(dp, bot, path=path, secret=secret)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+
+    await bot.set_webhook(
+        base_url + path,
+        secret_token=secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
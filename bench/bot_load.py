@@ -0,0 +1,294 @@
+"""
+Нагрузочный прогон бота: синтетические диалоги через настоящий Dispatcher
+(build_dispatcher) и фейковую сессию Bot API, без сети.
+
+    python -m bench.bot_load [--chats 2000] [--concurrency 200] [--save] [--check] [--metrics]
+
+Каждый чат проходит полный triage: текст проблемы -> срочность (callback) ->
+геолокация или ручной адрес -> call:* (113 / клиника / дежурный). Чаты идут
+параллельно (--concurrency), шаги внутри чата — по очереди. Метод, который
+хендлер вернул, выполняется через сессию, как в polling.
+
+Отчет: апдейтов в секунду, p50/p95/p99 по хендлерам и байты, выделенные на
+апдейт (пик tracemalloc, отдельный проход). Базовая линия — bench/baselines/bot_load.json:
+--save перезаписывает ее, --check завершает с кодом 1, если пропускная
+способность упала или p99 выросла больше чем на --tolerance. --metrics —
+то же с включенными BotMetrics (сравнить с базовой линией = цена метрик).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, Update
+
+from apps.telegram.bot import I18N, RESOURCES, build_dispatcher
+from apps.telegram.metrics import BotMetrics
+from core.geocoder import get_geocoder
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "bot_load.json")
+
+PROBLEMS = [
+    "болит живот", "болит зуб второй день", "температура 38 и кашель", "давит в груди",
+    "сыпь и зуд на руках", "болит спина после тренировки", "паника, не могу уснуть",
+    "sāp vēders", "sāp zobs", "galvassāpes un reibonis", "klepus un temperatūra",
+    "что-то плохо себя чувствую",
+]
+ADDRESSES = ["Лиепая, ул. Грауду 25", "graudu 25", "Slimnicas 25", "Kr. Valdemāra 40", "вальдемара 1"]
+# точки вокруг Лиепаи
+COORDS = [(56.5047, 21.0108), (56.5200, 21.0200), (56.4900, 21.0000), (56.5100, 21.0300)]
+
+
+class FakeSession(BaseSession):
+    """
+    Bot API без сети: sendMessage -> Message, остальное -> True.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls += 1
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not hasattr(method, "text"):
+            return True
+        return Message(
+            message_id=self.calls,
+            date=1,
+            chat=Chat(id=chat_id, type="private"),
+            text=method.text,
+        )
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class _Ids:
+    def __init__(self) -> None:
+        self.n = 0
+
+    def __call__(self) -> int:
+        self.n += 1
+        return self.n
+
+
+def _user(chat_id: int, lang: str) -> Dict[str, Any]:
+    return {"id": chat_id, "is_bot": False, "first_name": "U", "language_code": lang}
+
+
+def _message(ids: _Ids, chat_id: int, lang: str, **content: Any) -> Update:
+    uid = ids()
+    return Update.model_validate({
+        "update_id": uid,
+        "message": {
+            "message_id": uid,
+            "date": 1,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": _user(chat_id, lang),
+            **content,
+        },
+    })
+
+
+def _callback(ids: _Ids, chat_id: int, lang: str, data: str) -> Update:
+    uid = ids()
+    return Update.model_validate({
+        "update_id": uid,
+        "callback_query": {
+            "id": str(uid),
+            "chat_instance": "1",
+            "from": _user(chat_id, lang),
+            "data": data,
+            "message": {"message_id": 1, "date": 1, "chat": {"id": chat_id, "type": "private"}, "text": "…"},
+        },
+    })
+
+
+def conversation(ids: _Ids, chat_id: int, rnd: random.Random) -> List[Tuple[str, Update]]:
+    """
+    Шаги одного диалога: (имя хендлера, апдейт).
+    """
+    lang = "lv" if rnd.random() < 0.3 else "ru"
+    tr = I18N.get(lang)
+    steps: List[Tuple[str, Update]] = []
+    if rnd.random() < 0.3:
+        steps.append(("start", _message(ids, chat_id, lang, text="/start")))
+    steps.append(("problem_text", _message(ids, chat_id, lang, text=rnd.choice(PROBLEMS))))
+    steps.append(("urgency", _callback(ids, chat_id, lang, rnd.choice(["urgency:severe", "urgency:mild"]))))
+    if rnd.random() < 0.6:
+        lat, lon = rnd.choice(COORDS)
+        steps.append(("location", _message(ids, chat_id, lang, location={"latitude": lat, "longitude": lon})))
+    else:
+        steps.append(("ask_address", _message(ids, chat_id, lang, text=tr.button("manual_address"))))
+        steps.append(("address", _message(ids, chat_id, lang, text=rnd.choice(ADDRESSES))))
+    steps.append(("call", _callback(ids, chat_id, lang, rnd.choice(["call:113", "call:clinic", "call:duty"]))))
+    return steps
+
+
+async def _step(dp: Any, bot: Bot, update: Update) -> None:
+    result = await dp.feed_update(bot, update)
+    if isinstance(result, TelegramMethod):
+        await bot(result)
+
+
+async def _run(dp: Any, bot: Bot, chats: List[List[Tuple[str, Update]]], concurrency: int,
+               trace: bool = False) -> Tuple[float, Dict[str, List[float]]]:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    queue = iter(chats)
+
+    async def worker() -> None:
+        for steps in queue:
+            for name, update in steps:
+                if trace:
+                    before = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    await _step(dp, bot, update)
+                    samples[name].append(tracemalloc.get_traced_memory()[1] - before)
+                else:
+                    t0 = time.perf_counter()
+                    await _step(dp, bot, update)
+                    samples[name].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0, samples
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _dataset(n: int, seed: int) -> List[List[Tuple[str, Update]]]:
+    ids = _Ids()
+    rnd = random.Random(seed)
+    return [conversation(ids, 1_000_000 + i, rnd) for i in range(n)]
+
+
+async def measure(args: argparse.Namespace) -> Dict[str, Any]:
+    RESOURCES.load()
+    get_geocoder()
+    session = FakeSession()
+    metrics = BotMetrics() if args.metrics else None
+    if metrics is not None:
+        session.middleware(metrics.session_middleware)
+    bot = Bot("42:TEST", session=session)
+    dp = build_dispatcher(MemoryStorage(), metrics=metrics)
+
+    # прогрев: ленивые каталоги, кеши клавиатур, шаблоны
+    await _run(dp, bot, _dataset(50, args.seed + 1), 10)
+
+    chats = _dataset(args.chats, args.seed)
+    updates = sum(len(c) for c in chats)
+    elapsed, latencies = await _run(dp, bot, chats, args.concurrency)
+
+    # отдельный проход под tracemalloc — он сам замедляет, тайминги берем из первого
+    tracemalloc.start()
+    _, allocs = await _run(dp, bot, _dataset(min(args.chats, 500), args.seed + 2), 1, trace=True)
+    tracemalloc.stop()
+
+    handlers = {}
+    for name in sorted(latencies):
+        lat = latencies[name]
+        handlers[name] = {
+            "count": len(lat),
+            "p50_us": round(_pct(lat, 0.50) * 1e6, 1),
+            "p95_us": round(_pct(lat, 0.95) * 1e6, 1),
+            "p99_us": round(_pct(lat, 0.99) * 1e6, 1),
+            "alloc_kb": round(sum(allocs[name]) / len(allocs[name]) / 1024, 1) if allocs.get(name) else None,
+        }
+    everything = [x for lat in latencies.values() for x in lat]
+    all_allocs = [x for a in allocs.values() for x in a]
+    return {
+        "python": platform.python_version(),
+        "chats": args.chats,
+        "concurrency": args.concurrency,
+        "updates": updates,
+        "updates_per_s": round(updates / elapsed, 1),
+        "p50_us": round(_pct(everything, 0.50) * 1e6, 1),
+        "p95_us": round(_pct(everything, 0.95) * 1e6, 1),
+        "p99_us": round(_pct(everything, 0.99) * 1e6, 1),
+        "alloc_kb_per_update": round(sum(all_allocs) / len(all_allocs) / 1024, 1),
+        "handlers": handlers,
+    }
+
+
+def _delta(now: float, base: Optional[float]) -> str:
+    if not base:
+        return ""
+    return f"{(now - base) / base:+.0%}"
+
+
+def report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    base_h = (baseline or {}).get("handlers", {})
+    print(f"{result['updates']} updates, {result['chats']} chats, concurrency {result['concurrency']}")
+    print(f"throughput: {result['updates_per_s']:,.0f} updates/s "
+          f"{_delta(result['updates_per_s'], (baseline or {}).get('updates_per_s'))}")
+    print(f"all: p50 {result['p50_us']:.0f} µs, p95 {result['p95_us']:.0f} µs, p99 {result['p99_us']:.0f} µs "
+          f"{_delta(result['p99_us'], (baseline or {}).get('p99_us'))}, "
+          f"{result['alloc_kb_per_update']} KB/update")
+    print(f"\n{'handler':<14} {'count':>6} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'Δp99':>6} {'KB/upd':>8}")
+    for name, h in result["handlers"].items():
+        print(f"{name:<14} {h['count']:>6} {h['p50_us']:>9.0f} {h['p95_us']:>9.0f} {h['p99_us']:>9.0f} "
+              f"{_delta(h['p99_us'], base_h.get(name, {}).get('p99_us')):>6} {h['alloc_kb'] or 0:>8}")
+
+
+def regressions(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    found = []
+    if result["updates_per_s"] < baseline["updates_per_s"] * (1 - tolerance):
+        found.append(f"throughput {result['updates_per_s']} < {baseline['updates_per_s']}")
+    for name, h in result["handlers"].items():
+        base = baseline.get("handlers", {}).get(name)
+        if base and h["p99_us"] > base["p99_us"] * (1 + tolerance):
+            found.append(f"{name} p99 {h['p99_us']} µs > {base['p99_us']} µs")
+    return found
+
+
+async def main(args: argparse.Namespace) -> int:
+    baseline = None
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    result = await measure(args)
+    report(result, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nbaseline saved: {BASELINE_PATH}")
+    elif args.check and baseline is not None:
+        found = regressions(result, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION: {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", action="store_true", help="записать результат как базовую линию")
+    parser.add_argument("--check", action="store_true", help="код 1 при регрессии против базовой линии")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--metrics", action="store_true", help="с BotMetrics (оценка накладных расходов)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
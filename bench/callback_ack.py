@@ -0,0 +1,89 @@
+"""
+Время до ответа на нажатие кнопки (answerCallbackQuery): пока его нет,
+кнопка у пользователя крутится.
+
+    python -m bench.callback_ack [--chats 300] [--concurrency 20] [--latency-ms 50]
+
+Диалоги bench.bot_load через build_dispatcher (MemoryStorage); фейковый
+Bot API отвечает через --latency-ms. Для каждого callback — время от
+начала обработки апдейта до выполненного answerCallbackQuery и до конца
+апдейта (включая метод, который вернул хендлер).
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+
+from apps.telegram.bot import RESOURCES, build_dispatcher
+from bench.bot_load import FakeSession, _dataset, _pct
+from core.geocoder import get_geocoder
+
+
+class AckSession(FakeSession):
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+        self.acked: Dict[str, "asyncio.Future[float]"] = {}
+
+    def ack(self, query_id: str) -> "asyncio.Future[float]":
+        return self.acked.setdefault(query_id, asyncio.get_running_loop().create_future())
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        await asyncio.sleep(self.latency)
+        if isinstance(method, AnswerCallbackQuery):
+            self.ack(method.callback_query_id).set_result(time.perf_counter())
+        return await super().make_request(bot, method, timeout)
+
+
+async def measure(chats: int, concurrency: int, latency: float, seed: int) -> Dict[str, Dict[str, List[float]]]:
+    session = AckSession(latency)
+    bot = Bot("42:TEST", session=session)
+    dp = build_dispatcher(MemoryStorage())
+    samples: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+
+    dialogs = iter(_dataset(chats, seed))
+
+    async def worker() -> None:
+        for steps in dialogs:
+            for name, update in steps:
+                await step(name, update)
+
+    async def step(name: str, update: Any) -> None:
+        t0 = time.perf_counter()
+        result = await dp.feed_update(bot, update)
+        if isinstance(result, TelegramMethod):
+            await bot(result)
+        if update.callback_query is None:
+            return
+        done = time.perf_counter()
+        # ack, отправленный в фоне, мог еще не дойти — ждем его
+        samples[name]["ack"].append(await session.ack(update.callback_query.id) - t0)
+        samples[name]["update"].append(done - t0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    RESOURCES.load()
+    get_geocoder()
+    samples = await measure(args.chats, args.concurrency, args.latency_ms / 1000, args.seed)
+    print(f"{args.chats} chats, concurrency {args.concurrency}, Bot API latency {args.latency_ms:g} ms")
+    print(f"{'handler':<10} {'count':>6} {'ack p50 ms':>11} {'ack p95 ms':>11} {'update p95 ms':>14}")
+    for name, s in sorted(samples.items()):
+        print(f"{name:<10} {len(s['ack']):>6} {_pct(s['ack'], 0.5) * 1e3:>11.1f} "
+              f"{_pct(s['ack'], 0.95) * 1e3:>11.1f} {_pct(s['update'], 0.95) * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
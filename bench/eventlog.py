@@ -0,0 +1,71 @@
+"""
+Журнал событий (core.eventlog): цена emit() в хендлере и сквозная проверка.
+
+    python -m bench.eventlog [--chats 2000]
+
+1. emit() выключенного и включенного журнала, µs на вызов; фоновый поток
+   в это время пишет на диск.
+2. Диалоги bench.bot_load через build_dispatcher с включенным журналом ->
+   close() -> сводка python -m core.eventlog по записанным файлам, плюс
+   размер файлов и пик памяти сводки (tracemalloc).
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from aiogram import Bot
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from apps.telegram.bot import EVENTS, RESOURCES, build_dispatcher
+from bench.bot_load import FakeSession, _dataset, _run
+from core.eventlog import EventLog, aggregate, log_files, read_events, report
+from core.geocoder import get_geocoder
+
+
+def _emit_us(log: EventLog, n: int = 200_000) -> float:
+    emit = log.emit
+    t0 = time.perf_counter()
+    for i in range(n):
+        emit("step", i, handler="urgency", src="awaiting_urgency", dst="awaiting_location")
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(max_buffer=1_000_000)
+        print(f"emit, disabled: {_emit_us(log):.2f} µs")
+        log.start(os.path.join(tmp, "micro"))
+        print(f"emit, enabled:  {_emit_us(log):.2f} µs")
+        log.close()
+        print(f"written {log.written}, dropped {log.dropped}\n")
+
+        RESOURCES.load()
+        get_geocoder()
+        directory = os.path.join(tmp, "bot")
+        EVENTS.start(directory, salt="bench")
+        dp = build_dispatcher(MemoryStorage())
+        await _run(dp, Bot("42:TEST", session=FakeSession()), _dataset(args.chats, args.seed), 50)
+        EVENTS.close()
+
+        paths = log_files(directory)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{EVENTS.written} events, {len(paths)} file(s), {size / 1024:.1f} KB gzip, "
+              f"{size / max(1, EVENTS.written):.1f} B/event\n")
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        summary = aggregate(read_events(paths))
+        took = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report(summary)
+        print(f"\naggregate: {took * 1e3:.0f} ms, peak {peak / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Вызовы FSM storage на апдейт: диалоги bench.bot_load через настоящий Dispatcher,
+storage — MemoryStorage со счетчиком вызовов (каждый вызов = round trip для
+не-memory backend).
+
+    python -m bench.fsm_round_trips [--chats 300] [--split] [--budget 2]
+
+На апдейт: одно чтение состояния и данных (StateTx.load; FSMKeyMiddleware
+storage не трогает) и не больше одной записи (StateTx.commit). --split —
+storage без get_state_and_data/set_state_and_data: и чтение, и запись идут
+двумя вызовами. Код выхода 1, если какой-то апдейт превысил --budget
+(с --split — удвоенный). Та же проверка — в tests/test_state_tx.py.
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from apps.telegram.bot import RESOURCES, build_dispatcher
+from bench.bot_load import FakeSession, _dataset, _step
+from core.geocoder import get_geocoder
+
+
+class CountingStorage(BaseStorage):
+    def __init__(self) -> None:
+        self.storage = MemoryStorage()
+        self.calls: Counter = Counter()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self.calls["set_state"] += 1
+        await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        self.calls["get_state"] += 1
+        return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self.calls["set_data"] += 1
+        await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        self.calls["get_data"] += 1
+        return await self.storage.get_data(key)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+class BatchedCountingStorage(CountingStorage):
+    """
+    Как backend с чтением/записью состояния и данных одним запросом (SQLiteStorage).
+    """
+
+    async def get_state_and_data(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        self.calls["get_state_and_data"] += 1
+        return await self.storage.get_state(key), await self.storage.get_data(key)
+
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Dict[str, Any]) -> None:
+        self.calls["set_state_and_data"] += 1
+        await self.storage.set_state(key, state)
+        await self.storage.set_data(key, data)
+
+
+async def main(args: argparse.Namespace) -> int:
+    RESOURCES.load()
+    get_geocoder()
+    storage = CountingStorage() if args.split else BatchedCountingStorage()
+    bot = Bot("42:TEST", session=FakeSession())
+    dp = build_dispatcher(storage)
+
+    per_handler: Dict[str, List[int]] = defaultdict(list)
+    ops: Counter = Counter()
+    updates = 0
+    for steps in _dataset(args.chats, args.seed):
+        for name, update in steps:
+            storage.calls.clear()
+            await _step(dp, bot, update)
+            per_handler[name].append(sum(storage.calls.values()))
+            ops.update(storage.calls)
+            updates += 1
+
+    budget = args.budget * (2 if args.split else 1)
+    print(f"{updates} updates, storage: {type(storage).__name__}, budget {budget}/update")
+    print(f"{'handler':<14}{'updates':>8}{'avg':>7}{'max':>5}")
+    worst = 0
+    for name, calls in sorted(per_handler.items()):
+        worst = max(worst, max(calls))
+        print(f"{name:<14}{len(calls):>8}{sum(calls) / len(calls):>7.2f}{max(calls):>5}")
+    print("calls: " + ", ".join(f"{op}={n / updates:.2f}/update" for op, n in sorted(ops.items())))
+    if worst > budget:
+        print(f"FAIL: {worst} storage calls in one update (budget {budget})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--split", action="store_true")
+    parser.add_argument("--budget", type=int, default=2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,91 @@
+"""
+FSM storage: пропускная способность get_state/set_data и удерживаемая память.
+
+    python -m bench.fsm_storage [--chats 100000]
+
+Сценарий на каждый чат: set_state + set_data (начало triage), затем
+get_state + get_data + set_data (следующий шаг). Память — то, что storage
+удерживает в куче Python после прогона (tracemalloc), без учета page cache sqlite.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from apps.telegram.storage import SQLiteStorage
+
+
+async def _run(make_storage: Callable[[], BaseStorage], chats: int, trace: bool) -> dict:
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+
+    storage = make_storage()
+    keys = [StorageKey(bot_id=1, chat_id=i, user_id=i) for i in range(chats)]
+
+    t0 = time.perf_counter()
+    for key in keys:
+        await storage.set_state(key, "Flow:awaiting_urgency")
+        await storage.set_data(key, {"problem": "болит живот", "locale": "ru"})
+    t1 = time.perf_counter()
+    for key in keys:
+        await storage.get_state(key)
+        data = await storage.get_data(key)
+        data["severe"] = True
+        await storage.set_data(key, data)
+    t2 = time.perf_counter()
+
+    # горячий набор: последние 1000 чатов, только чтения
+    hot = keys[-1000:]
+    for _ in range(20):
+        for key in hot:
+            await storage.get_state(key)
+    t3 = time.perf_counter()
+
+    if isinstance(storage, SQLiteStorage):
+        await storage.flush()
+    result = {
+        "write ops/s": 2 * chats / (t1 - t0),
+        "read+write ops/s": 3 * chats / (t2 - t1),
+        "hot get_state ops/s": 20 * len(hot) / (t3 - t2),
+    }
+    if trace:
+        gc.collect()
+        result = {"retained MiB": (tracemalloc.get_traced_memory()[0] - base) / 2**20}
+        tracemalloc.stop()
+    await storage.close()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = {
+            "MemoryStorage": lambda: MemoryStorage(),
+            "SQLiteStorage": lambda: SQLiteStorage(os.path.join(tmp, f"fsm-{time.time_ns()}.sqlite3")),
+        }
+        # скорость и память — в разных прогонах: tracemalloc сам замедляет аллокации в разы
+        results = {}
+        for name, factory in runs.items():
+            results[name] = asyncio.run(_run(factory, args.chats, trace=False))
+            results[name].update(asyncio.run(_run(factory, args.chats, trace=True)))
+
+    metrics = list(next(iter(results.values())))
+    print(f"{'chats=' + str(args.chats):<22}" + "".join(f"{m:>22}" for m in metrics))
+    for name, res in results.items():
+        print(f"{name:<22}" + "".join(f"{res[m]:>22,.1f}" for m in metrics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Поиск ближайших учреждений: сеточный индекс vs полный перебор.
+
+    python -m bench.geo [--facilities 50000] [--queries 2000]
+
+Синтетический каталог по территории Латвии, теги специалистов случайные,
+~5% — больницы с тегом "*". Результаты индекса сверяются с перебором.
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+from typing import List
+
+import numpy as np
+
+from core.geo import ANY, FacilityIndex, haversine_km
+from core.symptoms import CATEGORIES
+
+LAT = (55.7, 58.05)
+LON = (21.0, 28.2)
+
+
+def _catalogue(n: int, rnd: random.Random) -> List[dict]:
+    tags = [c for c in CATEGORIES if c != "red_flag"]
+    out = []
+    for i in range(n):
+        hospital = rnd.random() < 0.05
+        out.append({
+            "id": f"f{i}",
+            "lat": rnd.uniform(*LAT),
+            "lon": rnd.uniform(*LON),
+            "specialists": [ANY] if hospital else rnd.sample(tags, rnd.randint(1, 3)),
+        })
+    return out
+
+
+def _brute(facilities: List[dict], lats: np.ndarray, lons: np.ndarray, lat: float, lon: float, tag: str, k: int) -> List[str]:
+    mask = np.fromiter((ANY in f["specialists"] or tag in f["specialists"] for f in facilities), dtype=bool)
+    idx = np.nonzero(mask)[0]
+    km = haversine_km(math.radians(lat), math.radians(lon), lats[idx], lons[idx])
+    return [facilities[i]["id"] for i in idx[np.argsort(km)[:k]]]
+
+
+def _pct(samples: List[float], q: int) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--facilities", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    facilities = _catalogue(args.facilities, rnd)
+    t0 = time.perf_counter()
+    index = FacilityIndex(facilities)
+    build = time.perf_counter() - t0
+
+    lats = np.radians([f["lat"] for f in facilities])
+    lons = np.radians([f["lon"] for f in facilities])
+    tags = [c for c in CATEGORIES if c != "red_flag"] + [ANY]
+    queries = [(rnd.uniform(*LAT), rnd.uniform(*LON), rnd.choice(tags)) for _ in range(args.queries)]
+
+    indexed = []
+    for lat, lon, tag in queries:
+        t = time.perf_counter()
+        index.nearest(lat, lon, specialist=tag, k=args.k)
+        indexed.append(time.perf_counter() - t)
+
+    # точность и цена перебора — на подвыборке (маска по тегам строится на каждый запрос)
+    brute = []
+    for lat, lon, tag in queries[:200]:
+        t = time.perf_counter()
+        expected = _brute(facilities, lats, lons, lat, lon, tag, args.k)
+        brute.append(time.perf_counter() - t)
+        got = [f["id"] for f, _ in index.nearest(lat, lon, specialist=tag, k=args.k)]
+        assert got == expected, (lat, lon, tag, got, expected)
+
+    far = [(50.0, 10.0, "dental"), (60.5, 24.9, ANY)]
+    for lat, lon, tag in far:
+        assert index.nearest(lat, lon, specialist=tag, k=args.k)
+
+    print(f"facilities: {args.facilities}, k={args.k}, index build {build * 1e3:.0f} ms")
+    print(f"{'method':<18}{'p50 µs':>10}{'p99 µs':>10}")
+    print(f"{'grid index':<18}{_pct(indexed, 50):>10.0f}{_pct(indexed, 99):>10.0f}")
+    print(f"{'brute force':<18}{_pct(brute, 50):>10.0f}{_pct(brute, 99):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
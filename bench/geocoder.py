@@ -0,0 +1,101 @@
+"""
+Офлайн-геокодер: распознавание адресов и задержка на запрос.
+
+    python -m bench.geocoder [--streets 20000] [--queries 5000]
+
+Сначала — варианты написания по data/geo (кириллица, без диакритики,
+опечатки, лишние слова). Затем — синтетический справочник на --streets улиц
+(порядок всей Латвии) и запросы с опечатками: доля найденных и p50/p99.
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from core.geocoder import Geocoder
+
+SEED_CASES: List[Tuple[str, Optional[str]]] = [
+    ("Лиепая, ул. Грауду 25", "Graudu iela 25, Liepāja"),
+    ("graudu 25", "Graudu iela 25, Liepāja"),
+    ("Gruadu 25", "Graudu iela 25, Liepāja"),
+    ("Graud 25", "Graudu iela 25, Liepāja"),
+    ("Slimnicas 25", "Slimnīcas iela 25, Liepāja"),
+    ("Slimnīcas iela 25-3", "Slimnīcas iela 25, Liepāja"),
+    ("Kr. Valdemāra 40", "Kr. Valdemāra iela 40, Liepāja"),
+    ("вальдемара 1", "Kr. Valdemāra iela 1, Liepāja"),
+    ("Либава, Большая 27, кв 5", "Lielā iela 27, Liepāja"),
+    ("рожу 10", "Rožu iela 10, Liepāja"),
+    ("Klaipedas iela 120", "Klaipēdas iela 120, Liepāja"),
+    ("Tallinas 5", None),
+    ("не знаю", None),
+]
+
+_SYLLABLES = ["ka", "la", "ri", "ga", "ze", "mo", "pe", "du", "vi", "ta", "sa", "li", "ne", "ro", "bu", "ju", "ce", "ra"]
+
+
+def _typo(word: str, rnd: random.Random) -> str:
+    i = rnd.randrange(len(word) - 1)
+    kind = rnd.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    return word[:i] + rnd.choice("aeioukrst") + word[i + 1:]
+
+
+def _synthetic(n: int, rnd: random.Random) -> dict:
+    names = set()
+    while len(names) < n:
+        names.add("".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(3, 5))).capitalize())
+    streets = []
+    for name in sorted(names):
+        lat, lon = rnd.uniform(55.7, 58.0), rnd.uniform(21.0, 28.2)
+        houses = [[k, lat + k * 1e-4, lon + k * 1e-4] for k in range(1, rnd.randint(20, 200), rnd.randint(5, 20))]
+        streets.append({"name": f"{name} iela", "houses": houses})
+    return {"city": "Synth", "aliases": [], "streets": streets}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streets", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    seed = Geocoder.from_dir("data/geo")
+    ok = 0
+    for query, expected in SEED_CASES:
+        found = seed.resolve(query)
+        label = found.label if found is not None else None
+        ok += label == expected
+        print(f"{'ok ' if label == expected else 'BAD'} {query!r:<32} -> {label}")
+    print(f"seed: {ok}/{len(SEED_CASES)}\n")
+
+    rnd = random.Random(7)
+    t0 = time.perf_counter()
+    dataset = _synthetic(args.streets, rnd)
+    geocoder = Geocoder([dataset])
+    print(f"index: {args.streets} streets, built in {time.perf_counter() - t0:.2f}s")
+
+    streets = dataset["streets"]
+    queries = []
+    for _ in range(args.queries):
+        street = rnd.choice(streets)
+        word = street["name"].split()[0]
+        text = _typo(word, rnd) if rnd.random() < 0.5 else word.lower()
+        queries.append((f"{text} {street['houses'][0][0]}", street["name"]))
+
+    samples = []
+    hits = 0
+    for query, name in queries:
+        t = time.perf_counter()
+        found = geocoder.resolve(query)
+        samples.append(time.perf_counter() - t)
+        hits += found is not None and found.label.startswith(name)
+    q = statistics.quantiles(samples, n=100)
+    print(f"queries: {len(queries)} (half with a typo), resolved correctly {hits / len(queries):.1%}")
+    print(f"latency: p50 {q[49] * 1e6:.0f} µs, p99 {q[98] * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Клавиатуры: время и память на одно сообщение, сборка заново vs готовые/кешированные.
+
+    python -m bench.keyboards
+
+"legacy" — сборка pydantic-объектов на каждый ответ, как было раньше
+(_legacy_actions_kb — копия actions_kb до кеширования).
+"""
+import time
+import tracemalloc
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+from apps.telegram.bot import RESOURCES, actions_kb, google_maps_route_url, google_maps_search_url, menu_button_kb
+from apps.telegram.ui_render import main_menu
+
+
+def _legacy_menu_button_kb() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text="🏠 Меню")]],
+        resize_keyboard=True,
+        one_time_keyboard=False,
+    )
+
+
+def _legacy_main_menu() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text="🩺 Самочувствие")],
+            [KeyboardButton(text="🌍 Язык")],
+        ],
+        resize_keyboard=True
+    )
+
+
+def _legacy_actions_kb(resources: Mapping, severe: bool, from_coords: Optional[Tuple[float, float]] = None) -> InlineKeyboardMarkup:
+    # actions_kb до кеширования — все кнопки и URL заново на каждый вызов
+    hospital = resources.get("hospital", {}) or {}
+    duty = resources.get("duty_doctor", {}) or {}
+
+    hosp_name = hospital.get("name", "Клиника")
+    hosp_addr = hospital.get("address", "")
+    dest_query = f"{hosp_name} {hosp_addr}".strip()
+
+    buttons = []
+
+    if severe:
+        buttons.append([InlineKeyboardButton(text="🚑 113", callback_data="call:113")])
+        if hospital.get("phone"):
+            buttons.append([InlineKeyboardButton(text="☎️ Клиника", callback_data="call:clinic")])
+
+        if from_coords:
+            lat, lon = from_coords
+            buttons.append([InlineKeyboardButton(text="🚗 Маршрут", url=google_maps_route_url(lat, lon, dest_query, "driving"))])
+        else:
+            buttons.append([InlineKeyboardButton(text="📍 Клиника на карте", url=google_maps_search_url(dest_query))])
+
+        buttons.append([InlineKeyboardButton(text="🚕 Такси (Bolt)", url="https://bolt.eu")])
+        return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    if duty.get("phone"):
+        buttons.append([InlineKeyboardButton(text="👨‍⚕️ Дежурный врач", callback_data="call:duty")])
+
+    if hospital.get("phone"):
+        buttons.append([InlineKeyboardButton(text="☎️ Клиника", callback_data="call:clinic")])
+
+    if from_coords:
+        lat, lon = from_coords
+        buttons.append([InlineKeyboardButton(text="🚶 Пешком", url=google_maps_route_url(lat, lon, dest_query, "walking"))])
+        buttons.append([InlineKeyboardButton(text="🚌 Автобус", url=google_maps_route_url(lat, lon, dest_query, "transit"))])
+        buttons.append([InlineKeyboardButton(text="🚗 Машина", url=google_maps_route_url(lat, lon, dest_query, "driving"))])
+    else:
+        buttons.append([InlineKeyboardButton(text="📍 Клиника на карте", url=google_maps_search_url(dest_query))])
+
+    buttons.append([InlineKeyboardButton(text="🚕 Такси (Bolt)", url="https://bolt.eu")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def _measure(fn: Callable[[], object], n: int = 5000) -> Dict[str, float]:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - t0
+
+    # объем памяти под объекты, которые ответ держит живыми до отправки
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [fn() for _ in range(1000)]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del keep
+    return {"µs/msg": elapsed / n * 1e6, "bytes/msg": allocated / 1000}
+
+
+def main() -> None:
+    snapshot = RESOURCES.load()
+    coords = (56.51, 21.01)
+
+    for severe in (True, False):
+        for from_coords in (coords, None):
+            assert actions_kb(snapshot, severe, from_coords) == _legacy_actions_kb(snapshot, severe, from_coords)
+
+    cases = {
+        "menu + main menu": (
+            lambda: (_legacy_menu_button_kb(), _legacy_main_menu()),
+            lambda: (menu_button_kb(), main_menu()),
+        ),
+        "actions (address)": (
+            lambda: _legacy_actions_kb(snapshot, severe=False),
+            lambda: actions_kb(snapshot, severe=False),
+        ),
+        "actions (coords)": (
+            lambda: _legacy_actions_kb(snapshot, severe=False, from_coords=coords),
+            lambda: actions_kb(snapshot, severe=False, from_coords=coords),
+        ),
+        "actions (severe)": (
+            lambda: _legacy_actions_kb(snapshot, severe=True, from_coords=coords),
+            lambda: actions_kb(snapshot, severe=True, from_coords=coords),
+        ),
+    }
+
+    print(f"{'case':<20}{'legacy µs':>12}{'cached µs':>12}{'legacy B/msg':>16}{'cached B/msg':>16}")
+    for name, (legacy, cached) in cases.items():
+        lg = _measure(legacy)
+        cc = _measure(cached)
+        print(f"{name:<20}{lg['µs/msg']:>12.1f}{cc['µs/msg']:>12.1f}{lg['bytes/msg']:>16.0f}{cc['bytes/msg']:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
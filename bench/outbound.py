@@ -0,0 +1,152 @@
+"""
+Очередь исходящих (apps/telegram/outbound.py) под нагрузкой против фейковой
+сессии Bot API с лимитами Telegram.
+
+    python -m bench.outbound [--rate 45] [--seconds 6] [--chats 300]
+
+Фейковая сессия отвечает 429 (retry_after=1), если в окне 1 с больше
+--server-chat сообщений в один чат или больше --server-global на бота,
+плюс случайные 429 с вероятностью --flood. Поток сообщений — пуассоновский,
+быстрее глобального лимита: 10% URGENT (113 / срочный результат), 20% RESULT,
+70% DEFAULT (меню, подсказки). Сравниваются:
+
+- naive — как сейчас: отправка сразу, на 429 — sleep(retry_after) и повтор;
+- queue — OutboundQueue: лимиты на чат и на бота, приоритеты, retry_after.
+
+Латентность — от вызова до успешного ответа, по классам приоритета.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Chat, Message
+
+from apps.telegram.outbound import DEFAULT, RESULT, URGENT, OutboundQueue, set_priority
+
+CLASSES = {URGENT: "URGENT", RESULT: "RESULT", DEFAULT: "DEFAULT"}
+
+
+class FakeSession(BaseSession):
+    """
+    Bot API без сети: 20–60 мс на запрос, 429 по скользящему окну 1 с.
+    """
+
+    def __init__(self, chat_limit: int, global_limit: int, flood: float, seed: int) -> None:
+        super().__init__()
+        self.chat_limit = chat_limit
+        self.global_limit = global_limit
+        self.flood = flood
+        self.rnd = random.Random(seed)
+        self._sent: Deque[float] = deque()
+        self._by_chat: Dict[Any, Deque[float]] = defaultdict(deque)
+        self.ok = 0
+        self.rejected = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        await asyncio.sleep(self.rnd.uniform(0.02, 0.06))
+        now = time.monotonic()
+        for window in (self._sent, self._by_chat[method.chat_id]):
+            while window and window[0] <= now - 1.0:
+                window.popleft()
+        if (
+            len(self._sent) >= self.global_limit
+            or len(self._by_chat[method.chat_id]) >= self.chat_limit
+            or self.rnd.random() < self.flood
+        ):
+            self.rejected += 1
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        self._sent.append(now)
+        self._by_chat[method.chat_id].append(now)
+        self.ok += 1
+        return Message(
+            message_id=self.ok,
+            date=int(time.time()),
+            chat=Chat(id=method.chat_id, type="private"),
+            text=method.text,
+        )
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class NaiveRetry(BaseRequestMiddleware):
+    """
+    Без очереди: каждый отправляет сразу и на 429 просто ждет retry_after.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+
+
+async def _send(bot: Bot, priority: int, chat_id: int, out: Dict[int, List[float]]) -> None:
+    set_priority(priority)
+    t0 = time.perf_counter()
+    await bot(SendMessage(chat_id=chat_id, text=CLASSES[priority]))
+    out[priority].append(time.perf_counter() - t0)
+
+
+async def _run(middleware: BaseRequestMiddleware, args: argparse.Namespace) -> Dict[str, Any]:
+    session = FakeSession(args.server_chat, args.server_global, args.flood, args.seed)
+    session.middleware(middleware)
+    bot = Bot("42:TEST", session=session)
+
+    rnd = random.Random(args.seed)
+    latencies: Dict[int, List[float]] = defaultdict(list)
+    tasks = []
+    t0 = time.perf_counter()
+    deadline = t0 + args.seconds
+    while time.perf_counter() < deadline:
+        r = rnd.random()
+        priority = URGENT if r < 0.1 else RESULT if r < 0.3 else DEFAULT
+        tasks.append(asyncio.create_task(_send(bot, priority, rnd.randrange(1, args.chats + 1), latencies)))
+        await asyncio.sleep(rnd.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    if isinstance(middleware, OutboundQueue):
+        await middleware.close()
+    return {"latencies": latencies, "sent": len(tasks), "elapsed": elapsed, "rejected": session.rejected}
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{args.rate}/s for {args.seconds}s over {args.chats} chats; "
+          f"server limits {args.server_chat}/s per chat, {args.server_global}/s global, flood {args.flood:.0%}")
+    print(f"{'mode':<7} {'class':<8} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, middleware in (("naive", NaiveRetry()), ("queue", OutboundQueue())):
+        res = await _run(middleware, args)
+        for priority in (URGENT, RESULT, DEFAULT):
+            lat = res["latencies"][priority]
+            print(f"{name:<7} {CLASSES[priority]:<8} {len(lat):>6} {_pct(lat, 0.5):>9.0f} "
+                  f"{_pct(lat, 0.95):>9.0f} {max(lat) * 1000:>9.0f}")
+        print(f"{name:<7} sent {res['sent']}, 429 responses {res['rejected']}, drained in {res['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=45.0, help="сообщений в секунду на входе")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--server-chat", type=int, default=4)
+    parser.add_argument("--server-global", type=int, default=35)
+    parser.add_argument("--flood", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+Red-flag фильтр (core.safety): сколько он добавляет к каждому тексту.
+
+    python -m bench.safety
+
+Детектор на обычных сообщениях (без red flag — так идет почти весь трафик)
+и с ними, плюс SafetyMiddleware целиком на апдейте без совпадения против
+прямого вызова хендлера.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from aiogram.types import Chat, Message, Update, User
+
+from apps.telegram.bot import I18N, RED_FLAGS, SCENARIO, red_flag_alert
+from apps.telegram.middlewares import SafetyMiddleware
+from bench.symptoms import SHORT, _long_texts
+
+NORMAL = [t for t in SHORT if RED_FLAGS.locale(t) is None] + [
+    "sāp zobs",
+    "temperatūra un klepus",
+    "🩺 Самочувствие",
+    "Liepāja, Lielā iela 1",
+]
+RED = ["не хватает воздуха", "у мамы потеря сознания", "zaudēju samaņu", "Stipras sāpes krūtīs, nosmaku"]
+
+
+def _timeit(fn: Callable[[List[str]], object], texts: List[str], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(texts) * 1e6
+
+
+def _update(i: int, text: str) -> Update:
+    user = User(id=i, is_bot=False, first_name="u")
+    chat = Chat(id=i, type="private")
+    return Update(update_id=i, message=Message(message_id=i, date=datetime.now(), chat=chat, from_user=user, text=text))
+
+
+async def _middleware_us(updates: List[Update], repeat: int = 5) -> Dict[str, float]:
+    async def handler(event: Any, data: Dict[str, Any]) -> None:
+        return None
+
+    middleware = SafetyMiddleware(SCENARIO.router, I18N, red_flag_alert)
+    data: Dict[str, Any] = {}
+    best = {"handler": float("inf"), "safety + handler": float("inf")}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for u in updates:
+            await handler(u, data)
+        t1 = time.perf_counter()
+        for u in updates:
+            await middleware(handler, u, data)
+        t2 = time.perf_counter()
+        best["handler"] = min(best["handler"], t1 - t0)
+        best["safety + handler"] = min(best["safety + handler"], t2 - t1)
+    return {k: v / len(updates) * 1e6 for k, v in best.items()}
+
+
+def main() -> None:
+    corpora = {
+        "normal": NORMAL * 300,
+        "red flag": RED * 300,
+        "long (1 абзац)": [t for t in _long_texts(300, 1) if RED_FLAGS.locale(t) is None],
+        "pasted (6 абзацев)": [t for t in _long_texts(200, 6) if RED_FLAGS.locale(t) is None],
+    }
+    assert all(RED_FLAGS.locale(t) is not None for t in RED)
+
+    print(f"{'corpus':<22}{'avg chars':>10}{'detect µs':>12}")
+    for name, texts in corpora.items():
+        avg = sum(len(t) for t in texts) / len(texts)
+        print(f"{name:<22}{avg:>10.0f}{_timeit(lambda ts: [RED_FLAGS.locale(t) for t in ts], texts):>12.2f}")
+
+    updates = [_update(i, t) for i, t in enumerate(NORMAL * 300)]
+    print()
+    for name, us in asyncio.run(_middleware_us(updates)).items():
+        print(f"{name:<22}{us:>10.2f} µs/update")
+
+
+if __name__ == "__main__":
+    main()
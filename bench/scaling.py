@@ -0,0 +1,91 @@
+"""
+Масштабирование по процессам: Supervisor (apps/telegram/supervisor.py) раздает
+диалоги bench.bot_load воркерам по chat_id, Bot API — фейковая сессия, FSM —
+общий SQLite во временной папке.
+
+    python -m bench.scaling [--max-workers 4] [--chats 2000]
+
+Для каждого N от 1 до --max-workers: запуск воркеров (не в замере), затем
+все апдейты пачками по 100 (как getUpdates) и ожидание, пока воркеры
+доработают и сбросят FSM (drain). Прирост ограничен числом ядер.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from aiogram import Bot, Dispatcher
+
+from apps.telegram.supervisor import Supervisor
+
+
+async def make_worker(index: int, workers: int) -> Tuple[Bot, Dispatcher]:
+    from apps.telegram.bot import RESOURCES, build_dispatcher, build_storage
+    from bench.bot_load import FakeSession
+    from core.geocoder import get_geocoder
+
+    RESOURCES.load()
+    get_geocoder()
+    return Bot("42:TEST", session=FakeSession()), build_dispatcher(build_storage())
+
+
+def _stream(chats: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Апдейты вперемешку, как от многих пользователей сразу; внутри чата — по порядку.
+    """
+    from bench.bot_load import _dataset
+
+    dialogs = [[u.model_dump(mode="json", exclude_none=True, by_alias=True) for _, u in steps]
+               for steps in _dataset(chats, seed)]
+    rnd = random.Random(seed)
+    stream = []
+    active = list(range(len(dialogs)))
+    cursor = [0] * len(dialogs)
+    while active:
+        i = rnd.randrange(len(active))
+        d = active[i]
+        stream.append(dialogs[d][cursor[d]])
+        cursor[d] += 1
+        if cursor[d] == len(dialogs[d]):
+            active[i] = active[-1]
+            active.pop()
+    return stream
+
+
+async def _run(workers: int, stream: List[Dict[str, Any]], batch: int) -> Tuple[float, Dict[int, int]]:
+    supervisor = Supervisor(workers, "bench.scaling:make_worker")
+    await supervisor.start()
+    t0 = time.perf_counter()
+    for i in range(0, len(stream), batch):
+        await supervisor.dispatch(stream[i:i + batch])
+    processed = await supervisor.drain(timeout=600)
+    return time.perf_counter() - t0, processed
+
+
+async def main(args: argparse.Namespace) -> None:
+    stream = _stream(args.chats, args.seed)
+    print(f"{len(stream)} updates, {args.chats} chats, {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>7} {'updates/s':>10} {'speedup':>8}  per worker")
+    base = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in range(1, args.max_workers + 1):
+            # свежая база на каждый прогон; воркеры (spawn) наследуют окружение
+            os.environ["FSM_STORAGE"] = "sqlite"
+            os.environ["FSM_DB_PATH"] = os.path.join(tmp, f"fsm-{n}.sqlite3")
+            elapsed, processed = await _run(n, stream, args.batch)
+            rate = len(stream) / elapsed
+            base = base or rate
+            shares = " ".join(str(processed[i]) for i in sorted(processed))
+            print(f"{n:>7} {rate:>10,.0f} {rate / base:>7.2f}x  {shares}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=max(2, min(4, os.cpu_count() or 1)))
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
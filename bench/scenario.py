@@ -0,0 +1,164 @@
+"""
+Маршрутизация апдейтов: таблица сценария vs цепочка фильтров aiogram.
+
+    python -m bench.scenario [--n 20000]
+
+"legacy" — Router с теми же фильтрами, что были на декораторах в bot.py до
+сценария (CommandStart, F.text == ..., StateFilter, F.location, F.data...),
+хендлеры пустые: меряется только поиск хендлера. "scan+table" — как до
+core.router: red-flag скан каждого текста (SafetyMiddleware), затем отдельный
+разбор события и выборка из таблицы. "intent" — один IntentRouter.route
+(кнопки, команды, callback и red flags свободного текста) и выборка из таблицы.
+Для каждого апдейта сверяется, что выбран тот же хендлер и тот же red flag.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot, F, Router
+from aiogram.filters import Command, CommandStart
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Chat, Location, Message, User
+
+from core.i18n import get_i18n
+from core.router import IntentRouter
+from core.safety import RedFlagDetector
+from core.scenario_engine import load_scenario
+
+SCENARIO_PATH = "data/scenarios/health_triage.json"
+
+_BOT = Bot("42:TEST")
+
+
+class Flow(StatesGroup):
+    awaiting_problem = State()
+    awaiting_urgency = State()
+    awaiting_location = State()
+    awaiting_address = State()
+
+
+def _handler(name: str) -> Callable:
+    async def handler(*args: Any, **kwargs: Any) -> str:
+        return name
+    return handler
+
+
+def _legacy_router() -> Router:
+    # порядок и фильтры — как у декораторов в bot.py до сценария
+    r = Router()
+    r.message(CommandStart())(_handler("start"))
+    r.message(Command("menu"))(_handler("menu"))
+    r.message(F.text == "🏠 Меню")(_handler("menu"))
+    r.message(F.text == "⬅️ Назад в меню")(_handler("back"))
+    r.message(F.text == "🩺 Самочувствие")(_handler("health_menu"))
+    r.message(F.text == "🌍 Язык")(_handler("language"))
+    r.message(Flow.awaiting_problem, F.text)(_handler("problem_text"))
+    r.callback_query(F.data.in_({"urgency:severe", "urgency:mild"}))(_handler("urgency"))
+    r.message(Flow.awaiting_location, F.text == "✍️ Ввести адрес вручную")(_handler("ask_address"))
+    r.message(Flow.awaiting_location, F.location)(_handler("location"))
+    r.message(Flow.awaiting_address, F.text)(_handler("address"))
+    r.callback_query(F.data.startswith("call:"))(_handler("call"))
+    r.message(F.location)(_handler("location_outside_flow"))
+    # fallback_text переводил в awaiting_problem и звал on_problem_text
+    r.message(F.text)(_handler("problem_text"))
+    return r
+
+
+def _events() -> List[Tuple[Any, Optional[str]]]:
+    user = User(id=1, is_bot=False, first_name="U")
+    chat = Chat(id=1, type="private")
+    now = datetime.now()
+
+    def msg(**kw: Any) -> Message:
+        return Message(message_id=1, date=now, chat=chat, from_user=user, **kw)
+
+    def cb(data: str) -> CallbackQuery:
+        return CallbackQuery(id="1", from_user=user, chat_instance="1", data=data, message=msg(text="x"))
+
+    states = [None] + [s.state for s in Flow.__states__]
+    events = [
+        msg(text="/start"), msg(text="/menu"), msg(text="🏠 Меню"), msg(text="🩺 Самочувствие"),
+        msg(text="болит зуб"), msg(text="✍️ Ввести адрес вручную"), msg(text="Graudu 25"),
+        msg(text="не хватает воздуха"), msg(text="🏠 Izvēlne"),
+        msg(location=Location(latitude=56.5, longitude=21.0)),
+        cb("urgency:severe"), cb("call:clinic"), cb("call:duty:liepaja"),
+    ]
+    return [(e, s) for s in states for e in events]
+
+
+async def _legacy(router: Router, event: Any, raw_state: Optional[str]) -> Any:
+    update_type = "callback_query" if isinstance(event, CallbackQuery) else "message"
+    # Command-фильтрам нужен bot (проверка @mention); в сеть он не ходит
+    return await router.propagate_event(update_type, event, raw_state=raw_state, bot=_BOT)
+
+
+async def _scan_table(target: Tuple[Any, RedFlagDetector, IntentRouter], event: Any, raw_state: Optional[str]) -> Any:
+    scenario, detector, router = target
+    red_flag = detector.locale(event.text or event.caption) if isinstance(event, Message) else None
+    event_id, payload = router.route(event)[:2]
+    transition = scenario.resolve(raw_state, event_id) if event_id >= 0 else None
+    return await transition.handler(event, None, None) if transition is not None else None, red_flag
+
+
+async def _intent(scenario: Any, event: Any, raw_state: Optional[str]) -> Any:
+    intent = scenario.router.route(event)
+    transition = scenario.resolve(raw_state, intent.event) if intent.event >= 0 else None
+    return await transition.handler(event, None, None) if transition is not None else None, intent.red_flag
+
+
+async def _run(n: int) -> None:
+    router = _legacy_router()
+    with open(SCENARIO_PATH, "r", encoding="utf-8") as f:
+        names = {t["handler"] for t in json.load(f)["transitions"]}
+    i18n = get_i18n()
+    detector = RedFlagDetector.from_i18n("data/i18n", i18n.default_locale)
+    scenario = load_scenario(SCENARIO_PATH, {name: _handler(name) for name in names})
+    scenario.router.detector = detector
+    # до core.router: подписи без red-flag детектора, скан — отдельным проходом
+    plain = IntentRouter(scenario._events)
+    for locale in ("ru", "lv"):
+        labels = {text: name for name, text in i18n.get(locale).buttons.items()}
+        scenario.add_labels(labels)
+        plain.add_labels(labels)
+    cases = _events()
+
+    for event, raw_state in cases:
+        legacy = await _legacy(router, event, raw_state)
+        before = await _scan_table((scenario, detector, plain), event, raw_state)
+        ours = await _intent(scenario, event, raw_state)
+        where = (getattr(event, "text", None) or getattr(event, "data", None), raw_state)
+        assert before == ours, (where, before, ours)
+        if getattr(event, "text", None) != "🏠 Izvēlne":  # в legacy только русские подписи
+            assert legacy == ours[0], (where, legacy, ours)
+    print(f"{len(cases)} (state, event) pairs route to the same handler")
+
+    results: Dict[str, float] = {}
+    for name, fn, target in (
+        ("legacy", _legacy, router),
+        ("scan+table", _scan_table, (scenario, detector, plain)),
+        ("intent", _intent, scenario),
+    ):
+        t0 = time.perf_counter()
+        for i in range(n):
+            event, raw_state = cases[i % len(cases)]
+            await fn(target, event, raw_state)
+        results[name] = n / (time.perf_counter() - t0)
+
+    for name, rate in results.items():
+        print(f"{name:<10}{rate:>12,.0f} updates/s{1e6 / rate:>10.1f} µs/update")
+    print(f"speedup vs legacy: x{results['intent'] / results['legacy']:.1f}, "
+          f"vs scan+table: x{results['intent'] / results['scan+table']:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(_run(args.n))
+
+
+if __name__ == "__main__":
+    main()
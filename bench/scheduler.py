@@ -0,0 +1,143 @@
+"""
+ChatScheduler (apps/telegram/scheduler.py): проверка гарантий и пропускная
+способность в зависимости от concurrency.
+
+    python -m bench.scheduler [--chats 100] [--latency-ms 20]
+
+Сначала проверки (код 1, если нарушены), на диспетчере-заглушке со
+случайными задержками:
+- апдейты каждого чата выполняются по одному и в порядке поступления;
+- хендлеров одновременно не больше concurrency;
+- принятых, но не доработанных апдейтов не больше max_pending (submit ждет);
+- drain() дорабатывает все принятое.
+
+Затем настоящий build_dispatcher (MemoryStorage) с диалогами bench.bot_load
+и фейковым Bot API, который отвечает через --latency-ms, — как сеть до
+Telegram. Апдейты идут вперемешку, как из getUpdates.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from apps.telegram.scheduler import ChatScheduler, chat_key
+from bench.bot_load import FakeSession, _dataset
+from bench.scaling import _stream
+
+
+class _ProbeDispatcher:
+    """
+    Вместо Dispatcher: спит случайное время и записывает, что и когда выполнялось.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.rnd = random.Random(seed)
+        self.order: Dict[int, List[int]] = defaultdict(list)
+        self.busy: Dict[int, bool] = {}
+        self.running = 0
+        self.peak = 0
+        self.overlaps = 0
+
+    async def feed_update(self, bot: Bot, update: Update) -> None:
+        key = chat_key(update)
+        if self.busy.get(key):
+            self.overlaps += 1
+        self.busy[key] = True
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.rnd.random() * 0.002)
+        self.order[key].append(update.update_id)
+        self.running -= 1
+        self.busy[key] = False
+
+
+async def check(seed: int) -> List[str]:
+    problems = []
+    updates = [u for steps in _dataset(300, seed) for _, u in steps]
+    random.Random(seed).shuffle(updates)
+    # порядок поступления внутри чата — тот, в котором submit их увидит
+    expected: Dict[int, List[int]] = defaultdict(list)
+    for u in updates:
+        expected[chat_key(u)].append(u.update_id)
+
+    dp = _ProbeDispatcher(seed)
+    scheduler = ChatScheduler(dp, Bot("42:TEST", session=FakeSession()), concurrency=16, max_pending=64)  # type: ignore[arg-type]
+    peak_pending = 0
+    for u in updates:
+        await scheduler.submit(u)
+        peak_pending = max(peak_pending, scheduler.pending)
+    await scheduler.drain()
+
+    if dp.order != expected:
+        bad = sum(1 for k in expected if dp.order.get(k) != expected[k])
+        problems.append(f"order: {bad} chats out of order")
+    if dp.overlaps:
+        problems.append(f"serial: {dp.overlaps} updates ran while their chat was busy")
+    if dp.peak > 16:
+        problems.append(f"concurrency: {dp.peak} handlers at once > 16")
+    if peak_pending > 64:
+        problems.append(f"backpressure: {peak_pending} pending > 64")
+    if scheduler.processed != len(updates) or scheduler.pending:
+        problems.append(f"drain: {scheduler.processed}/{len(updates)} processed, {scheduler.pending} left")
+    return problems
+
+
+class SlowSession(FakeSession):
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        await asyncio.sleep(self.latency)
+        return await super().make_request(bot, method, timeout)
+
+
+async def throughput(dp: Any, stream: List[Update], concurrency: int, latency: float) -> float:
+    bot = Bot("42:TEST", session=SlowSession(latency))
+    scheduler = ChatScheduler(dp, bot, concurrency=concurrency, max_pending=1024)
+    t0 = time.perf_counter()
+    for update in stream:
+        await scheduler.submit(update)
+    await scheduler.drain()
+    return len(stream) / (time.perf_counter() - t0)
+
+
+async def main(args: argparse.Namespace) -> int:
+    from apps.telegram.bot import RESOURCES, build_dispatcher
+    from core.geocoder import get_geocoder
+
+    problems = await check(args.seed)
+    for line in problems:
+        print(f"FAIL: {line}")
+    if problems:
+        return 1
+    print("ordering, concurrency bound, backpressure, drain: ok\n")
+
+    RESOURCES.load()
+    get_geocoder()
+    stream = [Update.model_validate(u) for u in _stream(args.chats, args.seed)]
+    print(f"{len(stream)} updates, {args.chats} chats, Bot API latency {args.latency_ms:g} ms")
+    print(f"{'concurrency':>11} {'updates/s':>10} {'speedup':>8}")
+    dp = build_dispatcher(MemoryStorage())
+    base = None
+    for concurrency in (1, 4, 16, 64, 256):
+        rate = await throughput(dp, stream, concurrency, args.latency_ms / 1000)
+        base = base or rate
+        print(f"{concurrency:>11} {rate:>10,.0f} {rate / base:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,131 @@
+"""
+Холодный старт: импорт бота и загрузка data/ в свежих процессах.
+
+    python -m bench.startup [--runs 7]
+
+- import: `import apps.telegram.bot` (aiogram, сценарий, шаблоны, каталог ru);
+- ready: import + то, что build_app делает до первого апдейта (ресурсы,
+  геокодер, все каталоги) — с бандлом (python -m core.bundle) и без него;
+- data: только чтение всех файлов data/ — JSON против бандла, в одном процессе;
+  и то же для копии data/ с синтетическим справочником улиц на --streets улиц
+  (как у городов с полным справочником);
+- самые дорогие импорты верхнего уровня по python -X importtime.
+Медиана по --runs процессам.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from core.bundle import DataBundle, build
+from core.validator import data_files
+
+IMPORT = """
+import time
+t0 = time.perf_counter()
+import apps.telegram.bot
+print(time.perf_counter() - t0)
+"""
+
+READY = """
+import time
+t0 = time.perf_counter()
+from apps.telegram.bot import I18N, RESOURCES
+from core.geocoder import get_geocoder
+RESOURCES.load()
+get_geocoder()
+for locale in I18N.locales:
+    I18N.get(locale)
+print(time.perf_counter() - t0)
+"""
+
+
+def _spawn(code: str, env: Dict[str, str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def _importtime(env: Dict[str, str], top: int) -> List[Tuple[str, int]]:
+    """
+    Прямые импорты apps.telegram.bot: в выводе importtime у них отступ на уровень глубже.
+    """
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import apps.telegram.bot"],
+                         env=env, check=True, capture_output=True, text=True)
+    found = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if name.startswith("   ") and not name.startswith("    "):
+            found.append((name.strip(), int(parts[1])))
+    return sorted(found, key=lambda x: -x[1])[:top]
+
+
+def _data_load(root: str, bundle_path: str, repeat: int = 50) -> Tuple[float, float]:
+    files = [os.path.join(root, rel) for _, rel in data_files(root)]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in files:
+            with open(p, "r", encoding="utf-8") as f:
+                json.load(f)
+    t1 = time.perf_counter()
+    for _ in range(repeat):
+        bundle = DataBundle.open(bundle_path, root)
+        for p in files:
+            bundle.get(p)
+    t2 = time.perf_counter()
+    return (t1 - t0) / repeat, (t2 - t1) / repeat
+
+
+def _big_data(tmp: str, streets: int) -> str:
+    from bench.geocoder import _synthetic
+
+    root = os.path.join(tmp, "data")
+    shutil.copytree("data", root)
+    with open(os.path.join(root, "geo", "synth.json"), "w", encoding="utf-8") as f:
+        json.dump(_synthetic(streets, random.Random(1)), f, ensure_ascii=False)
+    return root
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = os.path.join(tmp, "data.bundle")
+        build("data", bundle_path)
+        base = {**os.environ, "PYTHONPATH": os.getcwd()}
+        with_bundle = {**base, "DATA_BUNDLE": bundle_path}
+        without = {**base, "DATA_BUNDLE": os.path.join(tmp, "missing")}
+
+        print(f"{sys.version.split()[0]}, median of {args.runs} processes")
+        print(f"import apps.telegram.bot     {_spawn(IMPORT, with_bundle, args.runs) * 1000:8.1f} ms")
+        print(f"ready, JSON                  {_spawn(READY, without, args.runs) * 1000:8.1f} ms")
+        print(f"ready, bundle                {_spawn(READY, with_bundle, args.runs) * 1000:8.1f} ms")
+        as_json, as_bundle = _data_load("data", bundle_path)
+        print(f"data/ only: JSON {as_json * 1000:8.2f} ms, bundle {as_bundle * 1000:8.2f} ms")
+        big = _big_data(tmp, args.streets)
+        big_bundle = os.path.join(tmp, "big.bundle")
+        build(big, big_bundle)
+        as_json, as_bundle = _data_load(big, big_bundle, repeat=5)
+        print(f"+{args.streets} streets: JSON {as_json * 1000:8.2f} ms, bundle {as_bundle * 1000:8.2f} ms")
+
+        print("\nimports of apps.telegram.bot (cumulative):")
+        for name, us in _importtime(base, args.top):
+            print(f"  {name:<32}{us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--streets", type=int, default=20000)
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+Микро-бенчмарк классификатора симптомов.
+
+    python -m bench.symptoms
+
+Сравнивает однопроходный автомат (core.symptoms) со старой цепочкой
+_contains_any (восстановлена из той же LEXICON — те же списки, тот же порядок).
+"""
+import random
+import time
+from typing import Callable, List
+
+from core.symptoms import DEFAULT_LABEL, LEXICON, classify, classify_batch, guess_specialist, guess_specialist_batch
+
+
+def legacy_guess_specialist(problem: str) -> str:
+    p = (problem or "").lower().strip()
+    for _, label, words in LEXICON:
+        if any(w in p for w in words):
+            return label
+    return DEFAULT_LABEL
+
+
+SHORT = [
+    "болит живот",
+    "болит зуб",
+    "заложен нос и горло",
+    "плохо",
+    "не хватает воздуха",
+    "температура 38 и озноб",
+    "болит спина после тренировки",
+]
+
+FILLER = (
+    "Добрый день. Пишу вам, потому что уже третий день чувствую себя не очень. "
+    "Утром встал, позавтракал, потом пошел на работу, вечером вернулся домой. "
+    "Ничего особенного не ел, воду пил как обычно, спал примерно семь часов. "
+)
+
+
+def _long_texts(n: int, paragraphs: int) -> List[str]:
+    rnd = random.Random(42)
+    out = []
+    for _ in range(n):
+        parts = [FILLER * rnd.randint(1, 3) for _ in range(paragraphs)]
+        parts.insert(rnd.randrange(len(parts) + 1), rnd.choice(SHORT))
+        out.append("\n\n".join(parts))
+    return out
+
+
+def _timeit(fn: Callable[[List[str]], object], texts: List[str], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(texts) * 1e6
+
+
+def main() -> None:
+    corpora = {
+        "short": SHORT * 300,
+        "long (1 абзац)": _long_texts(300, 1),
+        "pasted (6 абзацев)": _long_texts(200, 6),
+    }
+
+    for texts in corpora.values():
+        expected = [legacy_guess_specialist(t) for t in texts]
+        assert [guess_specialist(t) for t in texts] == expected
+        assert guess_specialist_batch(texts) == expected
+        assert classify_batch(texts) == [classify(t) for t in texts]
+
+    print(f"{'corpus':<22}{'avg chars':>10}{'legacy µs':>12}{'single µs':>12}{'batch µs':>12}")
+    for name, texts in corpora.items():
+        avg = sum(len(t) for t in texts) / len(texts)
+        legacy = _timeit(lambda ts: [legacy_guess_specialist(t) for t in ts], texts)
+        single = _timeit(lambda ts: [guess_specialist(t) for t in ts], texts)
+        batch = _timeit(guess_specialist_batch, texts)
+        print(f"{name:<22}{avg:>10.0f}{legacy:>12.1f}{single:>12.1f}{batch:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
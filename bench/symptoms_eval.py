@@ -0,0 +1,94 @@
+"""
+Офлайн-оценка классификатора симптомов на размеченном корпусе.
+
+    python -m bench.symptoms_eval [--corpus bench/corpus/symptoms.jsonl] [-v]
+
+Корпус — JSONL {"text", "locale", "category", "group"}; группы: exact (как в
+словаре), typo (опечатки), translit (русский латиницей), no_marks (латышский
+без диакритики), negative (симптомов нет -> default). Для каждой группы —
+точность только точного поиска и с нечетким; затем задержка на сообщение:
+по одному (classify) и пачкой (classify_batch, одно произведение матриц).
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+from core.i18n import get_i18n
+from core.symptoms import CATEGORIES, DEFAULT_CATEGORY, Lexicon
+
+Row = Tuple[str, str, str, str]
+
+
+def _load(path: str) -> List[Row]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                rows.append((r["text"], r["locale"], r["category"], r.get("group", "")))
+    return rows
+
+
+def _category(priority) -> str:
+    return DEFAULT_CATEGORY if priority is None else CATEGORIES[priority]
+
+
+def _accuracy(rows: List[Row], lexicons: Dict[str, Lexicon], verbose: bool) -> None:
+    groups: Dict[str, List[int]] = {}
+    for text, locale, expected, group in rows:
+        lexicon = lexicons[locale]
+        exact = _category(lexicon.best_priority(text, fuzzy=False))
+        fuzzy = lexicon.classify(text)
+        stats = groups.setdefault(group, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += exact == expected
+        stats[2] += fuzzy == expected
+        if verbose and fuzzy != expected:
+            print(f"  miss [{group}] {locale} {text!r}: {fuzzy} (ждали {expected})")
+
+    print(f"{'group':<10}{'n':>5}{'exact':>9}{'fuzzy':>9}")
+    total = [0, 0, 0]
+    for group, (n, exact, fuzzy) in groups.items():
+        total = [total[0] + n, total[1] + exact, total[2] + fuzzy]
+        print(f"{group:<10}{n:>5}{exact / n:>9.1%}{fuzzy / n:>9.1%}")
+    n, exact, fuzzy = total
+    print(f"{'all':<10}{n:>5}{exact / n:>9.1%}{fuzzy / n:>9.1%}")
+
+
+def _latency(rows: List[Row], lexicon: Lexicon, copies: int) -> None:
+    texts = [text for text, locale, _, _ in rows if locale == "ru"] * copies
+    random.Random(1).shuffle(texts)
+    misses = [t for t in texts if lexicon.best_priority(t, fuzzy=False) is None]
+
+    def per_message(fn, data: List[str]) -> float:
+        best = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            fn(data)
+            best = min(best, time.perf_counter() - t0)
+        return best / len(data) * 1e6
+
+    print(f"\n{'ru, µs/msg':<22}{'exact':>9}{'single':>9}{'batch':>9}")
+    for name, data in (("mixed", texts), ("exact misses only", misses)):
+        exact = per_message(lambda ts: [lexicon.best_priority(t, fuzzy=False) for t in ts], data)
+        single = per_message(lambda ts: [lexicon.classify(t) for t in ts], data)
+        batch = per_message(lexicon.classify_batch, data)
+        print(f"{name:<22}{exact:>9.1f}{single:>9.1f}{batch:>9.1f}")
+
+
+def main(args: argparse.Namespace) -> None:
+    rows = _load(args.corpus)
+    i18n = get_i18n()
+    lexicons = {locale: i18n.get(locale).lexicon for locale in {r[1] for r in rows}}
+    _accuracy(rows, lexicons, args.verbose)
+    _latency(rows, lexicons["ru"], args.copies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="bench/corpus/symptoms.jsonl")
+    parser.add_argument("--copies", type=int, default=40)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,122 @@
+"""
+Текст результата: скомпилированный шаблон vs сборка info_lines вручную.
+
+    python -m bench.templates [--n 50000]
+
+"legacy" — копия сборки из on_location/on_address до шаблонов (список строк,
++= по блокам, фильтр пустых и join). Специалист передается готовым в оба
+варианта, чтобы мерить только рендер. Вывод сверяется на всех вариантах.
+"""
+import argparse
+import itertools
+import time
+from typing import Callable, Dict, List, Mapping, Optional
+
+from core.template_engine import load_templates
+
+TEMPLATES_PATH = "data/templates/health_templates.json"
+
+
+def _legacy_result_text(problem: str, specialist: str, severe: bool, hospital: Mapping, duty: Mapping, address: Optional[str]) -> str:
+    info_lines = [
+        f"📝 Ситуация: «{problem}»",
+        f"👨‍⚕️ Подходит: {specialist}",
+        "",
+    ]
+
+    if address:
+        info_lines += [f"📍 Адрес: {address}", ""]
+
+    if severe:
+        info_lines += ["🚨 Если станет хуже — 113", ""]
+
+    if duty.get("phone"):
+        info_lines += [
+            f"👨‍⚕️ {duty.get('name', 'Дежурный врач')}",
+            f"📞 {duty.get('phone')}",
+        ]
+        notes = (duty.get("notes") or "").strip()
+        if notes:
+            info_lines += [notes]
+        info_lines += [""]
+
+    hosp_name = hospital.get("name", "")
+    hosp_addr = hospital.get("address", "")
+    hosp_phone = hospital.get("phone", "")
+
+    if hosp_name or hosp_addr or hosp_phone:
+        if hosp_name:
+            info_lines += [f"🏥 {hosp_name}"]
+        if hosp_addr:
+            info_lines += [f"📍 {hosp_addr}"]
+        if hosp_phone:
+            info_lines += [f"☎️ {hosp_phone}"]
+        info_lines += ["", "👇 Действия:"]
+
+    return "\n".join([x for x in info_lines if x])
+
+
+def _cases() -> List[Dict]:
+    hospitals = [
+        {"name": "Liepājas reģionālā slimnīca", "address": "Slimnīcas iela 25, Liepāja", "phone": "+37163403222"},
+        {"name": "Klīnika", "phone": "+37160000000"},
+        {},
+    ]
+    duties = [
+        {},
+        {"phone": "+37160000001"},
+        {"name": "Dežūrārsts", "phone": "+37160000001", "notes": "  Zvaniet 8:00–20:00  "},
+    ]
+    cases = []
+    for hospital, duty, severe, address in itertools.product(hospitals, duties, (True, False), (None, "Graudu iela 25, Liepāja")):
+        cases.append({
+            "problem": "болит зуб",
+            "specialist": "стоматолог",
+            "severe": severe,
+            "hospital": hospital,
+            "duty": duty,
+            "address": address,
+        })
+    return cases
+
+
+def _render(templates) -> Callable[..., str]:
+    render = templates.get("result")
+
+    def result_text(problem, specialist, severe, hospital, duty, address):
+        # те же поля, что передает _result_text в bot.py
+        return render({
+            "problem": problem,
+            "specialist": specialist,
+            "address": address,
+            "severe": severe,
+            "duty": duty,
+            "hospital": hospital,
+        })
+    return result_text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    templates = load_templates(TEMPLATES_PATH)
+    print(f"load + compile: {(time.perf_counter() - t0) * 1e3:.2f} ms")
+
+    ours = _render(templates)
+    cases = _cases()
+    for c in cases:
+        assert ours(**c) == _legacy_result_text(**c), c
+    print(f"{len(cases)} variants render identically")
+
+    for name, fn in (("legacy", _legacy_result_text), ("template", ours)):
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            fn(**cases[i % len(cases)])
+        print(f"{name:<10}{(time.perf_counter() - t0) / args.n * 1e6:>8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+End-to-end проверка webhook-режима против локального фейкового Telegram Bot API.
+
+    python -m bench.webhook [--updates 200]
+
+Поднимает фейковый API (считает исходящие вызовы бота) и webhook-сервер бота,
+шлет в него апдейты как это делает Telegram и проверяет, что:
+- запрос без/с неверным секретом отклоняется (401);
+- финальный ответ хендлера приходит inline в теле ответа на webhook;
+- исходящих HTTP-вызовов к API меньше, чем ответов пользователю.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+from aiohttp import ClientSession, web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from apps.telegram.bot import RESOURCES, build_dispatcher
+from apps.telegram.webhook import build_webhook_app
+
+TOKEN = "42:TEST"
+SECRET = "bench-secret"
+WEBHOOK_PATH = "/tg/webhook"
+
+
+class FakeTelegram:
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls.append(method)
+        form = await request.post()
+        if method == "sendMessage":
+            result: Any = {
+                "message_id": len(self.calls),
+                "date": int(time.time()),
+                "chat": {"id": int(form["chat_id"]), "type": "private"},
+                "text": form.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+
+def _message(update_id: int, chat_id: int, **content: Any) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "U"},
+            **content,
+        },
+    }
+
+
+def _callback(update_id: int, chat_id: int, data: str) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "1",
+            "from": {"id": chat_id, "is_bot": False, "first_name": "U"},
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "…",
+            },
+        },
+    }
+
+
+def _conversation(first_id: int, chat_id: int) -> List[Dict[str, Any]]:
+    return [
+        _message(first_id, chat_id, text="/start", entities=[{"type": "bot_command", "offset": 0, "length": 6}]),
+        _message(first_id + 1, chat_id, text="болит живот"),
+        _callback(first_id + 2, chat_id, "urgency:mild"),
+        _message(first_id + 3, chat_id, location={"latitude": 56.51, "longitude": 21.01}),
+    ]
+
+
+async def _run(updates: int) -> None:
+    RESOURCES.load()
+    fake = FakeTelegram()
+    api_runner = web.AppRunner(fake.app())
+    await api_runner.setup()
+    api_site = web.TCPSite(api_runner, "127.0.0.1", 0)
+    await api_site.start()
+    api_port = api_site._server.sockets[0].getsockname()[1]
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}"))
+    bot = Bot(TOKEN, session=session)
+    dp = build_dispatcher(MemoryStorage())
+    app = build_webhook_app(dp, bot, path=WEBHOOK_PATH, secret=SECRET)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+
+    inline = 0
+    latencies = []
+    async with ClientSession() as client:
+        async with client.post(url, json=_message(1, 1, text="hi")) as resp:
+            assert resp.status == 401, resp.status
+        async with client.post(url, json=_message(1, 1, text="hi"), headers={"X-Telegram-Bot-Api-Secret-Token": "x"}) as resp:
+            assert resp.status == 401, resp.status
+
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        sent = 0
+        chat = 1000
+        while sent < updates:
+            for update in _conversation(sent + 10, chat):
+                t0 = time.perf_counter()
+                async with client.post(url, json=update, headers=headers) as resp:
+                    body = await resp.read()
+                    assert resp.status == 200, resp.status
+                latencies.append(time.perf_counter() - t0)
+                if b'name="method"' in body:
+                    inline += 1
+                sent += 1
+            chat += 1
+
+    await runner.cleanup()
+    await api_runner.cleanup()
+
+    replies = inline + len(fake.calls)
+    print(f"updates:            {sent}")
+    print(f"inline replies:     {inline}")
+    print(f"outbound API calls: {len(fake.calls)}  ({', '.join(sorted(set(fake.calls)))})")
+    print(f"saved round trips:  {inline}/{replies} ({inline / replies:.0%})")
+    print(f"webhook p50/p95:    {statistics.median(latencies) * 1e3:.2f} / "
+          f"{statistics.quantiles(latencies, n=20)[-1] * 1e3:.2f} ms")
+    assert inline == sent, "каждый апдейт диалога должен получить inline-ответ"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.updates))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,34 @@
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
 
+# callback_data кнопок действий: call:<key> или call:<key>:<ref> (id учреждения / города)
+PREFIX = "call"
+
+ActionHandler = Callable[..., Awaitable[Any]]
+
+
+def call_data(key: str, ref: Optional[str] = None) -> str:
+    return f"{PREFIX}:{key}:{ref}" if ref else f"{PREFIX}:{key}"
+
+
+class ActionTable:
+    """
+    call:* -> хендлер одним dict-lookup по key вместо цепочки if key == ...
+    Неизвестный key (старая кнопка, чужие данные) -> default.
+    """
+
+    __slots__ = ("_handlers", "default")
+
+    def __init__(self, handlers: Mapping[str, ActionHandler], default: ActionHandler) -> None:
+        self._handlers: Dict[str, ActionHandler] = dict(handlers)
+        self.default = default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._handlers
+
+    def resolve(self, data: Optional[str]) -> Tuple[ActionHandler, str, Optional[str]]:
+        """
+        (хендлер, key, ref) для callback_data.
+        """
+        _, _, rest = (data or "").partition(":")
+        key, _, ref = rest.partition(":")
+        return self._handlers.get(key, self.default), key, ref or None
@@ -0,0 +1,161 @@
+"""
+Скомпилированный бандл data/: все файлы проверены (core.validator) и разобраны
+заранее, при старте — один mmap и один pickle.loads вместо JSON-парсинга
+каждого файла.
+
+    python -m core.bundle [--data data] [--out data.bundle] [--check]
+
+Собирается один раз на деплой (bin/post_compile — хук сборки слага), воркер
+только читает готовый бандл; битые данные останавливают деплой, а не старт.
+
+Формат: MAGIC, версия формата (u16), sha256 полезной нагрузки, pickle
+{"files": {путь: данные}, "stat": {путь: (размер, mtime в секундах)}}. Битый
+бандл, бандл другой версии или без файла — не ошибка: load_json читает JSON
+как раньше.
+Файл, измененный после сборки (размер/mtime), тоже читается из JSON.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+MAGIC = b"DZVBNDL\x00"
+FORMAT = 2
+_HEADER = struct.Struct(">8sH32s")
+
+DEFAULT_PATH = "data.bundle"
+DEFAULT_ROOT = "data"
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    # секунды, а не st_mtime_ns: архив слага (tar) хранит mtime с точностью до секунды
+    st = os.stat(path)
+    return st.st_size, int(st.st_mtime)
+
+
+def build(root: str = DEFAULT_ROOT, out: str = DEFAULT_PATH) -> int:
+    """
+    Проверяет data/ и пишет бандл (атомарно, через временный файл). Число файлов.
+    """
+    from core.validator import validate_tree
+
+    files = validate_tree(root)
+    payload = pickle.dumps(
+        {"files": files, "stat": {rel: _stat(os.path.join(root, rel)) for rel in files}},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    tmp = f"{out}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT, hashlib.sha256(payload).digest()))
+        f.write(payload)
+    os.replace(tmp, out)
+    return len(files)
+
+
+class DataBundle:
+    __slots__ = ("root", "files", "stat")
+
+    def __init__(self, root: str, files: Dict[str, Any], stat: Dict[str, Tuple[int, int]]) -> None:
+        self.root = root
+        self.files = files
+        self.stat = stat
+
+    @classmethod
+    def open(cls, path: str, root: str = DEFAULT_ROOT) -> Optional["DataBundle"]:
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < _HEADER.size:
+                    return None
+                magic, version, digest = _HEADER.unpack_from(mm)
+                if magic != MAGIC or version != FORMAT:
+                    return None
+                with memoryview(mm) as view:
+                    payload = view[_HEADER.size:]
+                    try:
+                        if hashlib.sha256(payload).digest() != digest:
+                            return None
+                        body = pickle.loads(payload)
+                    finally:
+                        payload.release()
+        except (OSError, ValueError, pickle.UnpicklingError):
+            return None
+        return cls(root, body["files"], body["stat"])
+
+    def get(self, path: str) -> Optional[Any]:
+        """
+        Данные файла (путь как у open), если он в бандле и не менялся после сборки.
+        """
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        stat = self.stat.get(rel)
+        if stat is None:
+            return None
+        try:
+            if _stat(path) != stat:
+                return None
+        except OSError:
+            return None
+        return self.files[rel]
+
+
+_BUNDLE: Any = None
+_NOT_LOADED = object()
+
+
+def get_bundle() -> Optional[DataBundle]:
+    """
+    Бандл из DATA_BUNDLE (по умолчанию data.bundle), открывается один раз на процесс.
+    """
+    global _BUNDLE
+    if _BUNDLE is None:
+        _BUNDLE = DataBundle.open(os.getenv("DATA_BUNDLE", DEFAULT_PATH), os.getenv("DATA_ROOT", DEFAULT_ROOT)) or _NOT_LOADED
+    return _BUNDLE if _BUNDLE is not _NOT_LOADED else None
+
+
+def load_json(path: str) -> Any:
+    """
+    Данные JSON-файла из data/: из бандла, если он актуален, иначе json.load.
+    Результат общий для всех вызовов — не менять на месте.
+    """
+    bundle = get_bundle()
+    if bundle is not None:
+        data = bundle.get(path)
+        if data is not None:
+            return data
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(args: argparse.Namespace) -> int:
+    from core.validator import DataError, validate_tree
+
+    t0 = time.perf_counter()
+    try:
+        if args.check:
+            count = len(validate_tree(args.data))
+        else:
+            count = build(args.data, args.out)
+    except DataError as e:
+        print(f"{len(e.errors)} error(s) in {args.data}:", file=sys.stderr)
+        for line in e.errors:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    took = (time.perf_counter() - t0) * 1000
+    if args.check:
+        print(f"{count} files ok ({took:.0f} ms)")
+    else:
+        print(f"{count} files -> {args.out}, {os.path.getsize(args.out)} bytes ({took:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=DEFAULT_ROOT)
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    parser.add_argument("--check", action="store_true", help="только проверить, бандл не писать")
+    sys.exit(main(parser.parse_args()))
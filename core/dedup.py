@@ -0,0 +1,73 @@
+import os
+from array import array
+from typing import List, Optional, Set
+
+
+class RecentIds:
+    """
+    Последние capacity id (update_id): кольцо + set, add() — O(1).
+    Повторная доставка того же апдейта (рестарт, сетевой сбой) -> add() == False.
+
+    path — снимок кольца (int64 подряд, ~80 KB на 10k id): пишется каждые
+    every новых id и на save(), читается при создании. Так уже обработанное
+    не повторяется и после рестарта; None — только в памяти.
+    """
+
+    __slots__ = ("capacity", "path", "every", "_ring", "_seen", "_pos", "_dirty")
+
+    def __init__(self, capacity: int = 10000, path: Optional[str] = None, every: int = 256) -> None:
+        self.capacity = capacity
+        self.path = path
+        self.every = every
+        self._ring: List[Optional[int]] = [None] * capacity
+        self._seen: Set[int] = set()
+        self._pos = 0
+        self._dirty = 0
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, item: int) -> bool:
+        seen = self._seen
+        if item in seen:
+            return False
+        pos = self._pos
+        old = self._ring[pos]
+        if old is not None:
+            seen.discard(old)
+        self._ring[pos] = item
+        seen.add(item)
+        self._pos = (pos + 1) % self.capacity
+        self._dirty += 1
+        if self.path and self._dirty >= self.every:
+            self.save()
+        return True
+
+    def _ordered(self) -> List[int]:
+        ring, pos = self._ring, self._pos
+        return [x for x in ring[pos:] + ring[:pos] if x is not None]
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            array("q", self._ordered()).tofile(f)
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+    def _load(self, path: str) -> None:
+        items = array("q")
+        with open(path, "rb") as f:
+            data = f.read()
+        # обрезанный хвост (запись оборвалась) — отбрасываем
+        items.frombytes(data[:len(data) - len(data) % items.itemsize])
+        items = items[-self.capacity:]
+        self._ring[:len(items)] = items
+        self._seen.update(items)
+        self._pos = len(items) % self.capacity
@@ -0,0 +1,251 @@
+"""
+Журнал событий triage: append-only, gzip JSONL, без задержки для апдейтов.
+
+emit() только кладет кортеж в ограниченный буфер (полный буфер — событие
+отбрасывается и считается); сериализация, сжатие и запись — в фоновом
+потоке раз в flush_interval. Каждый сброс дописывается в файл отдельным
+gzip-членом, так что оборванная запись теряет только последнюю пачку.
+Файл сменяется по размеру (несжатые байты) и в полночь UTC:
+<prefix>-<YYYY-MM-DD>-<HHMMSS>-<pid>.jsonl.gz.
+
+Текст сообщений не пишется. Чат — blake2b(chat_id) с солью EVENT_LOG_SALT
+(без нее — случайная на процесс, id чатов между рестартами не связываются).
+
+Сводка за дни, потоково и в постоянной памяти (только счетчики):
+
+    python -m core.eventlog logs/ [--since 2026-10-01] [--until 2026-10-07] [--json]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# (время, тип, chat_id, поля)
+Event = Tuple[float, str, int, Dict[str, Any]]
+
+SUFFIX = ".jsonl.gz"
+
+
+class EventLog:
+    """
+    Пока не вызван start(directory), emit() ничего не делает.
+    dropped — сколько событий отброшено из-за полного буфера
+    (в журнал пишется событием "dropped" с приростом).
+    """
+
+    def __init__(self, max_buffer: int = 10000, flush_interval: float = 1.0, max_bytes: int = 16 << 20) -> None:
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self.written = 0
+        self.directory: Optional[str] = None
+        self._buffer: Deque[Event] = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._salt = b""
+        self._prefix = "events"
+        self._path: Optional[str] = None
+        self._day = ""
+        self._size = 0
+        self._reported = 0
+
+    def start(self, directory: str, prefix: str = "events", salt: Optional[str] = None) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._prefix = prefix
+        self._salt = salt.encode() if salt else secrets.token_bytes(16)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def emit(self, kind: str, chat_id: int, **fields: Any) -> None:
+        if self._thread is None:
+            return
+        buffer = self._buffer
+        if len(buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        buffer.append((time.time(), kind, chat_id, fields))
+
+    def close(self) -> None:
+        """
+        Остановить поток и дописать все, что в буфере.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join()
+        self._thread = None
+        self._flush()
+
+    # ---------- фоновый поток ----------
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+
+    def _chat(self, chat_id: int) -> str:
+        return hashlib.blake2b(str(chat_id).encode(), key=self._salt[:64], digest_size=8).hexdigest()
+
+    def _flush(self) -> None:
+        buffer = self._buffer
+        if not buffer and self.dropped == self._reported:
+            return
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        lines: List[str] = []
+        while buffer:
+            ts, kind, chat_id, fields = buffer.popleft()
+            lines.append(dumps({"ts": round(ts, 3), "event": kind, "chat": self._chat(chat_id), **fields}))
+        dropped = self.dropped
+        if dropped != self._reported:
+            lines.append(dumps({"ts": round(time.time(), 3), "event": "dropped", "count": dropped - self._reported}))
+            self._reported = dropped
+        lines.append("")
+        data = "\n".join(lines).encode("utf-8")
+        with gzip.open(self._target(len(data)), "ab", compresslevel=6) as f:
+            f.write(data)
+        self._size += len(data)
+        self.written += len(lines) - 1
+
+    def _target(self, size: int) -> str:
+        now = time.gmtime()
+        day = time.strftime("%Y-%m-%d", now)
+        if self._path is None or day != self._day or (self._size and self._size + size > self.max_bytes):
+            name = f"{self._prefix}-{day}-{time.strftime('%H%M%S', now)}-{os.getpid()}{SUFFIX}"
+            self._path = os.path.join(self.directory or ".", name)
+            self._day = day
+            self._size = 0
+        return self._path
+
+
+# ---------- сводка ----------
+def log_files(directory: str, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+    """
+    Файлы журнала по порядку; since/until (YYYY-MM-DD, включительно) — по дате в имени.
+    """
+    found = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(SUFFIX):
+            continue
+        parts = name[:-len(SUFFIX)].rsplit("-", 5)
+        day = "-".join(parts[1:4]) if len(parts) == 6 else ""
+        if (since and day < since) or (until and day > until):
+            continue
+        found.append(os.path.join(directory, name))
+    return found
+
+
+def read_events(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            except (EOFError, gzip.BadGzipFile, ValueError):
+                # оборванный хвост (процесс упал во время записи) — берем то, что было до него
+                print(f"{path}: truncated, rest skipped", file=sys.stderr)
+
+
+def aggregate(events: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Только счетчики: память не зависит от объема журнала.
+    Уход из состояния сценария = вошли в него и не перешли в другое
+    (для начального состояния сюда входят и завершенные диалоги).
+    """
+    days: Counter = Counter()
+    kinds: Counter = Counter()
+    specialists: Counter = Counter()
+    urgency: Counter = Counter()
+    calls: Counter = Counter()
+    handlers: Counter = Counter()
+    entered: Counter = Counter()
+    left: Counter = Counter()
+    results: Dict[str, Counter] = defaultdict(Counter)
+    dropped = 0
+    for e in events:
+        kind = e.get("event")
+        kinds[kind] += 1
+        days[time.strftime("%Y-%m-%d", time.gmtime(e.get("ts", 0)))] += 1
+        if kind == "step":
+            handlers[e.get("handler")] += 1
+            src, dst = e.get("src"), e.get("dst")
+            if src != dst:
+                left[src] += 1
+                entered[dst] += 1
+        elif kind == "urgency":
+            urgency["severe" if e.get("severe") else "mild"] += 1
+        elif kind == "result":
+            specialists[e.get("category")] += 1
+            results[e.get("via")]["severe" if e.get("severe") else "mild"] += 1
+        elif kind == "call":
+            calls[e.get("key")] += 1
+        elif kind == "dropped":
+            dropped += e.get("count", 0)
+    states = sorted(s for s in entered if s is not None)
+    return {
+        "events": sum(kinds.values()),
+        "dropped": dropped,
+        "days": dict(sorted(days.items())),
+        "kinds": dict(kinds.most_common()),
+        "specialists": dict(specialists.most_common()),
+        "urgency": dict(urgency),
+        "results": {via: dict(c) for via, c in results.items()},
+        "calls": dict(calls.most_common()),
+        "handlers": dict(handlers.most_common()),
+        "states": {s: {"entered": entered[s], "left": left[s], "stopped": max(0, entered[s] - left[s])} for s in states},
+    }
+
+
+def report(summary: Dict[str, Any]) -> None:
+    print(f"{summary['events']} events, {len(summary['days'])} day(s), dropped {summary['dropped']}")
+    urgency = summary["urgency"]
+    total = sum(urgency.values())
+    if total:
+        print(f"\nurgency: severe {urgency.get('severe', 0)} ({urgency.get('severe', 0) / total:.0%}), "
+              f"mild {urgency.get('mild', 0)}")
+    for title in ("specialists", "calls", "handlers"):
+        if summary[title]:
+            print(f"\n{title}:")
+            for key, count in summary[title].items():
+                print(f"  {key:<20} {count:>8}")
+    if summary["states"]:
+        print(f"\n{'state':<20} {'entered':>8} {'left':>8} {'stopped':>8}")
+        for state, s in summary["states"].items():
+            rate = s["stopped"] / s["entered"] if s["entered"] else 0
+            print(f"{state:<20} {s['entered']:>8} {s['left']:>8} {s['stopped']:>8} {rate:>5.0%}")
+
+
+def main(args: argparse.Namespace) -> int:
+    paths = log_files(args.directory, args.since, args.until)
+    if not paths:
+        print(f"no {SUFFIX} files in {args.directory}", file=sys.stderr)
+        return 1
+    summary = aggregate(read_events(paths))
+    if args.json:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        report(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    parser.add_argument("--json", action="store_true")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Ячейка сетки в градусах: ~5.5 км по широте, ~3 км по долготе на широте Латвии.
+CELL_DEG = 0.05
+
+# Дальше стольких колец обход сетки не выгоднее полного векторного перебора.
+MAX_RINGS = 24
+
+# Тег "*" — учреждение принимает с любой проблемой (больница/приемное).
+ANY = "*"
+
+
+def haversine_km(lat1: float, lon1: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Расстояния от одной точки до массива точек (все в радианах), векторно.
+    """
+    dlat = lats - lat1
+    dlon = lons - lon1
+    a = np.sin(dlat * 0.5) ** 2 + math.cos(lat1) * np.cos(lats) * np.sin(dlon * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return int(math.floor(lat / CELL_DEG)), int(math.floor(lon / CELL_DEG))
+
+
+class FacilityIndex:
+    """
+    Сеточный (geohash-подобный) индекс учреждений для поиска k ближайших.
+
+    На каждый тег специалиста — своя сетка: ячейка -> np.array индексов,
+    учреждения с тегом "*" входят во все сетки. Запрос обходит кольца ячеек
+    вокруг точки и считает haversine векторно только по кандидатам; обход
+    прекращается, когда следующее кольцо заведомо дальше k-го найденного.
+    """
+
+    def __init__(self, facilities: Sequence[Mapping]) -> None:
+        self.facilities = tuple(facilities)
+        n = len(self.facilities)
+        self._lat = np.radians(np.fromiter((f["lat"] for f in self.facilities), dtype=np.float64, count=n))
+        self._lon = np.radians(np.fromiter((f["lon"] for f in self.facilities), dtype=np.float64, count=n))
+
+        buckets: Dict[str, Dict[Tuple[int, int], List[int]]] = {}
+        wildcard: List[int] = []
+        for i, f in enumerate(self.facilities):
+            tags = tuple(f.get("specialists") or ())
+            if ANY in tags:
+                wildcard.append(i)
+            for tag in tags:
+                buckets.setdefault(tag, {}).setdefault(_cell(f["lat"], f["lon"]), []).append(i)
+        for i in wildcard:
+            f = self.facilities[i]
+            for tag, grid in buckets.items():
+                if tag != ANY:
+                    grid.setdefault(_cell(f["lat"], f["lon"]), []).append(i)
+
+        self._grids: Dict[str, Dict[Tuple[int, int], np.ndarray]] = {
+            tag: {cell: np.array(sorted(set(idx)), dtype=np.int64) for cell, idx in grid.items()}
+            for tag, grid in buckets.items()
+        }
+        self._all: Dict[str, np.ndarray] = {}
+        self._bbox: Dict[str, Tuple[int, int, int, int]] = {}
+        for tag, grid in self._grids.items():
+            self._all[tag] = np.unique(np.concatenate(list(grid.values())))
+            rows = [c[0] for c in grid]
+            cols = [c[1] for c in grid]
+            self._bbox[tag] = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self.facilities)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        specialist: Optional[str] = None,
+        k: int = 1,
+    ) -> List[Tuple[Mapping, float]]:
+        """
+        k ближайших учреждений, подходящих специалисту. specialist="*" — только
+        учреждения "на все случаи"; тег, которого нет в каталоге, ведет себя так же.
+        Возвращает [(facility, км)] по возрастанию расстояния.
+        """
+        tag = specialist if specialist in self._grids else ANY
+        grid = self._grids.get(tag)
+        if not grid:
+            return []
+
+        lat_r = math.radians(lat)
+        lon_r = math.radians(lon)
+        row0, col0 = _cell(lat, lon)
+        rmin, rmax, cmin, cmax = self._bbox[tag]
+        # ближе этого кольца ячеек с учреждениями нет
+        start = max(rmin - row0, row0 - rmax, cmin - col0, col0 - cmax, 0)
+        stop = max(row0 - rmin, rmax - row0, col0 - cmin, cmax - col0)
+
+        if start <= MAX_RINGS:
+            found_idx = np.empty(0, dtype=np.int64)
+            found_km = np.empty(0, dtype=np.float64)
+            for r in range(start, min(stop, MAX_RINGS) + 1):
+                parts = [grid[c] for c in _ring(row0, col0, r) if c in grid]
+                if parts:
+                    idx = parts[0] if len(parts) == 1 else np.concatenate(parts)
+                    found_idx = np.concatenate((found_idx, idx))
+                    found_km = np.concatenate((found_km, haversine_km(lat_r, lon_r, self._lat[idx], self._lon[idx])))
+                    if len(found_km) > k:
+                        keep = np.argpartition(found_km, k)[:k]
+                        found_idx = found_idx[keep]
+                        found_km = found_km[keep]
+                # все, что за кольцом r, не ближе r полных ячеек (по самой узкой — долготной — стороне)
+                if len(found_km) >= k and (r >= stop or found_km.max() <= r * _cell_km(lat, r)):
+                    return self._result(found_idx, found_km, k)
+
+        # точка далеко от всех учреждений — векторный перебор по всему тегу
+        idx = self._all[tag]
+        km = haversine_km(lat_r, lon_r, self._lat[idx], self._lon[idx])
+        if len(km) > k:
+            keep = np.argpartition(km, k)[:k]
+            idx, km = idx[keep], km[keep]
+        return self._result(idx, km, k)
+
+    def _result(self, idx: np.ndarray, km: np.ndarray, k: int) -> List[Tuple[Mapping, float]]:
+        order = np.argsort(km)[:k]
+        return [(self.facilities[int(idx[i])], float(km[i])) for i in order]
+
+
+def _cell_km(lat: float, r: int) -> float:
+    far_lat = min(abs(lat) + (r + 1) * CELL_DEG, 89.0)
+    return CELL_DEG * math.pi / 180 * EARTH_RADIUS_KM * math.cos(math.radians(far_lat))
+
+
+def _ring(row: int, col: int, r: int) -> Iterable[Tuple[int, int]]:
+    if r == 0:
+        yield row, col
+        return
+    for c in range(col - r, col + r + 1):
+        yield row - r, c
+        yield row + r, c
+    for rr in range(row - r + 1, row + r):
+        yield rr, col - r
+        yield rr, col + r
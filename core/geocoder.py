@@ -0,0 +1,241 @@
+import bisect
+import os
+import re
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from core.bundle import load_json
+from core.textnorm import distance, tokens
+
+# Слова-"шум" в адресе (после fold): тип улицы, дом/квартира — на обоих языках.
+STOP_WORDS = {
+    "iela", "ul", "ulica", "street", "st", "prospekts", "prospekt", "pr", "prosp",
+    "bulvaris", "bulvar", "bulv", "gatve", "laukums", "ploscad", "pl", "sosse", "soseja",
+    "dom", "d", "maja", "kv", "dz", "dzivoklis", "korpuss", "korp", "k", "nr",
+    "gorod", "g", "pilseta", "latvija", "latvia",
+}
+
+_HOUSE = re.compile(r"^(\d{1,4})([a-z]?)$")
+
+# Другие города Латвии (их улиц в справочнике нет): адрес с таким городом —
+# не адрес в нашем городе, даже если улица с тем же именем у нас есть.
+OTHER_CITIES = {
+    t
+    for name in (
+        "Rīga", "Рига", "Daugavpils", "Даугавпилс", "Jelgava", "Елгава", "Jūrmala", "Юрмала",
+        "Ventspils", "Вентспилс", "Rēzekne", "Резекне", "Valmiera", "Валмиера", "Jēkabpils",
+        "Екабпилс", "Ogre", "Огре", "Tukums", "Тукумс", "Cēsis", "Цесис", "Kuldīga", "Кулдига",
+        "Saldus", "Салдус", "Talsi", "Талси", "Grobiņa", "Гробиня", "Aizpute", "Айзпуте",
+        "Pāvilosta", "Павилоста", "Skrunda", "Скрунда", "Durbe", "Дурбе", "Nīca", "Ница",
+    )
+    for t in tokens(name)
+}
+
+
+class Geocoded(NamedTuple):
+    lat: float
+    lon: float
+    label: str
+    # True — номер дома есть в данных; False — интерполяция по улице или без номера
+    exact: bool
+
+
+class _Street:
+    __slots__ = ("name", "city", "numbers", "points")
+
+    def __init__(self, name: str, city: str, houses: List[List[float]]) -> None:
+        self.name = name
+        self.city = city
+        houses = sorted(houses, key=lambda h: h[0])
+        self.numbers = [int(h[0]) for h in houses]
+        self.points = [(float(h[1]), float(h[2])) for h in houses]
+
+    def locate(self, number: Optional[int]) -> Tuple[float, float, bool]:
+        if number is None:
+            mid = self.points[len(self.points) // 2]
+            return mid[0], mid[1], False
+        i = bisect.bisect_left(self.numbers, number)
+        if i < len(self.numbers) and self.numbers[i] == number:
+            lat, lon = self.points[i]
+            return lat, lon, True
+        if i == 0 or i == len(self.numbers):
+            lat, lon = self.points[min(i, len(self.points) - 1)]
+            return lat, lon, False
+        n0, n1 = self.numbers[i - 1], self.numbers[i]
+        (lat0, lon0), (lat1, lon1) = self.points[i - 1], self.points[i]
+        t = (number - n0) / (n1 - n0)
+        return lat0 + (lat1 - lat0) * t, lon0 + (lon1 - lon0) * t, False
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        # улицы, ключ которых проходит через этот узел (для поиска по префиксу)
+        self.ids: Set[int] = set()
+
+
+def _street_key(name: str) -> str:
+    return " ".join(t for t in tokens(name) if t not in STOP_WORDS)
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Geocoder:
+    """
+    Офлайн-геокодер по локальному справочнику улиц (data/geo/<город>.json).
+
+    Улицы индексируются по нормализованному ключу (core.textnorm.fold: без
+    диакритики, кириллица -> латиница), поэтому "Graudu 5", "graudu 5" и
+    "ул. Грауду, 5" сходятся в один ключ. Порядок поиска: точный ключ ->
+    префикс по trie -> нечеткий поиск (триграммы + расстояние с опечатками).
+    Номер дома ищется среди опорных точек улицы, между ними — интерполяция.
+    """
+
+    def __init__(self, datasets: Iterable[dict]) -> None:
+        self._streets: List[_Street] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._trie = _TrieNode()
+        self._grams: Dict[str, List[str]] = {}
+        self._cities: Dict[str, str] = {}
+
+        for ds in datasets:
+            city = ds.get("city", "")
+            for alias in [city, *ds.get("aliases", ())]:
+                for t in tokens(alias):
+                    self._cities[t] = city
+            for item in ds.get("streets", ()):
+                if not item.get("houses"):
+                    continue
+                sid = len(self._streets)
+                self._streets.append(_Street(item["name"], city, item["houses"]))
+                for key in {_street_key(item["name"]), *(_street_key(a) for a in item.get("aliases", ()))}:
+                    if key:
+                        self._add_key(key, sid)
+
+    @classmethod
+    def from_dir(cls, path: str) -> "Geocoder":
+        datasets = []
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".json"):
+                    datasets.append(load_json(os.path.join(path, name)))
+        return cls(datasets)
+
+    def _add_key(self, key: str, sid: int) -> None:
+        if key not in self._exact:
+            for g in _trigrams(key):
+                self._grams.setdefault(g, []).append(key)
+        self._exact.setdefault(key, []).append(sid)
+        node = self._trie
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.ids.add(sid)
+
+    # ---------- lookup ----------
+    def resolve(self, text: str) -> Optional[Geocoded]:
+        """
+        Читаются все слова: город может стоять и до улицы, и после номера дома.
+        Другой город (OTHER_CITIES, если это не часть имени улицы) — None.
+        Непонятные слова после номера (этаж, подъезд, чужой поселок) улицу не
+        меняют, но результат тогда не exact.
+        """
+        street_tokens: List[str] = []
+        tail: List[str] = []
+        foreign = False
+        number: Optional[int] = None
+        city: Optional[str] = None
+        for t in tokens(text):
+            if t in self._cities:
+                city = self._cities[t]
+                continue
+            m = _HOUSE.match(t)
+            if m:
+                # второе число — квартира, корпус
+                if number is None:
+                    number = int(m.group(1))
+                continue
+            if t in STOP_WORDS:
+                continue
+            foreign = foreign or t in OTHER_CITIES
+            # слова после номера дома — хвост адреса, а не улица
+            (tail if number is not None and street_tokens else street_tokens).append(t)
+        if not street_tokens:
+            return None
+
+        key = " ".join(street_tokens)
+        if foreign:
+            # "Ventspils iela" — улица, "Brīvības 100, Rīga" — другой город
+            street = self._pick(self._exact.get(key, ()), city)
+            if street is None or any(t in OTHER_CITIES for t in tail):
+                return None
+        else:
+            street = self._find_street(key, city)
+        if street is None:
+            return None
+
+        lat, lon, exact = street.locate(number)
+        label = street.name + (f" {number}" if number is not None else "")
+        if street.city:
+            label += f", {street.city}"
+        return Geocoded(lat, lon, label, exact and number is not None and not tail)
+
+    def _pick(self, ids: Iterable[int], city: Optional[str]) -> Optional[_Street]:
+        streets = [self._streets[i] for i in sorted(ids)]
+        if city is not None:
+            streets = [s for s in streets if s.city == city]
+        return streets[0] if len(streets) == 1 else None
+
+    def _find_street(self, key: str, city: Optional[str]) -> Optional[_Street]:
+        ids = self._exact.get(key)
+        if ids:
+            found = self._pick(ids, city)
+            if found is not None:
+                return found
+
+        # префикс: "graud" -> Graudu iela, если продолжение однозначно
+        node = self._trie
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                break
+        else:
+            found = self._pick(node.ids, city)
+            if found is not None:
+                return found
+
+        # опечатки: кандидаты по общим триграммам, затем точное расстояние.
+        # Каждая правка (включая перестановку соседних букв) портит не больше 4 триграмм — у далеких ключей общих меньше.
+        grams = _trigrams(key)
+        limit = max(1, len(key) // 4)
+        need = max(1, len(grams) - 4 * limit)
+        counts = Counter(chain.from_iterable(self._grams.get(g, ()) for g in grams))
+        best: Optional[Tuple[int, int, str]] = None
+        for cand, shared in counts.most_common(50):
+            if shared < need:
+                break
+            d = distance(key, cand, limit)
+            if d <= limit and (best is None or (d, -shared) < best[:2]):
+                best = (d, -shared, cand)
+        if best is None:
+            return None
+        return self._pick(self._exact[best[2]], city)
+
+
+_GEOCODER: Optional[Geocoder] = None
+
+
+def get_geocoder(path: str = "data/geo") -> Geocoder:
+    global _GEOCODER
+    if _GEOCODER is None:
+        _GEOCODER = Geocoder.from_dir(path)
+    return _GEOCODER
+
+
+def geocode(text: str) -> Optional[Geocoded]:
+    return get_geocoder().resolve(text)
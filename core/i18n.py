@@ -0,0 +1,222 @@
+import os
+import sys
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from core.bundle import load_json
+from core.symptoms import LEXICON, RU_LEXICON, Lexicon
+from core.textnorm import strip_marks
+
+DEFAULT_LOCALE = "ru"
+
+
+# ---------- Plural rules ----------
+# CLDR-правила: число -> имя формы в каталоге ("plurals": {ключ: {форма: текст}}).
+def _plural_ru(n: int) -> str:
+    if n % 10 == 1 and n % 100 != 11:
+        return "one"
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return "few"
+    return "many"
+
+
+def _plural_lv(n: int) -> str:
+    if n % 10 == 0 or 11 <= n % 100 <= 19:
+        return "zero"
+    if n % 10 == 1 and n % 100 != 11:
+        return "one"
+    return "other"
+
+
+PLURAL_RULES: Dict[str, Callable[[int], str]] = {"ru": _plural_ru, "lv": _plural_lv}
+
+
+class I18nError(ValueError):
+    pass
+
+
+def _compile_message(where: str, text: Any) -> Tuple[Optional[str], Optional[Callable[[Mapping], str]]]:
+    """
+    Текст без плейсхолдеров -> (строка, None), с ними -> (None, text.format_map).
+    """
+    if not isinstance(text, str):
+        raise I18nError(f"{where}: message must be a string")
+    try:
+        fields = [f for _, f, _, _ in Formatter().parse(text) if f is not None]
+    except ValueError as e:
+        raise I18nError(f"{where}: {e}") from e
+    text = sys.intern(text)
+    return (None, text.format_map) if fields else (text, None)
+
+
+class Catalog:
+    """
+    Скомпилированный каталог одной локали: сообщения, плюралы, подписи кнопок
+    и словарь симптомов. Строки интернированы; сообщения без плейсхолдеров
+    отдаются как есть, с плейсхолдерами — через заранее связанный format_map.
+    """
+
+    __slots__ = ("locale", "name", "buttons", "lexicon", "_static", "_format", "_plurals", "_plural_rule", "_memo")
+
+    def __init__(self, locale: str, spec: Mapping[str, Any], fallback: Optional["Catalog"] = None) -> None:
+        self.locale = locale
+        self.name = spec.get("name", locale)
+
+        self._static: Dict[str, str] = dict(fallback._static) if fallback else {}
+        self._format: Dict[str, Callable[[Mapping], str]] = dict(fallback._format) if fallback else {}
+        for key, text in (spec.get("messages") or {}).items():
+            static, fmt = _compile_message(f"{locale}.messages.{key}", text)
+            key = sys.intern(key)
+            self._static.pop(key, None)
+            self._format.pop(key, None)
+            if static is not None:
+                self._static[key] = static
+            else:
+                self._format[key] = fmt
+
+        self._plural_rule = PLURAL_RULES.get(locale, _plural_ru)
+        self._plurals: Dict[str, Dict[str, Callable[[Mapping], str]]] = {}
+        for key, forms in (spec.get("plurals") or {}).items():
+            if not isinstance(forms, dict) or not forms:
+                raise I18nError(f"{locale}.plurals.{key}: expected {{form: text}}")
+            self._plurals[sys.intern(key)] = {
+                form: sys.intern(text).format_map for form, text in forms.items()
+            }
+
+        buttons = dict(fallback.buttons) if fallback else {}
+        buttons.update({sys.intern(k): sys.intern(v) for k, v in (spec.get("buttons") or {}).items()})
+        self.buttons: Mapping[str, str] = buttons
+
+        self.lexicon = _build_lexicon(spec, fallback)
+        self._memo: Dict[Any, Any] = {}
+
+    # ---------- messages ----------
+    def t(self, key: str, **values: Any) -> str:
+        text = self._static.get(key)
+        if text is not None:
+            return text
+        return self._format[key](values)
+
+    def plural(self, key: str, n: int, **values: Any) -> str:
+        forms = self._plurals[key]
+        fmt = forms.get(self._plural_rule(n)) or next(iter(forms.values()))
+        values["n"] = n
+        return fmt(values)
+
+    def button(self, name: str) -> str:
+        return self.buttons[name]
+
+    # ---------- symptoms ----------
+    def classify(self, problem: str) -> str:
+        return self.lexicon.classify(problem)
+
+    def specialist(self, category: str) -> str:
+        return self.lexicon.label(category)
+
+    # ---------- derived objects ----------
+    def memo(self, key: Any, build: Callable[["Catalog"], Any]) -> Any:
+        """
+        Объект, собранный из строк каталога (клавиатура и т.п.), — один раз на локаль.
+        """
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = build(self)
+        return value
+
+
+def _build_lexicon(spec: Mapping[str, Any], fallback: Optional[Catalog]) -> Lexicon:
+    """
+    Словарь симптомов локали + ключи основного словаря (LEXICON): в Латвии пишут
+    на обоих языках, и один проход матчера ловит оба. Латинские ключи
+    добавляются еще и без диакритики ("galvassāpes" и "galvassapes").
+    """
+    base = fallback.lexicon if fallback is not None else RU_LEXICON
+    own = spec.get("symptoms") or {}
+    labels = dict(spec.get("specialists") or {})
+    default_label = labels.pop("default", None)
+    if not own and not labels and default_label is None:
+        return base
+
+    keywords: Dict[str, List[str]] = {key: list(words) for key, _, words in LEXICON}
+    for key, words in own.items():
+        if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+            raise I18nError(f"symptoms.{key}: expected a list of keywords")
+        words = [w.lower() for w in words]
+        keywords.setdefault(key, []).extend(words + [strip_marks(w) for w in words])
+    try:
+        return Lexicon(keywords.items(), {**base.labels, **labels}, default_label or base.default_label)
+    except ValueError as e:
+        raise I18nError(str(e)) from e
+
+
+class I18n:
+    """
+    Каталоги data/i18n/<локаль>.json. Каждый загружается и компилируется при
+    первом обращении и дальше живет в памяти: переключение языка — это выбор
+    другого готового Catalog, без работы на сообщение. Ключи, которых нет в
+    локали, берутся из DEFAULT_LOCALE.
+    """
+
+    def __init__(self, path: str, default: str = DEFAULT_LOCALE) -> None:
+        self.path = path
+        self.default_locale = default
+        self.locales: Tuple[str, ...] = tuple(sorted(
+            name[:-5] for name in os.listdir(path) if name.endswith(".json")
+        )) if os.path.isdir(path) else ()
+        if default not in self.locales:
+            self.locales = (default, *self.locales)
+        self._catalogs: Dict[str, Catalog] = {}
+        self._listeners: List[Callable[[Catalog], None]] = []
+
+    @property
+    def default(self) -> Catalog:
+        return self.get(self.default_locale)
+
+    def get(self, locale: Optional[str]) -> Catalog:
+        catalog = self._catalogs.get(locale)
+        if catalog is not None:
+            return catalog
+        if locale not in self.locales:
+            locale = self.default_locale
+            catalog = self._catalogs.get(locale)
+            if catalog is not None:
+                return catalog
+        return self._load(locale)
+
+    def next_locale(self, locale: Optional[str]) -> str:
+        locales = self.locales
+        i = locales.index(locale) if locale in locales else locales.index(self.default_locale)
+        return locales[(i + 1) % len(locales)]
+
+    def on_load(self, listener: Callable[[Catalog], None]) -> None:
+        """
+        listener(catalog) — для каждого уже загруженного и каждого нового каталога.
+        """
+        self._listeners.append(listener)
+        for catalog in list(self._catalogs.values()):
+            listener(catalog)
+
+    def _load(self, locale: str) -> Catalog:
+        fallback = None if locale == self.default_locale else self.default
+        spec: Dict[str, Any] = {}
+        p = os.path.join(self.path, f"{locale}.json")
+        if os.path.exists(p):
+            try:
+                spec = load_json(p)
+            except (OSError, ValueError) as e:
+                raise I18nError(f"{p}: {e}") from e
+        catalog = self._catalogs[locale] = Catalog(locale, spec, fallback)
+        for listener in self._listeners:
+            listener(catalog)
+        return catalog
+
+
+_I18N: Optional[I18n] = None
+
+
+def get_i18n(path: str = "data/i18n") -> I18n:
+    global _I18N
+    if _I18N is None:
+        _I18N = I18n(path)
+    return _I18N
+
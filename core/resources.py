@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.bundle import load_json
+from core.geo import ANY, FacilityIndex
+
+# (имя файла, mtime) по всем файлам каталога — меняется при правке, добавлении и удалении
+Signature = Tuple[Tuple[str, float], ...]
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _collect_facilities(cities: Dict[str, dict]) -> List[dict]:
+    """
+    Все учреждения всех городов одним списком. Больница города ("hospital")
+    тоже учреждение — с тегом "*" (принимает с любой проблемой), если не указано иное.
+    """
+    out = []
+    for city, data in cities.items():
+        hospital = data.get("hospital")
+        if isinstance(hospital, dict):
+            out.append({
+                "id": f"{city}-hospital",
+                "type": "hospital",
+                "specialists": [ANY],
+                **hospital,
+                "city": city,
+            })
+        for i, item in enumerate(data.get("facilities") or ()):
+            if isinstance(item, dict):
+                out.append({"id": f"{city}-{i}", **item, "city": city})
+    return out
+
+
+class ResourceSnapshot(Mapping):
+    """
+    Неизменяемый снимок ресурсов. Читается без блокировок: при перезагрузке
+    создается новый снимок и целиком подменяется ссылка в ResourceStore.
+
+    Как Mapping — данные города по умолчанию (hospital, duty_doctor, ...),
+    плюс каталог учреждений всех городов с пространственным индексом.
+    """
+
+    __slots__ = ("_data", "cities", "facilities", "index", "_by_id", "version", "signature")
+
+    def __init__(self, cities: Dict[str, dict], default_city: str, signature: Optional[Signature]) -> None:
+        facilities = [_freeze(f) for f in _collect_facilities(cities)]
+        frozen = {name: _freeze(data) for name, data in cities.items()}
+
+        self.cities = MappingProxyType(frozen)
+        self._data = frozen.get(default_city) or next(iter(frozen.values()), MappingProxyType({}))
+        self.facilities = tuple(facilities)
+        self._by_id = {f["id"]: f for f in facilities if f.get("id")}
+        located = [f for f in facilities if isinstance(f.get("lat"), (int, float)) and isinstance(f.get("lon"), (int, float))]
+        self.index = FacilityIndex(located) if located else None
+        self.version = 0
+        self.signature = signature
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def facility(self, facility_id: str) -> Optional[Mapping]:
+        return self._by_id.get(facility_id)
+
+    def city(self, facility: Mapping) -> Mapping:
+        return self.cities.get(facility.get("city"), self._data)
+
+    def nearest(self, lat: float, lon: float, specialist: Optional[str] = None, k: int = 1) -> List[Tuple[Mapping, float]]:
+        if self.index is None:
+            return []
+        return self.index.nearest(lat, lon, specialist=specialist, k=k)
+
+
+class ResourceStore:
+    """
+    Каталог JSON-файлов с контактами (по файлу на город), распарсенный один раз
+    и отдаваемый из памяти.
+
+    get() ничего не читает с диска: не чаще раза в check_interval он только
+    планирует фоновую проверку mtime. Проверка, парсинг и сборка индекса идут
+    в executor, поэтому event loop не блокируется; файл, измененный менее
+    settle секунд назад (еще пишется), подхватывается на следующей проверке.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fallback: dict,
+        default_city: str,
+        check_interval: float = 5.0,
+        settle: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.fallback = fallback
+        self.default_city = default_city
+        self.check_interval = check_interval
+        self.settle = settle
+        self._snapshot: Optional[ResourceSnapshot] = None
+        self._next_check = 0.0
+        self._pending: Optional[asyncio.Task] = None
+
+    # ---------- reads ----------
+    def get(self) -> ResourceSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+
+        now = time.monotonic()
+        if now >= self._next_check and self._pending is None:
+            self._next_check = now + self.check_interval
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return snapshot
+            self._pending = loop.create_task(self._refresh())
+        return snapshot
+
+    # ---------- loading ----------
+    def load(self) -> ResourceSnapshot:
+        """
+        Синхронная загрузка — для старта, до запуска polling.
+        """
+        loaded = self._load_if_changed(None, settle=0.0)
+        if loaded is None:
+            loaded = ResourceSnapshot({self.default_city: self.fallback}, self.default_city, None)
+        self._publish(loaded)
+        return self._snapshot
+
+    async def refresh(self) -> ResourceSnapshot:
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_task(self._refresh())
+        await asyncio.shield(self._pending)
+        return self._snapshot
+
+    async def _refresh(self) -> None:
+        try:
+            known = self._snapshot.signature if self._snapshot is not None else None
+            loop = asyncio.get_running_loop()
+            loaded = await loop.run_in_executor(None, self._load_if_changed, known, self.settle)
+            if loaded is not None:
+                self._publish(loaded)
+        finally:
+            self._pending = None
+
+    def _files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            return sorted(
+                os.path.join(self.path, name)
+                for name in os.listdir(self.path)
+                if name.endswith(".json")
+            )
+        return [self.path]
+
+    def _load_if_changed(self, known: Optional[Signature], settle: float) -> Optional[ResourceSnapshot]:
+        try:
+            files = self._files()
+            signature = tuple((os.path.basename(p), os.stat(p).st_mtime) for p in files)
+        except OSError:
+            return None
+        if not signature or signature == known:
+            return None
+        if time.time() - max(mtime for _, mtime in signature) < settle:
+            return None
+
+        cities = {}
+        for p in files:
+            try:
+                data = load_json(p)
+            except (OSError, ValueError):
+                # битый/недописанный файл — остаемся на текущем снимке
+                return None
+            if not isinstance(data, dict):
+                return None
+            cities[os.path.splitext(os.path.basename(p))[0]] = data
+        return ResourceSnapshot(cities, self.default_city, signature)
+
+    def _publish(self, snapshot: ResourceSnapshot) -> None:
+        snapshot.version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        self._snapshot = snapshot
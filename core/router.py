@@ -1 +1,81 @@
+from typing import Any, Dict, Mapping, NamedTuple, Optional
 
+from aiogram.types import CallbackQuery, Message
+
+from core.safety import RedFlagDetector
+
+# Индексы событий, которые есть у любого сценария (см. Scenario), и "не обрабатывается".
+TEXT = 0
+LOCATION = 1
+NO_EVENT = -1
+
+
+class Intent(NamedTuple):
+    event: int
+    payload: Optional[str]
+    # локаль red flag в свободном тексте (или подписи), иначе None
+    red_flag: Optional[str] = None
+
+
+class IntentRouter:
+    """
+    Событие -> Intent за один шаг: подпись кнопки (на любом языке) — один
+    dict-lookup, команда — lookup по имени, callback — по префиксу до ":".
+    Только свободный текст, который не оказался ни кнопкой, ни командой,
+    проверяется на red flags (detector), и это та же классификация:
+    SafetyMiddleware и сценарий используют один и тот же Intent.
+
+    events — {"button:<имя>" | "command:<имя>" | "callback:<префикс>": индекс}
+    (ключи "text" и "location" — TEXT и LOCATION).
+    """
+
+    __slots__ = ("detector", "_buttons", "_labels", "_commands", "_callbacks")
+
+    def __init__(self, events: Mapping[str, int], detector: Optional[RedFlagDetector] = None) -> None:
+        self.detector = detector
+        self._buttons: Dict[str, int] = {}
+        self._commands: Dict[str, int] = {}
+        self._callbacks: Dict[str, int] = {}
+        tables = {"button": self._buttons, "command": self._commands, "callback": self._callbacks}
+        for key, index in events.items():
+            kind, _, arg = key.partition(":")
+            if kind in tables:
+                tables[kind][arg] = index
+        self._labels: Dict[str, int] = {}
+
+    def add_labels(self, labels: Mapping[str, str]) -> None:
+        """
+        {текст кнопки: имя кнопки}. Кнопки без событий пропускаются (их текст — свободный текст).
+        """
+        for text, name in labels.items():
+            index = self._buttons.get(name)
+            if index is not None:
+                self._labels[text] = index
+
+    def label(self, text: Optional[str]) -> Optional[int]:
+        return self._labels.get(text) if text is not None else None
+
+    def _red_flag(self, text: Optional[str]) -> Optional[str]:
+        detector = self.detector
+        return detector.locale(text) if detector is not None and text else None
+
+    def route(self, event: Any) -> Intent:
+        if isinstance(event, CallbackQuery):
+            data = event.data or ""
+            return Intent(self._callbacks.get(data.split(":", 1)[0], NO_EVENT), data)
+        if isinstance(event, Message):
+            text = event.text
+            if text is not None:
+                label = self._labels.get(text)
+                if label is not None:
+                    return Intent(label, text)
+                if text.startswith("/"):
+                    command = text[1:].split(maxsplit=1)[0].split("@", 1)[0] if len(text) > 1 else ""
+                    index = self._commands.get(command)
+                    if index is not None:
+                        return Intent(index, text)
+                return Intent(TEXT, text, self._red_flag(text))
+            if event.location is not None:
+                return Intent(LOCATION, None)
+            return Intent(NO_EVENT, None, self._red_flag(event.caption))
+        return Intent(NO_EVENT, None)
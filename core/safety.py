@@ -1 +1,56 @@
+import os
+from typing import Iterable, List, Mapping, Optional, Tuple
 
+from core.bundle import load_json
+from core.symptoms import LEXICON, KeywordMatcher
+from core.textnorm import strip_marks
+
+RED_FLAG = "red_flag"
+
+
+class RedFlagDetector:
+    """
+    Red flags всех локалей одним trie-регэкспом (KeywordMatcher): на текст —
+    lower() и один re.search до первого совпадения, единицы микросекунд.
+    Срабатывает до FSM и сценария, в любом состоянии диалога.
+
+    locale(text) — локаль первого совпавшего ключа (на ней отвечать) или None.
+    Ключ, который есть в нескольких локалях, относится к первой из них.
+    """
+
+    __slots__ = ("locales", "_matcher", "_stop")
+
+    def __init__(self, keywords: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        self.locales: List[str] = []
+        pairs = []
+        for locale, words in keywords:
+            index = len(self.locales)
+            self.locales.append(locale)
+            for w in words:
+                w = w.lower()
+                pairs += [(w, index), (strip_marks(w), index)]
+        self._matcher = KeywordMatcher(pairs)
+        # любое совпадение годится — поиск останавливается на первом
+        self._stop = len(self.locales)
+
+    def locale(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        found = self._matcher.best_priority(text.lower(), self._stop)
+        return None if found is None else self.locales[found]
+
+    @classmethod
+    def from_i18n(cls, path: str, default: str) -> "RedFlagDetector":
+        """
+        Ключи red_flag из LEXICON (локаль default) и из "symptoms" каталогов path/<локаль>.json.
+        """
+        keywords: List[Tuple[str, Iterable[str]]] = [(default, next(w for k, _, w in LEXICON if k == RED_FLAG))]
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if not name.endswith(".json"):
+                    continue
+                spec = load_json(os.path.join(path, name))
+                words = ((spec.get("symptoms") or {}) if isinstance(spec, Mapping) else {}).get(RED_FLAG)
+                if words:
+                    keywords.append((name[:-5], words))
+        return cls(keywords)
@@ -1 +1,211 @@
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
+from core.bundle import load_json
+from core.router import LOCATION as LOCATION_EVENT, TEXT as TEXT_EVENT, Intent, IntentRouter
+from core.state_tx import StateTx
+
+Handler = Callable[..., Awaitable[Any]]
+# (событие, имя перехода, состояние до, состояние после) — имена, None — вне сценария
+StepObserver = Callable[[Any, str, Optional[str], Optional[str]], None]
+
+WILDCARD = "*"
+TEXT = "text"
+LOCATION = "location"
+
+# События, которые не найдены как есть, ищутся как "text" (кнопка/команда — тоже текст).
+_TEXT_KINDS = ("button", "command")
+_KINDS = (*_TEXT_KINDS, "callback")
+
+# Индекс состояния "вне сценария": raw_state None или чужое/устаревшее значение.
+OUTSIDE = 0
+
+# Step.target: оставить состояние как есть.
+KEEP = -1
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+class Transition(NamedTuple):
+    handler: Handler
+    name: str
+    # индекс состояния после шага (KEEP — не трогать) и сброс данных перед шагом
+    next: int
+    clear: bool
+
+
+class Step:
+    """
+    Контекст одного шага: хендлер может уточнить следующее состояние
+    (goto / stay), иначе применится "next" из перехода.
+    """
+
+    __slots__ = ("scenario", "transition", "payload", "target")
+
+    def __init__(self, scenario: "Scenario", transition: Transition, payload: Optional[str]) -> None:
+        self.scenario = scenario
+        self.transition = transition
+        self.payload = payload
+        self.target = transition.next
+
+    def goto(self, state: str) -> None:
+        self.target = self.scenario.state_index(state)
+
+    def stay(self) -> None:
+        self.target = KEEP
+
+
+class Scenario:
+    """
+    Сценарий, скомпилированный из JSON в плоскую таблицу переходов.
+
+    Состояния и события пронумерованы; table[state * n_events + event] —
+    готовый Transition (или None) с уже найденным хендлером. Порядок поиска
+    (state, event) > (*, event) > (state, text) > (*, text) разрешается при
+    компиляции, так что на апдейт — разбор события и одна выборка из списка.
+    Состояния хранятся в FSM как "<group>:<state>" — как у StatesGroup.
+    """
+
+    def __init__(self, spec: Mapping, handlers: Mapping[str, Handler]) -> None:
+        self.name = spec.get("name", "")
+        self.group = spec.get("group") or self.name
+        states = spec.get("states")
+        if not isinstance(states, list) or not states or not all(isinstance(s, str) and s for s in states):
+            raise ScenarioError(f"{self.name}: 'states' must be a non-empty list of names")
+        if len(set(states)) != len(states) or WILDCARD in states:
+            raise ScenarioError(f"{self.name}: duplicate or reserved state name")
+
+        # 0 — OUTSIDE, сценарные состояния с 1
+        self.states: Tuple[Optional[str], ...] = (None, *states)
+        self._state_ids: Dict[str, int] = {name: i for i, name in enumerate(states, 1)}
+        self._raw_ids: Dict[str, int] = {f"{self.group}:{name}": i for name, i in self._state_ids.items()}
+
+        # имена кнопок; их подписи (на всех языках) регистрируются через add_labels
+        buttons = spec.get("buttons") or []
+        if not isinstance(buttons, list) or not all(isinstance(b, str) for b in buttons):
+            raise ScenarioError(f"{self.name}: 'buttons' must be a list of names")
+        self._buttons = set(buttons)
+
+        # ключи FSM-данных, которые переживают "clear" (например, язык)
+        self.keep: Tuple[str, ...] = tuple(spec.get("keep") or ())
+
+        rules: Dict[Tuple[int, str], Transition] = {}
+        events: Dict[str, int] = {TEXT: TEXT_EVENT, LOCATION: LOCATION_EVENT}
+        for i, item in enumerate(spec.get("transitions") or ()):
+            where = f"{self.name}: transitions[{i}]"
+            state, event, name = item.get("state"), item.get("event"), item.get("handler")
+            if state != WILDCARD and state not in self._state_ids:
+                raise ScenarioError(f"{where}: unknown state {state!r}")
+            self._check_event(where, event)
+            if name not in handlers:
+                raise ScenarioError(f"{where}: unknown handler {name!r}")
+            nxt = item.get("next")
+            if nxt is not None and nxt not in self._state_ids:
+                raise ScenarioError(f"{where}: unknown next state {nxt!r}")
+
+            key = (self._state_ids.get(state, -1), event)
+            if key in rules:
+                raise ScenarioError(f"{where}: duplicate transition {state!r} + {event!r}")
+            rules[key] = Transition(handlers[name], name, self._state_ids[nxt] if nxt else KEEP, bool(item.get("clear")))
+            events.setdefault(event, len(events))
+
+        self._events = events
+        self.n_events = len(events)
+        # кнопки (подписи всех языков), команды и callback -> индекс события одним lookup
+        self.router = IntentRouter(events)
+        self._observers: List[StepObserver] = []
+
+        table: List[Optional[Transition]] = []
+        for s in range(len(self.states)):
+            for event in events:
+                found = rules.get((s, event)) or rules.get((-1, event))
+                if found is None and event.split(":", 1)[0] in _TEXT_KINDS:
+                    found = rules.get((s, TEXT)) or rules.get((-1, TEXT))
+                table.append(found)
+        self.table = table
+
+    def _check_event(self, where: str, event: Any) -> None:
+        if event in (TEXT, LOCATION):
+            return
+        kind, _, arg = event.partition(":") if isinstance(event, str) else ("", "", "")
+        if kind not in _KINDS or not arg:
+            raise ScenarioError(f"{where}: bad event {event!r}")
+        if kind == "button" and arg not in self._buttons:
+            raise ScenarioError(f"{where}: button {arg!r} is not declared in 'buttons'")
+
+    def add_labels(self, labels: Mapping[str, str]) -> None:
+        """
+        {текст кнопки: имя кнопки}. Кнопки без переходов в сценарии пропускаются.
+        """
+        self.router.add_labels(labels)
+
+    def on_step(self, observer: StepObserver) -> None:
+        """
+        observer вызывается после каждого выполненного шага (синхронно — только быстрые).
+        """
+        self._observers.append(observer)
+
+    # ---------- lookup ----------
+    def state_index(self, name: str) -> int:
+        try:
+            return self._state_ids[name]
+        except KeyError:
+            raise ScenarioError(f"{self.name}: unknown state {name!r}") from None
+
+    def raw_state(self, index: int) -> Optional[str]:
+        name = self.states[index]
+        return f"{self.group}:{name}" if name is not None else None
+
+    def event_of(self, event: Any) -> Tuple[int, Optional[str]]:
+        """
+        (индекс события, полезная нагрузка) или (-1, None), если сценарий
+        такое событие не обрабатывает.
+        """
+        intent = self.router.route(event)
+        return intent.event, intent.payload
+
+    def resolve(self, raw_state: Optional[str], event: int) -> Optional[Transition]:
+        return self.table[self._raw_ids.get(raw_state, OUTSIDE) * self.n_events + event]
+
+    async def dispatch(self, event: Any, tx: StateTx, intent: Optional[Intent] = None, **kwargs: Any) -> Any:
+        """
+        Состояние и данные — в tx (StateTx апдейта): сброс, правки хендлера и
+        следующее состояние пишет один tx.commit() после шага.
+        intent — уже разобранное событие (router.route, например из SafetyMiddleware).
+        kwargs (например, i18n из middleware) передаются хендлеру как есть.
+        """
+        event_id, payload = (intent or self.router.route(event))[:2]
+        if intent is not None and event_id == TEXT_EVENT:
+            # intent разобран до I18nMiddleware: подписи только что загруженного каталога — здесь
+            label = self.router.label(payload)
+            if label is not None:
+                event_id = label
+        if event_id < 0:
+            return None
+        source = self._raw_ids.get(tx.state, OUTSIDE)
+        transition = self.table[source * self.n_events + event_id]
+        if transition is None:
+            return None
+
+        if transition.clear:
+            tx.clear(self.keep)
+        step = Step(self, transition, payload)
+        result = await transition.handler(event, tx, step, **kwargs)
+        if step.target != KEEP:
+            tx.set_state(self.raw_state(step.target))
+        if self._observers:
+            target = self.states[source if step.target == KEEP else step.target]
+            for observer in self._observers:
+                observer(event, transition.name, self.states[source], target)
+        return result
+
+
+def load_scenario(path: str, handlers: Mapping[str, Handler]) -> Scenario:
+    try:
+        spec = load_json(path)
+    except (OSError, ValueError) as e:
+        raise ScenarioError(f"{path}: {e}") from e
+    if not isinstance(spec, dict):
+        raise ScenarioError(f"{path}: scenario must be a JSON object")
+    return Scenario(spec, handlers)
@@ -0,0 +1,94 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+# raw_state еще не читали
+UNKNOWN: Any = object()
+
+
+async def read_state_and_data(storage: BaseStorage, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Состояние и данные одним вызовом, если storage это умеет (get_state_and_data), иначе двумя.
+    """
+    native = getattr(storage, "get_state_and_data", None)
+    if native is not None:
+        return await native(key)
+    return await storage.get_state(key), await storage.get_data(key)
+
+
+async def write_state_and_data(storage: BaseStorage, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+    native = getattr(storage, "set_state_and_data", None)
+    if native is not None:
+        await native(key, state, data)
+        return
+    await storage.set_state(key, state)
+    await storage.set_data(key, data)
+
+
+class StateTx:
+    """
+    FSM одного апдейта: состояние и данные читаются один раз (load), хендлер
+    меняет их в памяти, commit пишет все одним вызовом storage — вместо
+    get_data + set_data на каждый update_data и отдельного set_state.
+    """
+
+    __slots__ = ("storage", "key", "state", "_data", "_changed")
+
+    def __init__(self, storage: BaseStorage, key: StorageKey, state: Optional[str] = UNKNOWN) -> None:
+        self.storage = storage
+        self.key = key
+        # raw_state, если его уже прочитал FSMContextMiddleware
+        self.state = state
+        self._data: Dict[str, Any] = {}
+        self._changed = False
+
+    async def load(self) -> "StateTx":
+        if self.state is UNKNOWN:
+            self.state, self._data = await read_state_and_data(self.storage, self.key)
+        else:
+            self._data = await self.storage.get_data(self.key)
+        return self
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """
+        Текущие (с учетом несохраненных изменений) данные; менять — через update_data/set_data.
+        """
+        return self._data
+
+    @property
+    def changed(self) -> bool:
+        return self._changed
+
+    def set_state(self, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        if state != self.state:
+            self.state = state
+            self._changed = True
+
+    def set_data(self, data: Dict[str, Any]) -> None:
+        self._data = dict(data)
+        self._changed = True
+
+    def update_data(self, **kwargs: Any) -> Dict[str, Any]:
+        self._data = {**self._data, **kwargs}
+        self._changed = True
+        return self._data
+
+    def clear(self, keep: Iterable[str] = ()) -> None:
+        """
+        Сброс состояния и данных; ключи keep (например, язык) остаются.
+        """
+        self.set_state(None)
+        self.set_data({k: self._data[k] for k in keep if k in self._data})
+
+    async def commit(self) -> bool:
+        """
+        Одна запись, если что-то менялось. True — записали.
+        """
+        if not self._changed:
+            return False
+        await write_state_and_data(self.storage, self.key, self.state, self._data)
+        self._changed = False
+        return True
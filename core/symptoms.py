@@ -0,0 +1,459 @@
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.textnorm import distance, squeeze, to_cyrillic
+
+
+# ---------- Lexicon ----------
+# Порядок = приоритет: первая категория, в которой нашлось хоть одно ключевое слово, побеждает
+# (red flags первыми, затем ЖКТ и т.д. — как в старой цепочке if).
+LEXICON: List[Tuple[str, str, List[str]]] = [
+    (
+        "red_flag",
+        "🚨 если резко/плохо — 113",
+        [
+            "не хватает воздуха",
+            "удуш",
+            "обморок",
+            "потеря сознания",
+            "кровь",
+            "кровотеч",
+            "судорог",
+            "парализ",
+            "инсульт",
+            "в груди жмет",
+            "сильная боль",
+            "нестерпим",
+        ],
+    ),
+    (
+        "gastro",
+        "гастроэнтеролог; при резкой боли — хирург",
+        ["живот", "желуд", "киш", "тошн", "рвот", "понос", "диар", "аппен", "гастр", "изжог", "печен", "желч"],
+    ),
+    (
+        "dental",
+        "стоматолог",
+        ["зуб", "десн", "челюст", "кариес", "пломб", "зуб мудр"],
+    ),
+    (
+        "ent",
+        "ЛОР (отоларинголог)",
+        ["ухо", "отит", "горло", "ангин", "нос", "гаймор", "синус", "насморк", "заложен"],
+    ),
+    (
+        "eye",
+        "офтальмолог",
+        ["глаз", "зрение", "веко", "конъюнкт", "линз", "слез", "ячмен"],
+    ),
+    (
+        "cardio",
+        "кардиолог/пульмонолог (если резко/плохо — 113)",
+        ["сердц", "давлен", "аритм", "пульс", "тахикард", "одыш", "задыш", "астм", "бронх", "в груди"],
+    ),
+    (
+        "neuro",
+        "невролог (если резко/плохо — 113)",
+        ["голова", "мигр", "головокруж", "онем", "мураш", "слабост", "невралг"],
+    ),
+    (
+        "ortho",
+        "травматолог-ортопед",
+        ["спина", "поясниц", "шея", "сустав", "колен", "плеч", "растяж", "ушиб", "перелом", "вывих"],
+    ),
+    (
+        "derma",
+        "дерматолог/аллерголог (если отёк/удушье — 113)",
+        ["сып", "зуд", "пятн", "аллерг", "дермат", "экзем", "крапивниц", "псориаз"],
+    ),
+    (
+        "uro",
+        "уролог (при цистите у женщин — также гинеколог)",
+        [
+            "моч",
+            "больно писать",
+            "жжет",
+            "жжёт",
+            "цистит",
+            "уретр",
+            "уретра",
+            "почки",
+            "пах",
+            "простит",
+            "уролог",
+            # сленг-ключи (тихо, только для распознавания):
+            "письк",
+            "пенис",
+            "член",
+            "яичк",
+            "мошон",
+        ],
+    ),
+    (
+        "gyn",
+        "гинеколог",
+        ["месячн", "менстр", "беремен", "выделен", "внизу живота", "матк", "яичник"],
+    ),
+    (
+        "psych",
+        "психотерапевт/психиатр",
+        ["паник", "тревог", "депресс", "бессон", "не сплю", "страх"],
+    ),
+    (
+        "general",
+        "терапевт",
+        ["температ", "озноб", "простуд", "кашель", "слабост", "ломит", "горячк"],
+    ),
+]
+
+DEFAULT_CATEGORY = "default"
+DEFAULT_LABEL = "терапевт (врач общей практики)"
+
+CATEGORIES: List[str] = [key for key, _, _ in LEXICON]
+LABELS: Dict[str, str] = {key: label for key, label, _ in LEXICON}
+LABELS[DEFAULT_CATEGORY] = DEFAULT_LABEL
+
+
+# ---------- Matcher ----------
+class KeywordMatcher:
+    """
+    Словарь ключей, скомпилированный в одно trie-регулярное выражение:
+    поиск идет одним проходом в C (re), а не отдельным `in` на каждое слово.
+
+    Все ключи, совпавшие в одной позиции, — префиксы друг друга, и жадный trie
+    возвращает самый длинный из них. Поэтому каждому ключу заранее приписан
+    лучший приоритет среди его префиксов-ключей, и на скане хватает одного dict-lookup.
+    """
+
+    __slots__ = ("_search", "_priority")
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]) -> None:
+        own: Dict[str, int] = {}
+        for word, priority in keywords:
+            if word and priority < own.get(word, priority + 1):
+                own[word] = priority
+
+        self._priority = {
+            word: min(p for k, p in own.items() if word.startswith(k))
+            for word in own
+        }
+        self._search = re.compile(_trie_pattern(own)).search
+
+    def best_priority(self, text: str, stop_at: int = 0) -> Optional[int]:
+        search = self._search
+        priority = self._priority
+        found = None
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return found
+            p = priority[m.group()]
+            if found is None or p < found:
+                found = p
+                if found <= stop_at:
+                    return found
+            pos = m.start() + 1
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # конец слова внутри trie: продолжение опционально (жадно -> самый длинный ключ)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# ---------- Fuzzy matcher ----------
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def _grams(word: str) -> List[str]:
+    # первая буква с меткой начала слова + биграммы
+    return [" " + word[0]] + [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def _near_short(view: str, word: str) -> bool:
+    """
+    Для коротких ключей замена буквы слишком часто дает другое слово
+    ("жела" ~ "желч"), поэтому только перестановка.
+    """
+    return len(view) == len(word) and sorted(view) == sorted(word)
+
+
+class FuzzyMatcher:
+    """
+    Второй шанс для текста, где KeywordMatcher ничего не нашел: опечатки
+    ("жевот", "зууб") и русский латиницей ("bolit zhivot").
+
+    Ключи (одно слово, от min_len букв) — столбцы матрицы биграмм K. Слова
+    текста целиком (без префиксов: "кровать" не должно стать "кровь")
+    сравниваются со всеми ключами одним произведением T @ K. Кандидаты с
+    достаточным числом общих биграмм проверяются расстоянием OSA (<= 1, для
+    ключей от 8 букв <= 2). Ключи короче 8 букв — основы слов, и слово на
+    букву длиннее или короче у них обычно другое ("простите" ~ "простит",
+    "очки" ~ "почки"), поэтому для них длина слова должна совпадать, а ключи
+    до 4 букв принимают только перестановку. Из подтвержденных побеждает
+    лучший приоритет, как и в точном поиске.
+    """
+
+    __slots__ = (
+        "_vocab", "_matrix", "_words", "_priority", "_length", "_limit", "_slack", "_need", "_max_view", "_cache",
+        "min_len", "cache_size",
+    )
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]], min_len: int = 4, cache_size: int = 65536) -> None:
+        self.min_len = min_len
+        self.cache_size = cache_size
+        # слово -> лучший приоритет (None — ничего); тексты пишут одними и теми же словами
+        self._cache: Dict[str, Optional[int]] = {}
+        own: Dict[str, int] = {}
+        for word, priority in keywords:
+            word = squeeze(word.lower())
+            if len(word) >= min_len and _WORD.fullmatch(word) and priority < own.get(word, priority + 1):
+                own[word] = priority
+        self._words = sorted(own, key=lambda w: (own[w], w))
+
+        self._vocab: Dict[str, int] = {}
+        grams = [set(_grams(w)) for w in self._words]
+        for gs in grams:
+            for g in gs:
+                self._vocab.setdefault(g, len(self._vocab))
+        self._matrix = np.zeros((len(self._vocab), len(self._words)), dtype=np.float32)
+        for j, gs in enumerate(grams):
+            self._matrix[[self._vocab[g] for g in gs], j] = 1.0
+
+        self._priority = np.array([own[w] for w in self._words], dtype=np.int32)
+        self._length = np.array([len(w) for w in self._words], dtype=np.int32)
+        self._limit = np.where(self._length >= 8, 2, 1).astype(np.int32)
+        # насколько длина слова может отличаться от длины ключа
+        self._slack = np.where(self._length >= 8, 2, 0).astype(np.int32)
+        # замена портит до 2 биграмм, перестановка — до 3
+        self._need = np.maximum(2, np.array([len(gs) for gs in grams]) - 3 * self._limit).astype(np.float32)
+        self._max_view = int(self._length.max()) + 2 if self._words else 0
+
+    @staticmethod
+    def variants(text: str) -> str:
+        """
+        Текст для повторного точного поиска: слова, где были повторы букв (уже
+        схлопнутые), и для латиницы — весь текст транслитом в кириллицу.
+        Пустая строка, если менять нечего.
+        """
+        text = (text or "").lower().strip()
+        tokens = set(text.split())
+        found = {squeeze(token) for token in tokens} - tokens
+        cyr = to_cyrillic(text)
+        if cyr != text:
+            found |= {cyr, squeeze(cyr)}
+        found.discard(text)
+        return "\n".join(sorted(found))
+
+    def words(self, text: str) -> List[str]:
+        """
+        Слова текста для нечеткого поиска: как есть и, если есть латиница,
+        транслитом в кириллицу; повторы букв схлопнуты.
+        """
+        text = (text or "").lower()
+        # регэкспы — по уникальным токенам, а не по всему (возможно, длинному) тексту
+        tokens = set(text.split())
+        cyr = to_cyrillic(text)
+        if cyr != text:
+            tokens.update(cyr.split())
+        lo = self.min_len - 1
+        return [w for token in tokens for w in _WORD.findall(squeeze(token)) if len(w) >= lo]
+
+    def best_priorities(self, texts: Sequence[str], chunk: int = 4096) -> List[Optional[int]]:
+        """
+        Результат считается по словам: новые слова всей пачки — одним
+        произведением матриц (кусками по chunk видов), уже виденные — из кэша.
+        """
+        if not self._words:
+            return [None] * len(texts)
+        per_text = [set(self.words(t)) for t in texts]
+        known = self._cache
+        fresh = list({w for ws in per_text for w in ws if w not in known})
+        found: Dict[str, Optional[int]] = {}
+        if fresh:
+            views: List[str] = []
+            owners: List[int] = []
+            for i, w in enumerate(fresh):
+                if len(w) <= self._max_view:
+                    views.append(w)
+                    owners.append(i)
+            scored: List[Optional[int]] = [None] * len(fresh)
+            for start in range(0, len(views), chunk):
+                self._score(views[start:start + chunk], owners[start:start + chunk], scored)
+            found = dict(zip(fresh, scored))
+            if len(known) + len(found) > self.cache_size:
+                known.clear()
+            known.update(found)
+        out: List[Optional[int]] = []
+        for ws in per_text:
+            hits = [p for p in (found[w] if w in found else known[w] for w in ws) if p is not None]
+            out.append(min(hits) if hits else None)
+        return out
+
+    def best_priority(self, text: str) -> Optional[int]:
+        return self.best_priorities([text])[0]
+
+    def _score(self, views: List[str], owners: List[int], out: List[Optional[int]]) -> None:
+        vocab = self._vocab
+        rows: List[int] = []
+        cols: List[int] = []
+        for r, view in enumerate(views):
+            for g in _grams(view):
+                c = vocab.get(g)
+                if c is not None:
+                    rows.append(r)
+                    cols.append(c)
+        grams = np.zeros((len(views), len(vocab)), dtype=np.float32)
+        grams[rows, cols] = 1.0
+
+        shared = grams @ self._matrix
+        view_len = np.fromiter(map(len, views), dtype=np.int32, count=len(views))
+        ok = (shared >= self._need) & (np.abs(view_len[:, None] - self._length) <= self._slack)
+        r_idx, k_idx = np.nonzero(ok)
+        if not len(r_idx):
+            return
+        # по приоритету ключа: у текста хватает первого подтвержденного
+        order = np.lexsort((k_idx, self._priority[k_idx]))
+        for r, k in zip(r_idx[order].tolist(), k_idx[order].tolist()):
+            owner = owners[r]
+            priority = int(self._priority[k])
+            if out[owner] is not None and out[owner] <= priority:
+                continue
+            word, view = self._words[k], views[r]
+            limit = int(self._limit[k])
+            if distance(view, word, limit) > limit:
+                continue
+            if len(word) <= 4 and not _near_short(view, word):
+                continue
+            out[owner] = priority
+
+
+# ---------- Per-locale lexicon ----------
+# Нечеткий поиск — только для коротких текстов: опечатки и транслит пишут в
+# коротких жалобах, а длинный текст без единого ключа почти всегда не про симптомы
+# (и на нем нечеткий поиск стоил бы в разы дороже точного).
+FUZZY_MAX_CHARS = 120
+
+
+class Lexicon:
+    """
+    Словарь одной локали: ключевые слова по категориям (приоритет категории —
+    ее место в CATEGORIES, как в LEXICON) и подписи специалистов.
+    Компилируется один раз; classify — один проход KeywordMatcher, и только
+    если он ничего не нашел и текст короткий (FUZZY_MAX_CHARS) — FuzzyMatcher
+    (опечатки, транслит), который никогда не дает red_flag.
+    """
+
+    __slots__ = ("labels", "default_label", "_matcher", "_fuzzy", "_by_priority")
+
+    def __init__(
+        self,
+        keywords: Iterable[Tuple[str, Iterable[str]]],
+        labels: Mapping[str, str],
+        default_label: str,
+    ) -> None:
+        pairs = []
+        for key, words in keywords:
+            if key not in LABELS or key == DEFAULT_CATEGORY:
+                raise ValueError(f"unknown symptom category {key!r}")
+            priority = CATEGORIES.index(key)
+            pairs += [(w.lower(), priority) for w in words]
+        self._matcher = KeywordMatcher(pairs)
+        # похожее слово — не повод для совета звонить 113: red flag только точным совпадением
+        red_flag = CATEGORIES.index("red_flag")
+        self._fuzzy = FuzzyMatcher((w, p) for w, p in pairs if p != red_flag)
+        self.labels: Dict[str, str] = {key: labels.get(key) or LABELS[key] for key in CATEGORIES}
+        self.default_label = default_label
+        self.labels[DEFAULT_CATEGORY] = default_label
+        self._by_priority = [self.labels[key] for key in CATEGORIES]
+
+    def best_priority(self, problem: str, fuzzy: bool = True) -> Optional[int]:
+        priority = self._matcher.best_priority((problem or "").lower().strip())
+        if priority is None and fuzzy and len(problem or "") <= FUZZY_MAX_CHARS:
+            variants = self._fuzzy.variants(problem)
+            if variants:
+                priority = self._matcher.best_priority(variants)
+            if priority is None:
+                priority = self._fuzzy.best_priority(problem)
+        return priority
+
+    def best_priorities(self, problems: Sequence[str], fuzzy: bool = True) -> List[Optional[int]]:
+        """
+        Пачка текстов: точный поиск по каждому, нечеткий — одним проходом по промахам.
+        """
+        search = self._matcher.best_priority
+        out = [search((p or "").lower().strip()) for p in problems]
+        if fuzzy:
+            for i, p in enumerate(out):
+                if p is None and len(problems[i] or "") <= FUZZY_MAX_CHARS:
+                    variants = self._fuzzy.variants(problems[i])
+                    out[i] = search(variants) if variants else None
+        missed = [i for i, p in enumerate(out) if p is None and len(problems[i] or "") <= FUZZY_MAX_CHARS]
+        if fuzzy and missed:
+            for i, p in zip(missed, self._fuzzy.best_priorities([problems[i] for i in missed])):
+                out[i] = p
+        return out
+
+    def classify(self, problem: str) -> str:
+        priority = self.best_priority(problem)
+        return DEFAULT_CATEGORY if priority is None else CATEGORIES[priority]
+
+    def classify_batch(self, problems: Sequence[str]) -> List[str]:
+        return [DEFAULT_CATEGORY if p is None else CATEGORIES[p] for p in self.best_priorities(problems)]
+
+    def label(self, category: str) -> str:
+        return self.labels.get(category, self.default_label)
+
+    def guess_specialist(self, problem: str) -> str:
+        priority = self.best_priority(problem)
+        return self.default_label if priority is None else self._by_priority[priority]
+
+
+RU_LEXICON = Lexicon(((key, words) for key, _, words in LEXICON), LABELS, DEFAULT_LABEL)
+_MATCHER = RU_LEXICON._matcher
+
+
+# ---------- Public API ----------
+def classify(problem: str) -> str:
+    """
+    Текст -> ключ категории (red_flag, gastro, ... или default).
+    """
+    return RU_LEXICON.classify(problem)
+
+
+def guess_specialist(problem: str) -> str:
+    """
+    Симптом -> врач (без диагнозов).
+    """
+    return RU_LEXICON.guess_specialist(problem)
+
+
+def classify_batch(texts: Iterable[str]) -> List[str]:
+    """
+    Пачка текстов -> ключи категорий (как classify), нечеткий поиск — одним произведением матриц.
+    """
+    return RU_LEXICON.classify_batch(list(texts))
+
+
+def guess_specialist_batch(texts: Iterable[str]) -> List[str]:
+    """
+    Пачка текстов -> врачи (как guess_specialist).
+    """
+    labels = RU_LEXICON._by_priority
+    return [DEFAULT_LABEL if p is None else labels[p] for p in RU_LEXICON.best_priorities(list(texts))]
@@ -1 +1,157 @@
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
+from core.bundle import load_json
+
+DEFAULT_LOCALE = "ru"
+
+Render = Callable[[Mapping[str, Any]], str]
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _is_field(name: Any) -> bool:
+    if not isinstance(name, str):
+        return False
+    parts = name.split(".")
+    return len(parts) <= 2 and all(p.isidentifier() for p in parts)
+
+
+def _parse_text(where: str, text: Any) -> List[Tuple[str, Optional[str]]]:
+    """
+    "a {x} b" -> [("a ", "x"), (" b", None)]. Разрешены только {имя} и {имя.ключ}.
+    """
+    if not isinstance(text, str):
+        raise TemplateError(f"{where}: text must be a string")
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError as e:
+        raise TemplateError(f"{where}: {e}") from e
+    out = []
+    for literal, field, spec, conversion in parsed:
+        if field is not None and (not _is_field(field) or spec or conversion):
+            raise TemplateError(f"{where}: only plain {{name}} / {{name.key}} placeholders are supported, got {{{field}}}")
+        out.append((literal, field))
+    return out
+
+
+def compile_template(where: str, spec: Any) -> Render:
+    """
+    Шаблон -> функция render(values) -> str, собранная как Python-код.
+
+    Строка шаблона — текст с {полями} или {"if": поле | [поля], "all": bool, "text": ...}:
+    строка выводится, если поле (любое из списка / все при "all") непустое.
+    Поле — имя или "имя.ключ" (ключ вложенного словаря, например {duty.phone}).
+    "defaults" — значения для отсутствующих полей, "strip" — поля, у которых
+    обрезаются пробелы. Поля читаются из values по одному разу, строки
+    склеиваются одним join.
+    """
+    if isinstance(spec, list):
+        spec = {"lines": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("lines"), list):
+        raise TemplateError(f"{where}: template must be a list of lines or {{'lines': [...]}}")
+    defaults = spec.get("defaults") or {}
+    if not isinstance(defaults, dict) or not all(isinstance(v, (str, int, float)) for v in defaults.values()):
+        raise TemplateError(f"{where}: 'defaults' must map fields to strings or numbers")
+    strip = set(spec.get("strip") or ())
+
+    fields: Dict[str, int] = {}
+    lines = []
+    for i, line in enumerate(spec["lines"]):
+        at = f"{where}.lines[{i}]"
+        if isinstance(line, dict):
+            cond = line.get("if")
+            cond = [cond] if isinstance(cond, str) else cond
+            if not cond or not all(_is_field(c) for c in cond):
+                raise TemplateError(f"{at}: 'if' must be a field name or a list of them")
+            parts = _parse_text(at, line.get("text"))
+            join = " and " if line.get("all") else " or "
+        else:
+            cond, join = [], ""
+            parts = _parse_text(at, line)
+        for name in cond:
+            fields.setdefault(name, len(fields))
+        for _, name in parts:
+            if name is not None:
+                fields.setdefault(name, len(fields))
+
+        # соседние литералы и f-строки компилятор склеивает в одну f-строку
+        expr = " ".join(
+            piece
+            for literal, name in parts
+            for piece in ((repr(literal),) if literal else ()) + ((f"f'{{f{fields[name]}}}'",) if name else ())
+        ) or "''"
+        test = join.join(f"f{fields[name]}" for name in cond)
+        lines.append((test, expr))
+
+    src = ["def render(v):"]
+    parents: Dict[str, str] = {}
+    for name in fields:
+        if "." in name:
+            parent = name.split(".", 1)[0]
+            if parent not in parents:
+                parents[parent] = f"p{len(parents)}"
+                src.append(f"    {parents[parent]} = v.get({parent!r}) or empty")
+    for name, i in fields.items():
+        if "." in name:
+            parent, key = name.split(".", 1)
+            src.append(f"    f{i} = {parents[parent]}.get({key!r})")
+        else:
+            src.append(f"    f{i} = v.get({name!r})")
+        if name in defaults:
+            src.append(f"    if f{i} is None: f{i} = {defaults[name]!r}")
+        if name in strip:
+            src.append(f"    if f{i}: f{i} = str(f{i}).strip()")
+    # безусловные строки в начале — сразу литералом списка
+    head = 0
+    while head < len(lines) and not lines[head][0]:
+        head += 1
+    src.append(f"    out = [{', '.join(expr for _, expr in lines[:head])}]")
+    for test, expr in lines[head:]:
+        if test:
+            src.append(f"    if {test}: out.append({expr})")
+        else:
+            src.append(f"    out.append({expr})")
+    src.append("    return '\\n'.join(out)")
+
+    namespace: Dict[str, Any] = {"empty": {}}
+    exec(compile("\n".join(src), f"<template {where}>", "exec"), namespace)
+    return namespace["render"]
+
+
+class Templates:
+    """
+    Шаблоны сообщений по локалям ({локаль: {имя: шаблон}}), скомпилированные
+    один раз при загрузке. Нет шаблона в локали — берется из DEFAULT_LOCALE.
+    """
+
+    def __init__(self, spec: Mapping[str, Mapping[str, Any]]) -> None:
+        self._compiled: Dict[str, Dict[str, Render]] = {}
+        for locale, templates in spec.items():
+            if not isinstance(templates, dict):
+                raise TemplateError(f"{locale}: expected an object of templates")
+            self._compiled[locale] = {
+                name: compile_template(f"{locale}.{name}", tpl) for name, tpl in templates.items()
+            }
+        self._default = self._compiled.get(DEFAULT_LOCALE, {})
+
+    def get(self, name: str, locale: str = DEFAULT_LOCALE) -> Render:
+        render = self._compiled.get(locale, self._default).get(name) or self._default.get(name)
+        if render is None:
+            raise KeyError(f"template {name!r} is not defined")
+        return render
+
+    def render(self, name: str, locale: str = DEFAULT_LOCALE, **values: Any) -> str:
+        return self.get(name, locale)(values)
+
+
+def load_templates(path: str) -> Templates:
+    try:
+        spec = load_json(path)
+    except (OSError, ValueError) as e:
+        raise TemplateError(f"{path}: {e}") from e
+    if not isinstance(spec, dict):
+        raise TemplateError(f"{path}: expected an object of locales")
+    return Templates(spec)
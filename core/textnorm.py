@@ -0,0 +1,97 @@
+import re
+import unicodedata
+from typing import List
+
+# Кириллица -> латиница "по-латышски": ж/ш -> z/s, как после снятия диакритики с ž/š,
+# поэтому "Рожу" и "Rožu" сходятся в одно "rozu".
+_CYR_TO_LAT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "jo", "ж": "z",
+    "з": "z", "и": "i", "й": "j", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "c",
+    "ч": "c", "ш": "s", "щ": "sc", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "ju",
+    "я": "ja",
+}
+_TRANSLIT = str.maketrans(_CYR_TO_LAT)
+
+# Латиница -> кириллица для русского, набранного латиницей ("bolit zhivot", "zub bolit").
+# Сначала длинные сочетания; y после гласной и не перед ней — й, иначе ы.
+_LAT_TO_CYR = {
+    "shch": "щ", "sch": "щ", "zh": "ж", "kh": "х", "ch": "ч", "sh": "ш", "ts": "ц",
+    "yu": "ю", "ju": "ю", "ya": "я", "ja": "я", "yo": "ё", "jo": "ё", "ye": "е",
+    "a": "а", "b": "б", "c": "ц", "d": "д", "e": "е", "f": "ф", "g": "г", "h": "х",
+    "i": "и", "j": "й", "k": "к", "l": "л", "m": "м", "n": "н", "o": "о", "p": "п",
+    "q": "к", "r": "р", "s": "с", "t": "т", "u": "у", "v": "в", "w": "в", "x": "кс",
+    "y": "ы", "z": "з", "'": "ь",
+}
+_LAT_RUN = re.compile(
+    r"(?P<j>(?<=[aeiou])y(?![aeiou]))|" + "|".join(sorted(map(re.escape, _LAT_TO_CYR), key=len, reverse=True))
+)
+_HAS_LAT = re.compile("[a-z]")
+_REPEAT = re.compile(r"(\w)\1+")
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def strip_marks(text: str) -> str:
+    """
+    Латиница без диакритики: ā -> a, š -> s, ļ -> l. Кириллицу не трогать
+    этой функцией — й/ё тоже разложатся (для нее есть fold).
+    """
+    t = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in t if not unicodedata.combining(ch))
+
+
+def fold(text: str) -> str:
+    """
+    Нормализация для поиска: нижний регистр, без латышской диакритики
+    (ā -> a, š -> s, ...), кириллица транслитерирована в латиницу.
+    """
+    return strip_marks((text or "").lower().translate(_TRANSLIT))
+
+
+def to_cyrillic(text: str) -> str:
+    """
+    Транслит обратно в кириллицу (нижний регистр, без диакритики). Латышский
+    текст тоже превратится в "кириллицу" — вызывающий сравнивает с обоими вариантами.
+    """
+    t = (text or "").lower()
+    if not _HAS_LAT.search(t):
+        return t
+    t = strip_marks(t)
+    return _LAT_RUN.sub(lambda m: "й" if m.group("j") else _LAT_TO_CYR[m.group()], t)
+
+
+def squeeze(text: str) -> str:
+    """
+    Повторы одной буквы -> одна: "зууб" -> "зуб", "болиит" -> "болит".
+    """
+    return _REPEAT.sub(r"\1", text)
+
+
+def distance(a: str, b: str, limit: int) -> int:
+    """
+    Расстояние Дамерау–Левенштейна (OSA) с отсечкой: > limit -> limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        best = cur[0]
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            if v < best:
+                best = v
+        if best > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def tokens(text: str) -> List[str]:
+    return [t for t in _NON_WORD.split(fold(text)) if t]
@@ -1 +1,225 @@
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
+from core.i18n import Catalog, I18nError
+from core.scenario_engine import Scenario, ScenarioError
+from core.template_engine import TemplateError, Templates
+
+
+class DataError(ValueError):
+    """
+    Ошибки проверки data/: по строке на проблему ("<файл>: <путь>: <что не так>").
+    """
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+# ---------- Schemas ----------
+# Схема — тип (str, bool), NUMBER, Obj, ListOf или MapOf; check дописывает
+# ошибки в список и не останавливается на первой.
+NUMBER = (int, float)
+
+
+def _type_name(schema: Any) -> str:
+    if schema is NUMBER:
+        return "number"
+    if isinstance(schema, tuple):
+        return " or ".join(_type_name(s) for s in schema)
+    return getattr(schema, "__name__", str(schema))
+
+
+class Obj:
+    """
+    Объект с известными полями; required — обязательные. Лишние ключи разрешены
+    (данные пишут руками — комментарии, будущие поля).
+    """
+
+    __slots__ = ("fields", "required")
+
+    def __init__(self, fields: Mapping[str, Any], required: Iterable[str] = ()) -> None:
+        self.fields = dict(fields)
+        self.required = tuple(required)
+
+    def check(self, where: str, value: Any, errors: List[str]) -> None:
+        if not isinstance(value, dict):
+            errors.append(f"{where}: expected an object")
+            return
+        for key in self.required:
+            if key not in value:
+                errors.append(f"{where}: missing {key!r}")
+        for key, schema in self.fields.items():
+            if key in value:
+                check(f"{where}.{key}", value[key], schema, errors)
+
+
+class ListOf:
+    __slots__ = ("item", "min_len")
+
+    def __init__(self, item: Any, min_len: int = 0) -> None:
+        self.item = item
+        self.min_len = min_len
+
+    def check(self, where: str, value: Any, errors: List[str]) -> None:
+        if not isinstance(value, list):
+            errors.append(f"{where}: expected a list")
+            return
+        if len(value) < self.min_len:
+            errors.append(f"{where}: expected at least {self.min_len} item(s)")
+        for i, item in enumerate(value):
+            check(f"{where}[{i}]", item, self.item, errors)
+
+
+class MapOf:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def check(self, where: str, value: Any, errors: List[str]) -> None:
+        if not isinstance(value, dict):
+            errors.append(f"{where}: expected an object")
+            return
+        for key, item in value.items():
+            check(f"{where}.{key}", item, self.value, errors)
+
+
+def check(where: str, value: Any, schema: Any, errors: List[str]) -> None:
+    if isinstance(schema, (Obj, ListOf, MapOf)):
+        schema.check(where, value, errors)
+    elif isinstance(value, bool) and schema is not bool:
+        errors.append(f"{where}: expected {_type_name(schema)}, got bool")
+    elif not isinstance(value, schema):
+        errors.append(f"{where}: expected {_type_name(schema)}, got {type(value).__name__}")
+
+
+CONTACT = Obj({"name": str, "address": str, "phone": str, "notes": str, "lat": NUMBER, "lon": NUMBER})
+FACILITY = Obj(
+    {"name": str, "type": str, "address": str, "phone": str, "lat": NUMBER, "lon": NUMBER, "specialists": ListOf(str)},
+    required=("name",),
+)
+RESOURCES = Obj({"city": str, "hospital": CONTACT, "duty_doctor": CONTACT, "facilities": ListOf(FACILITY)})
+
+# дом: [номер, lat, lon]
+HOUSE = ListOf(NUMBER, min_len=3)
+GEO = Obj(
+    {
+        "city": str,
+        "aliases": ListOf(str),
+        "streets": ListOf(Obj({"name": str, "aliases": ListOf(str), "houses": ListOf(HOUSE)}, required=("name", "houses"))),
+    },
+    required=("city", "streets"),
+)
+
+SCENARIO = Obj(
+    {
+        "name": str,
+        "group": str,
+        "states": ListOf(str, min_len=1),
+        "buttons": ListOf(str),
+        "keep": ListOf(str),
+        "transitions": ListOf(Obj(
+            {"state": str, "event": str, "handler": str, "next": str, "clear": bool},
+            required=("state", "event", "handler"),
+        )),
+    },
+    required=("name", "states", "transitions"),
+)
+
+I18N = Obj(
+    {
+        "name": str,
+        "buttons": MapOf(str),
+        "messages": MapOf(str),
+        "plurals": MapOf(MapOf(str)),
+        "specialists": MapOf(str),
+        "symptoms": MapOf(ListOf(str)),
+    }
+)
+
+# шаблоны целиком проверяет их компилятор (core.template_engine)
+TEMPLATES = MapOf(MapOf((dict, list)))
+
+
+# ---------- Compile checks ----------
+class _AnyHandler(dict):
+    """
+    Хендлеры сценария живут в боте; для проверки файла годится любое имя.
+    """
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str)
+
+    def __getitem__(self, name: str) -> Any:
+        return name
+
+
+def _compile_scenario(data: Any) -> None:
+    Scenario(data, _AnyHandler())
+
+
+def _compile_templates(data: Any) -> None:
+    Templates(data)
+
+
+def _compile_i18n(data: Any) -> None:
+    Catalog("check", data)
+
+
+# каталог data/ -> (схема, проверка сборкой тем же кодом, что и в боте)
+KINDS: Dict[str, Tuple[Any, Optional[Callable[[Any], None]]]] = {
+    "resources": (RESOURCES, None),
+    "geo": (GEO, None),
+    "scenarios": (SCENARIO, _compile_scenario),
+    "templates": (TEMPLATES, _compile_templates),
+    "i18n": (I18N, _compile_i18n),
+}
+
+
+def validate(kind: str, where: str, data: Any) -> List[str]:
+    schema, compile_check = KINDS[kind]
+    errors: List[str] = []
+    check(where, data, schema, errors)
+    if not errors and compile_check is not None:
+        try:
+            compile_check(data)
+        except (ScenarioError, TemplateError, I18nError) as e:
+            errors.append(f"{where}: {e}")
+    return errors
+
+
+def data_files(root: str) -> List[Tuple[str, str]]:
+    """
+    (вид, путь относительно root) для всех JSON-файлов известных каталогов.
+    """
+    out = []
+    for kind in KINDS:
+        folder = os.path.join(root, kind)
+        if os.path.isdir(folder):
+            out += [(kind, f"{kind}/{name}") for name in sorted(os.listdir(folder)) if name.endswith(".json")]
+    return out
+
+
+def validate_tree(root: str = "data") -> Dict[str, Any]:
+    """
+    Разбирает и проверяет все файлы data/. {путь: данные} или DataError со всеми ошибками сразу.
+    """
+    files: Dict[str, Any] = {}
+    errors: List[str] = []
+    for kind, rel in data_files(root):
+        try:
+            with open(os.path.join(root, rel), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            errors.append(f"{rel}: {e}")
+            continue
+        found = validate(kind, rel, data)
+        if found:
+            errors += found
+        else:
+            files[rel] = data
+    if errors:
+        raise DataError(errors)
+    return files
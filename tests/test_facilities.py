@@ -0,0 +1,55 @@
+"""
+Выбор учреждения (pick_facility) по тегам специалистов. Каталог
+синтетический: в data/resources — только проверенные по реестру учреждения.
+"""
+from apps.telegram.bot import pick_facility
+from core.resources import ResourceSnapshot
+
+CENTRE = (56.509, 21.012)
+
+CITY = {
+    "city": "Testpils",
+    "hospital": {"name": "Hospital", "address": "Slimnīcas 1", "phone": "+37100000000", "lat": 56.5283, "lon": 21.0153},
+    "facilities": [
+        {"name": "Dentist", "type": "dentist", "lat": 56.5088, "lon": 21.0115, "specialists": ["dental"]},
+        {"name": "Eye doctor", "type": "clinic", "lat": 56.5153, "lon": 21.0155, "specialists": ["eye"]},
+        {"name": "Duty doctor", "type": "duty", "lat": 56.5200, "lon": 21.0150, "specialists": ["general"]},
+        # аптека без тегов: к ней не ведут ни с какой жалобой
+        {"name": "Pharmacy", "type": "pharmacy", "lat": 56.5090, "lon": 21.0120},
+    ],
+}
+
+
+def _snapshot() -> ResourceSnapshot:
+    return ResourceSnapshot({"Testpils": CITY}, "Testpils", None)
+
+
+def test_specialist_goes_to_tagged_facility() -> None:
+    resources = _snapshot()
+    facility, city, km = pick_facility(resources, "dental", False, CENTRE)
+    assert facility is not None and facility["name"] == "Dentist"
+    assert city["city"] == "Testpils"
+    assert km is not None and km < 0.5
+    facility, _, _ = pick_facility(resources, "eye", False, CENTRE)
+    assert facility is not None and facility["name"] == "Eye doctor"
+
+
+def test_untagged_pharmacy_is_never_picked() -> None:
+    resources = _snapshot()
+    facility, _, _ = pick_facility(resources, "general", False, CENTRE)
+    assert facility is not None and facility["name"] == "Duty doctor"
+    facility, _, _ = pick_facility(resources, "derma", False, CENTRE)
+    assert facility is not None and facility["name"] == "Hospital"
+
+
+def test_severe_and_red_flag_go_to_hospital() -> None:
+    resources = _snapshot()
+    for category, severe in (("dental", True), ("red_flag", False)):
+        facility, _, _ = pick_facility(resources, category, severe, CENTRE)
+        assert facility is not None and facility["type"] == "hospital"
+
+
+def test_without_coordinates_default_city() -> None:
+    facility, city, km = pick_facility(_snapshot(), "dental", False, None)
+    assert facility is None and km is None
+    assert city["hospital"]["name"] == "Hospital"
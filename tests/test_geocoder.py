@@ -0,0 +1,48 @@
+from typing import Optional
+
+import pytest
+
+from core.geocoder import Geocoder
+
+GEO = Geocoder.from_dir("data/geo")
+
+
+def _label(text: str) -> Optional[str]:
+    found = GEO.resolve(text)
+    return found.label if found is not None else None
+
+
+@pytest.mark.parametrize("text", ["Brīvības 100, Liepāja", "Liepāja, Brīvības iela 100", "Лиепая, ул. Бривибас 100"])
+def test_own_city_before_or_after_street(text: str) -> None:
+    found = GEO.resolve(text)
+    assert found is not None
+    assert found.label == "Brīvības iela 100, Liepāja"
+    assert found.exact
+
+
+@pytest.mark.parametrize("text", ["Brīvības 100, Rīga", "Rīga, Brīvības iela 100", "Рига, ул. Бривибас 100", "Graudu 5, Grobiņa"])
+def test_other_city_before_or_after_street(text: str) -> None:
+    assert GEO.resolve(text) is None
+
+
+def test_apartment_after_number_keeps_exact() -> None:
+    found = GEO.resolve("Brīvības 100 dz. 5")
+    assert found is not None and found.exact
+
+
+def test_unknown_words_after_number_are_not_exact() -> None:
+    found = GEO.resolve("Brīvības 100, Nekurciems")
+    assert found is not None
+    assert found.label == "Brīvības iela 100, Liepāja"
+    assert not found.exact
+
+
+def test_street_named_after_other_city() -> None:
+    geo = Geocoder([{
+        "city": "Liepāja",
+        "aliases": ["liepaja"],
+        "streets": [{"name": "Ventspils iela", "houses": [[1, 56.53, 21.01], [20, 56.54, 21.02]]}],
+    }])
+    found = geo.resolve("Ventspils iela 1, Liepāja")
+    assert found is not None and found.label == "Ventspils iela 1, Liepāja" and found.exact
+    assert geo.resolve("Ventspils iela 1, Rīga") is None
@@ -0,0 +1,48 @@
+import asyncio
+from typing import List, Tuple
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from apps.telegram.metrics import BotMetrics, build_metrics_app
+
+
+def _statuses(requests: List[Tuple[str, str]]) -> List[int]:
+    async def run() -> List[int]:
+        async with TestClient(TestServer(build_metrics_app(BotMetrics()))) as client:
+            out = []
+            for method, path in requests:
+                response = await client.request(method, path)
+                out.append(response.status)
+            await client.request("DELETE", "/debug/tracemalloc")
+            return out
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("POST", "/debug/profile?seconds=abc"),
+        ("POST", "/debug/profile?seconds=nan"),
+        ("POST", "/debug/profile?seconds=-5"),
+        ("POST", "/debug/profile?sample=1.5"),
+        ("GET", "/debug/profile?limit=x"),
+        ("GET", "/debug/profile?sort=nope"),
+        ("POST", "/debug/tracemalloc?frames=0"),
+        ("GET", "/debug/tracemalloc?limit="),
+    ],
+)
+def test_malformed_query_is_bad_request(method: str, path: str) -> None:
+    assert _statuses([(method, path)]) == [400]
+
+
+def test_valid_requests() -> None:
+    assert _statuses([
+        ("GET", "/metrics"),
+        ("POST", "/debug/profile?seconds=1&sample=2"),
+        ("GET", "/debug/profile?limit=5&sort=tottime"),
+        ("DELETE", "/debug/profile"),
+        ("POST", "/debug/tracemalloc?frames=2"),
+        ("GET", "/debug/tracemalloc?limit=3"),
+    ]) == [200] * 6
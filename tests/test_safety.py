@@ -0,0 +1,30 @@
+import pytest
+
+from apps.telegram.bot import I18N, RED_FLAGS
+
+
+@pytest.mark.parametrize(
+    "text, category",
+    [
+        ("augsts asinsspiediens", "cardio"),
+        ("asins analīzes rezultāti", "default"),
+        ("nedaudz asiņo smaganas", "dental"),
+    ],
+)
+def test_lv_blood_words_are_not_red_flags(text: str, category: str) -> None:
+    # "asins"/"asiņo" внутри обычных слов — не повод для совета звонить 113
+    assert RED_FLAGS.locale(text) is None
+    assert I18N.get("lv").lexicon.classify(text) == category
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["stipri asiņo brūce", "Asiņošana neapstājas", "asins vemšana", "asinis izkārnījumos", "stipri asino"],
+)
+def test_lv_bleeding_phrases_are_red_flags(text: str) -> None:
+    assert RED_FLAGS.locale(text) == "lv"
+
+
+@pytest.mark.parametrize("text", ["не хватает воздуха", "у мамы потеря сознания", "zaudēju samaņu"])
+def test_red_flags_still_detected(text: str) -> None:
+    assert RED_FLAGS.locale(text) is not None
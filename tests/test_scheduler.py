@@ -0,0 +1,192 @@
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.exceptions import TelegramConflictError, TelegramNetworkError, TelegramUnauthorizedError
+from aiogram.methods import GetUpdates
+from aiogram.types import Chat, Message, Update, User
+from aiogram.utils.backoff import BackoffConfig
+
+from apps.telegram.outbound import DEFAULT, URGENT, get_priority, set_priority
+from apps.telegram.scheduler import ChatScheduler, chat_key, run_polling
+
+
+def _update(update_id: int, chat_id: int) -> Update:
+    user = User(id=chat_id, is_bot=False, first_name="u")
+    chat = Chat(id=chat_id, type="private")
+    message = Message(message_id=update_id, date=datetime.now(), chat=chat, from_user=user, text="x")
+    return Update(update_id=update_id, message=message)
+
+
+class ProbeDispatcher:
+    """
+    Вместо Dispatcher: выполняет step(update) и записывает порядок, пересечения и пик.
+    """
+
+    def __init__(self, step: Optional[Callable[[Update], Awaitable[None]]] = None) -> None:
+        self.step = step
+        self.order: Dict[int, List[int]] = defaultdict(list)
+        self.busy: Dict[int, bool] = {}
+        self.running = 0
+        self.peak = 0
+        self.overlaps = 0
+
+    async def feed_update(self, bot: Any, update: Update) -> None:
+        key = chat_key(update)
+        if self.busy.get(key):
+            self.overlaps += 1
+        self.busy[key] = True
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            if self.step is not None:
+                await self.step(update)
+            else:
+                await asyncio.sleep(0)
+            self.order[key].append(update.update_id)
+        finally:
+            self.running -= 1
+            self.busy[key] = False
+
+
+def _shuffled(chats: int, per_chat: int, seed: int = 1) -> List[Update]:
+    updates = [_update(i, i % chats + 1) for i in range(chats * per_chat)]
+    random.Random(seed).shuffle(updates)
+    return updates
+
+
+async def _run(dp: ProbeDispatcher, updates: List[Update], **limits: int) -> ChatScheduler:
+    scheduler = ChatScheduler(dp, None, **limits)  # type: ignore[arg-type]
+    for update in updates:
+        await scheduler.submit(update)
+    await scheduler.drain()
+    return scheduler
+
+
+def test_chat_order_and_no_overlap() -> None:
+    rnd = random.Random(2)
+
+    async def step(update: Update) -> None:
+        await asyncio.sleep(rnd.random() * 0.001)
+
+    updates = _shuffled(chats=20, per_chat=10)
+    expected: Dict[int, List[int]] = defaultdict(list)
+    for update in updates:
+        expected[chat_key(update)].append(update.update_id)
+
+    dp = ProbeDispatcher(step)
+    scheduler = asyncio.run(_run(dp, updates, concurrency=8, max_pending=32))
+
+    assert dp.order == expected
+    assert dp.overlaps == 0
+    assert scheduler.processed == len(updates)
+
+
+def test_concurrency_bound() -> None:
+    async def step(update: Update) -> None:
+        await asyncio.sleep(0.001)
+
+    dp = ProbeDispatcher(step)
+    asyncio.run(_run(dp, _shuffled(chats=30, per_chat=3), concurrency=5, max_pending=100))
+
+    assert dp.peak == 5
+
+
+def test_backpressure_and_drain() -> None:
+    async def scenario() -> None:
+        gate = asyncio.Event()
+
+        async def step(update: Update) -> None:
+            await gate.wait()
+
+        dp = ProbeDispatcher(step)
+        scheduler = ChatScheduler(dp, None, concurrency=4, max_pending=3)  # type: ignore[arg-type]
+        for i in range(3):
+            await scheduler.submit(_update(i, i + 1))
+        blocked = asyncio.ensure_future(scheduler.submit(_update(3, 4)))
+        await asyncio.sleep(0.01)
+        # очередь полна: четвертый апдейт не принят, пока не доработан хотя бы один
+        assert not blocked.done()
+        assert scheduler.pending == 3
+
+        gate.set()
+        await asyncio.wait_for(blocked, 1)
+        await scheduler.drain()
+        assert scheduler.processed == 4
+        assert scheduler.pending == 0
+        assert sum(len(ids) for ids in dp.order.values()) == 4
+
+    asyncio.run(scenario())
+
+
+def test_failed_update_does_not_stop_chat() -> None:
+    async def step(update: Update) -> None:
+        if update.update_id == 0:
+            raise RuntimeError("boom")
+
+    dp = ProbeDispatcher(step)
+    scheduler = asyncio.run(_run(dp, [_update(0, 1), _update(1, 1)], concurrency=2, max_pending=4))
+
+    assert dp.order[1] == [1]
+    assert scheduler.processed == 2
+
+
+@pytest.mark.parametrize("chats", [1, 3])
+def test_priority_does_not_leak_between_updates(chats: int) -> None:
+    seen: List[int] = []
+
+    async def step(update: Update) -> None:
+        seen.append(get_priority())
+        # как red-flag хендлер: все дальнейшие отправки апдейта — срочные
+        set_priority(URGENT)
+
+    asyncio.run(_run(ProbeDispatcher(step), [_update(i, i % chats + 1) for i in range(6)], concurrency=2, max_pending=8))
+
+    assert seen == [DEFAULT] * 6
+    assert get_priority() == DEFAULT
+
+
+class FailingBot:
+    """
+    Вместо Bot: getUpdates падает ошибками из errors по очереди.
+    """
+
+    def __init__(self, errors: List[Exception]) -> None:
+        self.errors = errors
+        self.calls: List[float] = []
+        self.session = self
+        self.closed = False
+
+    async def __call__(self, method: Any) -> List[Update]:
+        self.calls.append(asyncio.get_running_loop().time())
+        if self.errors:
+            raise self.errors.pop(0)
+        return []
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.parametrize("fatal", [TelegramUnauthorizedError, TelegramConflictError])
+def test_polling_fails_on_fatal_errors_after_backoff(fatal: type) -> None:
+    method = GetUpdates()
+    transient = [TelegramNetworkError(method, "timeout") for _ in range(3)]
+    bot = FailingBot(transient + [fatal(method, "fatal")])
+    dp = Dispatcher()
+    scheduler = ChatScheduler(dp, bot)  # type: ignore[arg-type]
+    backoff = BackoffConfig(min_delay=0.01, max_delay=0.03, factor=2, jitter=0)
+
+    with pytest.raises(fatal):
+        asyncio.run(run_polling(dp, bot, scheduler, timeout=0, backoff=backoff))  # type: ignore[arg-type]
+
+    assert len(bot.calls) == 4
+    pauses = [b - a for a, b in zip(bot.calls, bot.calls[1:])]
+    # растущая пауза, но не больше max_delay
+    assert pauses[0] >= 0.01
+    assert pauses[1] >= 0.02
+    assert 0.03 <= pauses[2] < 0.5
+    assert bot.closed
@@ -0,0 +1,68 @@
+import asyncio
+from collections import Counter
+from typing import List
+
+from aiogram import Bot
+from aiogram.fsm.storage.base import StorageKey
+
+from apps.telegram.bot import RESOURCES, build_dispatcher
+from bench.bot_load import FakeSession, _dataset, _step
+from bench.fsm_round_trips import BatchedCountingStorage, CountingStorage
+from core.geocoder import get_geocoder
+from core.state_tx import StateTx
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+def test_dispatcher_reads_once_and_writes_at_most_once() -> None:
+    """
+    Через build_dispatcher: на апдейт одно чтение состояния и данных и не больше одной записи.
+    """
+    RESOURCES.load()
+    get_geocoder()
+    storage = BatchedCountingStorage()
+    dp = build_dispatcher(storage)
+    bot = Bot("42:TEST", session=FakeSession())
+    per_update: List[Counter] = []
+
+    async def run() -> None:
+        for steps in _dataset(30, 1):
+            for _, update in steps:
+                storage.calls.clear()
+                await _step(dp, bot, update)
+                per_update.append(Counter(storage.calls))
+
+    asyncio.run(run())
+
+    assert per_update
+    assert all(calls["get_state_and_data"] == 1 for calls in per_update)
+    assert all(calls["set_state_and_data"] <= 1 for calls in per_update)
+    assert not any(calls["get_state"] or calls["get_data"] or calls["set_state"] or calls["set_data"] for calls in per_update)
+    # хоть какие-то апдейты что-то пишут — иначе проверка записи пустая
+    assert any(calls["set_state_and_data"] for calls in per_update)
+
+
+def test_split_storage_falls_back_to_two_calls() -> None:
+    async def run() -> Counter:
+        storage = CountingStorage()
+        tx = await StateTx(storage, KEY).load()
+        tx.update_data(locale="lv")
+        tx.set_state("Flow:problem")
+        assert await tx.commit()
+        again = await StateTx(storage, KEY).load()
+        assert again.state == "Flow:problem"
+        assert again.data == {"locale": "lv"}
+        return storage.calls
+
+    assert asyncio.run(run()) == Counter(get_state=2, get_data=2, set_state=1, set_data=1)
+
+
+def test_commit_without_changes_writes_nothing() -> None:
+    async def run() -> Counter:
+        storage = BatchedCountingStorage()
+        tx = await StateTx(storage, KEY).load()
+        tx.set_state(None)
+        assert not await tx.commit()
+        return storage.calls
+
+    assert asyncio.run(run()) == Counter(get_state_and_data=1)